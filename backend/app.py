@@ -1,21 +1,33 @@
 import sys
 import os
+import time
+import json
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the parent directory of 'backend' to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from interpreter_logic import (
-    email_parser, normal_text_analyzer, reverse_concatenate, 
-    comment_detector, word_frequency_calculator,
-    regex_matcher, calculator,
-    operator_delimiter_recognizer, parser_action_printer, compiler_error_classifier,
-    semantic_action_simulator,
-    run_full_c_code,
     execute_single_command,
-    flex_bison_arithmetic_calculator,
-    process_command_language,
-    boolean_expression_evaluator,
+    run_cli_command,
+    run_option,
+    run_option_file,
+    stream_option,
+    start_background_builds,
+    analyzer_readiness,
+    OPTIONS,
+)
+from backend.expression_engine import ExpressionError
+from backend.vector_engine import evaluate_columns, TooManyRows
+from backend.result_cache import run_cached, result_cache_stats
+from backend.metrics import request_timing, render_prometheus
+from backend.sandbox import SandboxBusy, sandbox_stats, SANDBOX_QUEUE_TIMEOUT
+from backend.file_analysis import UploadTooLarge, spool_upload
+from backend.project_analysis import PROJECT_OPTIONS, ProjectTooLarge, analyze_project
+from backend.cli_sessions import (
+    CLI_SESSIONS, CLI_SESSION_IDLE_TTL, SESSION_COOKIE, SESSION_HEADER, run_session_command,
 )
 
 app = Flask(__name__)
@@ -24,79 +36,324 @@ app = Flask(__name__)
 def index():
     return render_template('index.html')
 
+def _cli_session_id(data):
+    # JSON token first, then header, then cookie
+    return data.get('session') or request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+
 @app.route('/api/execute_cli_command', methods=['POST'])
 def execute_cli_command():
     data = request.json
     command = data.get('command', '')
-    variables = data.get('variables', {})
-    result = execute_single_command(command, variables)
-    return jsonify(result)
+    if 'variables' in data:
+        # Stateless protocol: the client sends and receives the whole variable table
+        variables = data.get('variables', {})
+        result = execute_single_command(command, variables)
+        return jsonify(result)
+
+    result = run_session_command(_cli_session_id(data), command, run_cli_command)
+    response = jsonify(result)
+    if result["ended"]:
+        response.delete_cookie(SESSION_COOKIE)
+    else:
+        response.set_cookie(SESSION_COOKIE, result["session"], max_age=int(CLI_SESSION_IDLE_TTL),
+                            httponly=True, samesite='Strict')
+    return response
+
+@app.route('/api/cli_session', methods=['DELETE'])
+def end_cli_session():
+    session_id = _cli_session_id(request.get_json(silent=True) or {})
+    if session_id:
+        CLI_SESSIONS.end(session_id)
+    response = jsonify({"ended": True})
+    response.delete_cookie(SESSION_COOKIE)
+    return response
+
+_RETRY_AFTER_SECONDS = max(1, int(SANDBOX_QUEUE_TIMEOUT // 4))
+
+def _sandbox_busy_body(error):
+    return {
+        "error": str(error),
+        "stage": error.stage,
+        "queue_depth": error.queue_depth,
+        "wait_ms": round(error.waited * 1000, 3),
+    }
+
+def _sandbox_busy_response(error):
+    # Admission control rejected the request; tell the client to back off rather than queue forever
+    return jsonify(_sandbox_busy_body(error)), 429, {'Retry-After': str(_RETRY_AFTER_SECONDS)}
+
+def _metrics_label(option):
+    # The option comes from the request; keep the set of metric labels bounded
+    return option if option in OPTIONS else 'unknown'
+
+def _output_body(result, want_records):
+    # Analyzers that parse structured records return them on the result; see backend/records.py
+    body = {"output": result}
+    if want_records:
+        body["records"] = getattr(result, 'records', None)
+    return body
 
 @app.route('/api/interpret', methods=['POST'])
 def interpret():
     data = request.json
     selected_option = data.get('option', '')
-    regex_pattern = data.get('pattern', '') # For regex matcher, if applicable
 
-    result = "Invalid option selected."
+    with request_timing(_metrics_label(selected_option)) as timing:
+        try:
+            result = run_cached(selected_option, data, run_option)
+        except SandboxBusy as e:
+            return _sandbox_busy_response(e)
+        except Exception as e:
+            result = f"An error occurred: {str(e)}"
+
+    response = jsonify(_output_body(result, data.get('records') is True))
+    response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+# --- File uploads ---
+# Accepts either a multipart form with a 'file' part (other fields such as
+# 'option' go in the form) or the raw file as the request body (fields in the
+# query string). The upload is spooled to a temporary file in chunks and
+# analyzed from there; see backend/file_analysis.py.
+@app.route('/api/interpret_file', methods=['POST'])
+def interpret_file():
+    upload = request.files.get('file')
+    if upload is not None:
+        data = request.form.to_dict()
+        read = upload.stream.read
+    else:
+        data = request.args.to_dict()
+        read = request.stream.read
+    selected_option = data.get('option', '')
+
+    with request_timing(_metrics_label(selected_option)) as timing:
+        try:
+            spooled = spool_upload(read)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        try:
+            result = run_option_file(selected_option, spooled, data)
+        except SandboxBusy as e:
+            return _sandbox_busy_response(e)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except Exception as e:
+            result = f"An error occurred: {str(e)}"
+        finally:
+            spooled.close()
+
+    response = jsonify({"output": result})
+    response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache_stats())
+
+@app.route('/api/sandbox_stats', methods=['GET'])
+def api_sandbox_stats():
+    return jsonify(sandbox_stats())
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # 503 until every scheduled analyzer build has finished; failed and lazy builds are reported but do not block readiness
+    is_ready, analyzers = analyzer_readiness()
+    return jsonify({"ready": is_ready, "analyzers": analyzers}), 200 if is_ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Streaming interpretation (Server-Sent Events) ---
+# Each event carries a JSON string so newlines and carriage returns in program
+# output survive the SSE line framing. The stream always ends with a 'done' event.
+# The first event is produced before the response starts, so a request the
+# sandbox rejects at admission still gets a 429 with Retry-After. A rejection
+# after output has been sent arrives as a 'busy' event with the same body plus
+# retry_after.
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/api/interpret_stream', methods=['POST'])
+def interpret_stream():
+    data = request.json
+    selected_option = data.get('option', '')
 
+    timing = ExitStack() # Closed when the response is, so the whole stream is timed
+    timing.enter_context(request_timing(_metrics_label(selected_option)))
+    events = stream_option(selected_option, data)
+    timing.callback(events.close) # Releases a held slot if the client goes away mid-stream
     try:
-        if selected_option == 'run_full_c_code':
-            c_code = data.get('c_code', '')
-            user_input_string = data.get('user_input_string', '')
-            result = run_full_c_code(c_code, user_input_string) # Pass both arguments
-        elif selected_option == 'regex_matcher':
-            user_input = data.get('input', '') # Get 'input' for regex_matcher
-            if not regex_pattern:
-                result = "Please provide a regex pattern in the input for Regex Matcher."
-            else:
-                result = regex_matcher(user_input, regex_pattern)
-        elif selected_option == 'email_parser':
-            user_input = data.get('input', '')
-            result = email_parser(user_input)
-        elif selected_option == 'normal_text_analyzer':
-            user_input = data.get('input', '')
-            result = normal_text_analyzer(user_input)
-        elif selected_option == 'reverse_concatenate':
-            user_input = data.get('input', '')
-            result = reverse_concatenate(user_input)
-        elif selected_option == 'comment_detector':
-            user_input = data.get('input', '')
-            result = comment_detector(user_input)
-        elif selected_option == 'word_frequency_calculator':
-            user_input = data.get('input', '')
-            result = word_frequency_calculator(user_input)
-        elif selected_option == 'calculator':
-            user_input = data.get('input', '')
-            result = calculator(user_input)
-        elif selected_option == 'flex_bison_arithmetic_calculator':
-            user_input = data.get('input', '')
-            result = flex_bison_arithmetic_calculator(user_input)
-        elif selected_option == 'operator_delimiter_recognizer':
-            user_input = data.get('input', '')
-            result = operator_delimiter_recognizer(user_input)
-        elif selected_option == 'parser_action_printer':
-            user_input = data.get('input', '')
-            result = parser_action_printer(user_input)
-        elif selected_option == 'compiler_error_classifier':
-            user_input = data.get('input', '')
-            result = compiler_error_classifier(user_input)
-        elif selected_option == 'semantic_action_simulator':
-            user_input = data.get('input', '')
-            result = semantic_action_simulator(user_input)
-        elif selected_option == 'command_language_interpreter':
-            user_input = data.get('input', '')
-            result = process_command_language(user_input)
-        elif selected_option == 'boolean_expression_evaluator':
-            user_input = data.get('input', '')
-            result = boolean_expression_evaluator(user_input)
-
-        else:
-            result = f"Unknown option: {selected_option}"
+        first = [next(events)]
+    except StopIteration:
+        first = []
+    except SandboxBusy as e:
+        timing.close()
+        return _sandbox_busy_response(e)
     except Exception as e:
-        result = f"An error occurred: {str(e)}"
+        first, events = [('error', f"An error occurred: {str(e)}")], iter(())
 
-    return jsonify({"output": result})
+    def generate():
+        try:
+            for event, text in first:
+                yield _sse(event, text)
+            for event, text in events:
+                yield _sse(event, text)
+        except SandboxBusy as e:
+            yield _sse('busy', dict(_sandbox_busy_body(e), retry_after=_RETRY_AFTER_SECONDS))
+        except Exception as e:
+            yield _sse('error', f"An error occurred: {str(e)}")
+        yield _sse('done', '')
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+    response.call_on_close(timing.close)
+    return response
+
+# --- Project analysis ---
+# Runs several analyzers over every C file of a project on a process pool
+# (see backend/project_analysis.py). The project is a tar archive, sent like
+# an /api/interpret_file upload, or a directory under PROJECT_ROOT named by
+# 'path'; directories are refused when PROJECT_ROOT is unset. Per-file
+# results stream as 'file' events in completion order, then 'summary'.
+PROJECT_ROOT = os.environ.get('PROJECT_ROOT')
+
+def _project_directory(path):
+    # Resolves `path` inside PROJECT_ROOT, or returns None if it escapes it
+    root = os.path.realpath(PROJECT_ROOT)
+    directory = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, directory]) != root or not os.path.isdir(directory):
+        return None
+    return directory
+
+@app.route('/api/analyze_project', methods=['POST'])
+def analyze_project_route():
+    upload = request.files.get('file')
+    if upload is not None:
+        data = request.form.to_dict()
+    elif request.is_json:
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args.to_dict()
+    options = [option.strip() for option in (data.get('options') or ','.join(PROJECT_OPTIONS)).split(',') if option.strip()]
+    unknown = [option for option in options if option not in PROJECT_OPTIONS]
+    if unknown:
+        return jsonify({"error": f"Unsupported project option(s): {', '.join(unknown)}", "supported": list(PROJECT_OPTIONS)}), 400
+
+    spooled = None
+    if data.get('path'):
+        if not PROJECT_ROOT:
+            return jsonify({"error": "Directory analysis is disabled; set PROJECT_ROOT or upload a tar archive."}), 403
+        source = _project_directory(data['path'])
+        if source is None:
+            return jsonify({"error": "'path' must name a directory inside PROJECT_ROOT."}), 400
+    else:
+        try:
+            spooled = spool_upload(upload.stream.read if upload is not None else request.stream.read)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        source = spooled
+
+    def generate():
+        try:
+            for event, payload in analyze_project(source, options):
+                yield _sse(event, payload)
+        except ProjectTooLarge as e:
+            yield _sse('error', str(e))
+        except Exception as e:
+            yield _sse('error', f"An error occurred: {str(e)}")
+        finally:
+            if spooled is not None:
+                spooled.close()
+        yield _sse('done', '')
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+# --- Batch interpretation ---
+# Items share one option and run concurrently on a bounded thread pool. The
+# analyzers spend most of their time in child processes, so threads are
+# enough, and they reuse the executables already compiled in this process.
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', str(min(32, (os.cpu_count() or 1) + 4))))
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '5000'))
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='interpret-batch')
+
+def _run_batch_item(selected_option, item, want_records=False):
+    # A bare string is shorthand for {"input": item}
+    data = item if isinstance(item, dict) else {'input': item}
+    started = time.perf_counter()
+    output, error = None, None
+    with request_timing(_metrics_label(selected_option)):
+        try:
+            output = run_cached(selected_option, data, run_option)
+        except Exception as e:
+            error = f"An error occurred: {str(e)}"
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    item_result = _output_body(output, want_records)
+    item_result.update({"error": error, "elapsed_ms": round(elapsed_ms, 3)})
+    return item_result
+
+@app.route('/api/interpret_batch', methods=['POST'])
+def interpret_batch():
+    data = request.json or {}
+    selected_option = data.get('option', '')
+    inputs = data.get('inputs')
+
+    if not isinstance(inputs, list):
+        return jsonify({"error": "'inputs' must be a list of strings or objects."}), 400
+    if len(inputs) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many inputs: {len(inputs)} (limit {BATCH_MAX_ITEMS})."}), 413
+
+    want_records = data.get('records') is True
+    started = time.perf_counter()
+    results = []
+    if inputs:
+        # Run the first item on its own so a lazily compiled analyzer is built once, not per thread
+        results.append(_run_batch_item(selected_option, inputs[0], want_records))
+        results.extend(_BATCH_EXECUTOR.map(lambda item: _run_batch_item(selected_option, item, want_records), inputs[1:]))
+
+    for index, item_result in enumerate(results):
+        item_result["index"] = index
+
+    return jsonify({
+        "option": selected_option,
+        "count": len(results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": results,
+    })
+
+# --- Column-wise arithmetic ---
+# One expression evaluated over arrays of variable bindings, e.g. for plotting
+# or grading. Uses NumPy when it is installed.
+VECTOR_MAX_ROWS = int(os.environ.get('VECTOR_MAX_ROWS', '5000000'))
+
+@app.route('/api/evaluate_columns', methods=['POST'])
+def api_evaluate_columns():
+    data = request.json or {}
+    expression = data.get('expression', '')
+    columns = data.get('columns', {})
+
+    if not isinstance(expression, str) or not expression.strip():
+        return jsonify({"error": "'expression' must be a non-empty string."}), 400
+    if not isinstance(columns, dict):
+        return jsonify({"error": "'columns' must map variable names to lists of numbers."}), 400
+
+    started = time.perf_counter()
+    try:
+        result = evaluate_columns(expression, columns, max_rows=VECTOR_MAX_ROWS)
+    except TooManyRows as e:
+        return jsonify({"error": str(e)}), 413
+    except ExpressionError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result["expression"] = expression
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return jsonify(result)
 
 if __name__ == '__main__':
+    # Compile every Flex/Bison analyzer in the background instead of in the first request for each.
+    # The debug reloader runs this file in a file-watching parent too; only the serving child
+    # (WERKZEUG_RUN_MAIN) builds.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_builds()
     app.run(debug=True, port=5000)
\ No newline at end of file
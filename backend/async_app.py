@@ -0,0 +1,190 @@
+import sys
+import os
+import json
+import asyncio
+import contextvars
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory of 'backend' to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Asyncio variant of app.py. Analyzer child processes are awaited on the
+# event loop, so one server process can keep hundreds of requests in flight
+# without a thread per request. Requires Quart (pip install quart).
+try:
+    from quart import Quart, Response, render_template, request, jsonify
+except ImportError:
+    sys.exit("async_app.py requires Quart: pip install quart (or run app.py for the Flask server)")
+
+from interpreter_logic import (
+    execute_single_command,
+    run_cli_command,
+    run_option_async,
+    stream_option,
+    start_background_builds,
+    analyzer_readiness,
+    OPTIONS,
+)
+from backend.result_cache import run_cached_async, result_cache_stats
+from backend.metrics import request_timing, render_prometheus
+from backend.sandbox import SandboxBusy, SANDBOX_QUEUE_TIMEOUT
+from backend.cli_sessions import (
+    CLI_SESSIONS, CLI_SESSION_IDLE_TTL, SESSION_COOKIE, SESSION_HEADER, run_session_command,
+)
+
+app = Quart(__name__)
+
+# Compile every Flex/Bison analyzer in the background instead of in the first request for each.
+# before_serving runs in the process that serves requests, not at import time (the reloader's
+# watcher imports this module too).
+@app.before_serving
+async def prebuild_analyzers():
+    start_background_builds()
+
+@app.route('/')
+async def index():
+    return await render_template('index.html')
+
+def _cli_session_id(data):
+    # JSON token first, then header, then cookie
+    return data.get('session') or request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+
+@app.route('/api/execute_cli_command', methods=['POST'])
+async def execute_cli_command():
+    data = await request.get_json()
+    command = data.get('command', '')
+    if 'variables' in data:
+        # Stateless protocol: the client sends and receives the whole variable table
+        variables = data.get('variables', {})
+        result = execute_single_command(command, variables)
+        return jsonify(result)
+
+    result = run_session_command(_cli_session_id(data), command, run_cli_command)
+    response = jsonify(result)
+    if result["ended"]:
+        response.delete_cookie(SESSION_COOKIE)
+    else:
+        response.set_cookie(SESSION_COOKIE, result["session"], max_age=int(CLI_SESSION_IDLE_TTL),
+                            httponly=True, samesite='Strict')
+    return response
+
+@app.route('/api/cli_session', methods=['DELETE'])
+async def end_cli_session():
+    session_id = _cli_session_id(await request.get_json(silent=True) or {})
+    if session_id:
+        CLI_SESSIONS.end(session_id)
+    response = jsonify({"ended": True})
+    response.delete_cookie(SESSION_COOKIE)
+    return response
+
+_RETRY_AFTER_SECONDS = max(1, int(SANDBOX_QUEUE_TIMEOUT // 4))
+
+def _sandbox_busy_body(error):
+    return {
+        "error": str(error),
+        "stage": error.stage,
+        "queue_depth": error.queue_depth,
+        "wait_ms": round(error.waited * 1000, 3),
+    }
+
+def _sandbox_busy_response(error):
+    # Admission control rejected the request; tell the client to back off rather than queue forever
+    return jsonify(_sandbox_busy_body(error)), 429, {'Retry-After': str(_RETRY_AFTER_SECONDS)}
+
+def _metrics_label(option):
+    # The option comes from the request; keep the set of metric labels bounded
+    return option if option in OPTIONS else 'unknown'
+
+@app.route('/api/interpret', methods=['POST'])
+async def interpret():
+    data = await request.get_json()
+    selected_option = data.get('option', '')
+
+    with request_timing(_metrics_label(selected_option)) as timing:
+        try:
+            result = await run_cached_async(selected_option, data, run_option_async)
+        except SandboxBusy as e:
+            return _sandbox_busy_response(e)
+        except Exception as e:
+            result = f"An error occurred: {str(e)}"
+
+    body = {"output": result}
+    if data.get('records') is True:
+        # Analyzers that parse structured records return them on the result; see backend/records.py
+        body["records"] = getattr(result, 'records', None)
+    response = jsonify(body)
+    response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+@app.route('/api/cache_stats', methods=['GET'])
+async def cache_stats():
+    return jsonify(result_cache_stats())
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    # 503 until every scheduled analyzer build has finished; failed and lazy builds are reported but do not block readiness
+    is_ready, analyzers = analyzer_readiness()
+    return jsonify({"ready": is_ready, "analyzers": analyzers}), 200 if is_ready else 503
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Streaming interpretation (Server-Sent Events) ---
+# The same protocol as app.py's /api/interpret_stream: JSON-encoded events
+# ending with 'done', a 429 with Retry-After when the sandbox rejects the
+# request before the first event, and a 'busy' event when it rejects it
+# later. stream_option is a blocking generator (it waits for sandbox slots
+# and reads the program's output), so each event is pulled on a thread that
+# belongs to the stream and the event loop never blocks.
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/api/interpret_stream', methods=['POST'])
+async def interpret_stream():
+    data = await request.get_json()
+    selected_option = data.get('option', '')
+
+    timing = ExitStack() # Closed when the stream ends, so the whole stream is timed
+    timing.enter_context(request_timing(_metrics_label(selected_option)))
+    context = contextvars.copy_context() # Carries the request timing into the stream's thread
+    events = stream_option(selected_option, data)
+    # A single thread advances the generator, and closes it last, so steps never overlap
+    worker = ThreadPoolExecutor(max_workers=1)
+    timing.callback(worker.shutdown, wait=False)
+    timing.callback(worker.submit, events.close) # Releases a held slot if the client goes away mid-stream
+    loop = asyncio.get_running_loop()
+
+    def next_event():
+        # None once the generator is exhausted
+        return loop.run_in_executor(worker, context.run, next, events, None)
+
+    try:
+        first = await next_event()
+    except SandboxBusy as e:
+        timing.close()
+        return _sandbox_busy_response(e)
+    except Exception as e:
+        first = ('error', f"An error occurred: {str(e)}")
+
+    async def generate():
+        try:
+            try:
+                event = first
+                while event is not None:
+                    yield _sse(*event)
+                    event = await next_event()
+            except SandboxBusy as e:
+                yield _sse('busy', dict(_sandbox_busy_body(e), retry_after=_RETRY_AFTER_SECONDS))
+            except Exception as e:
+                yield _sse('error', f"An error occurred: {str(e)}")
+            yield _sse('done', '')
+        finally:
+            timing.close()
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5000)
@@ -0,0 +1,585 @@
+import sys
+import os
+import json
+import time
+import math
+import random
+import re
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+# Add the parent directory of 'backend' to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from interpreter_logic import run_option
+from backend import flex_bison_utils
+from backend.source_analysis import clear_source_analysis_cache
+from backend.result_cache import track_computation
+
+# Benchmarks for every /api/interpret option.
+#
+#   python benchmark.py run                       # default sizes, all options
+#   python benchmark.py run --options calculator,comment_detector --sizes 1KB,1MB,50MB
+#   python benchmark.py run --save-baseline       # record the baseline
+#   python benchmark.py run --compare             # run, then flag regressions against it
+#   python benchmark.py compare --current results.json --threshold 0.1
+#   python benchmark.py scaling --counts 1000,10000,100000   # per-item cost as input grows
+#
+# Inputs come from deterministic synthetic generators, so runs on the same
+# machine are comparable. Each (option, size) case is warmed up once (which
+# also compiles lazily built analyzers) and then timed until it has at least
+# --min-runs samples and has used its --budget, up to --max-runs. Results are
+# written as JSON: latency percentiles in milliseconds and throughput in
+# MB/s and runs/s.
+
+SIZES = {
+    '1KB': 1024,
+    '16KB': 16 * 1024,
+    '256KB': 256 * 1024,
+    '1MB': 1024 * 1024,
+    '10MB': 10 * 1024 * 1024,
+    '50MB': 50 * 1024 * 1024,
+}
+DEFAULT_SIZES = ('1KB', '16KB', '256KB', '1MB')
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+_WORDS = ("hello", "world", "report", "value", "compiler", "parser", "token", "grammar",
+          "student", "result", "total", "average", "error", "output", "input", "lexer")
+_DOMAINS = ("diu.edu.bd", "gmail.com", "yahoo.com", "example.org", "ac.bd")
+
+
+# --- Synthetic input generators ---
+# Each generator returns text of roughly `size` bytes (whole blocks only).
+
+def _fill(size, block):
+    parts = []
+    total = 0
+    index = 0
+    while total < size:
+        text = block(index)
+        parts.append(text)
+        total += len(text)
+        index += 1
+    return "".join(parts)
+
+
+def generate_c_source(size, seed=0):
+    """A C program mixing comments, declarations, arithmetic, printf text and email addresses."""
+    rng = random.Random(seed)
+
+    def block(i):
+        a, b, c = rng.randint(1, 99), rng.randint(1, 99), rng.randint(1, 9)
+        words = " ".join(rng.choice(_WORDS) for _ in range(6))
+        return (
+            f"/* Block {i}: {rng.choice(_WORDS)} {rng.choice(_WORDS)} */\n"
+            f"int value_{i} = {a} + {b} * {c};\n"
+            f"float ratio_{i} = value_{i} / {c}.5;\n"
+            f"// contact user{i}@{rng.choice(_DOMAINS)}\n"
+            f"printf(\"{words} %d mail staff{i}@{rng.choice(_DOMAINS)}\\n\", value_{i});\n"
+            f"if (value_{i} > {a}) {{ value_{i} = value_{i} - 1; }}\n"
+        )
+
+    header = "#include <stdio.h>\n\nint main() {\n"
+    footer = "return 0;\n}\n"
+    return header + _fill(max(size - len(header) - len(footer), 1), block) + footer
+
+
+def generate_c_program(size, seed=0):
+    """A compilable C program whose size comes from printf statements."""
+    rng = random.Random(seed)
+
+    def block(i):
+        words = " ".join(rng.choice(_WORDS) for _ in range(5))
+        return f"    printf(\"{i}: {words}\\n\");\n"
+
+    header = "#include <stdio.h>\n\nint main(void) {\n"
+    footer = "    return 0;\n}\n"
+    return header + _fill(max(size - len(header) - len(footer), 1), block) + footer
+
+
+def generate_arithmetic_lines(size, seed=0):
+    rng = random.Random(seed)
+    return _fill(size, lambda i: f"({rng.randint(1, 999)} + {rng.randint(1, 999)}) * {rng.randint(1, 99)} / {rng.randint(1, 9)}\n")
+
+
+def generate_boolean_lines(size, seed=0):
+    rng = random.Random(seed)
+    operators = ("&&", "||")
+    return _fill(size, lambda i: f"({rng.randint(0, 1)} {rng.choice(operators)} {rng.randint(0, 1)}) "
+                                 f"{rng.choice(operators)} !{rng.randint(0, 1)}\n")
+
+
+def generate_command_script(size, seed=0):
+    rng = random.Random(seed)
+
+    def block(i):
+        name = f"v{i % 50}"
+        return (
+            f"set {name} to {rng.randint(1, 999)}\n"
+            f"add {name} and {rng.randint(1, 99)}\n"
+            f"multiply {name} and {rng.randint(1, 9)}\n"
+            f"if {name} > {rng.randint(1, 999)} then print big\n"
+            f"show {name}\n"
+            f"# comment {i}\n"
+        )
+
+    return _fill(size, block)
+
+
+def generate_declarations(count, seed=0):
+    """A main() with `count` distinct int declarations, each followed by an assignment reading an earlier one."""
+    rng = random.Random(seed)
+    lines = ["int main() {"]
+    for i in range(count):
+        lines.append(f"    int v{i} = {rng.randint(0, 999)};")
+        lines.append(f"    v{i} = v{i // 2} + {rng.randint(1, 9)};")
+    lines.append("    return 0;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_compiler_error(size, seed=0):
+    source = generate_c_source(size, seed)
+    return source + "\nError: main.c:5:23: error: expected ';' before 'printf'\n"
+
+
+_LOG_DIAGNOSTICS = (
+    "error: expected ';' before 'return'",
+    "error: 'count{i}' undeclared (first use in this function)",
+    "warning: unused variable 'tmp{i}' [-Wunused-variable]",
+    "error: incompatible types when assigning to type 'int' from type 'char *'",
+    "error: expected ')' before ';' token",
+    "error: called object 'v{i}' is not a function or function pointer",
+)
+
+
+def generate_compiler_log(count, seed=0):
+    """A gcc/ld build log with `count` diagnostics, each with gcc's source excerpt below it."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if i % 50 == 49:
+            lines.append(f"/usr/bin/ld: obj/unit{i}.o: in function `main':")
+            lines.append(f"unit{i}.c:(.text+0x{rng.randint(16, 4095):x}): undefined reference to `helper{i}'")
+            continue
+        line = rng.randint(1, 5000)
+        lines.append(f"src/unit{i % 97}.c:{line}:{rng.randint(1, 80)}: " + rng.choice(_LOG_DIAGNOSTICS).format(i=i))
+        lines.append(f" {line} |     int v{i} = count{i} + 1")
+        lines.append("      |             ^~~~~")
+    lines.append("collect2: error: ld returned 1 exit status")
+    return "\n".join(lines) + "\n"
+
+
+# option -> (request builder, largest size it is benchmarked at)
+# Compiling megabytes of C with gcc is not a useful measurement, so
+# run_full_c_code stops at 256 KB by default. Its repeated runs hit the
+# build cache after the warm-up; use --compile for cold build times.
+OPTION_PROFILES = {
+    'email_parser': (lambda size: {'input': generate_c_source(size)}, None),
+    'normal_text_analyzer': (lambda size: {'input': generate_c_source(size)}, None),
+    'reverse_concatenate': (lambda size: {'input': generate_c_source(size)}, None),
+    'comment_detector': (lambda size: {'input': generate_c_source(size)}, None),
+    'word_frequency_calculator': (lambda size: {'input': generate_c_source(size)}, None),
+    'regex_matcher': (lambda size: {'input': generate_c_source(size), 'pattern': r'[a-z0-9.]+@[a-z.]+'}, None),
+    'calculator': (lambda size: {'input': generate_c_source(size)}, None),
+    'flex_bison_arithmetic_calculator': (lambda size: {'input': generate_arithmetic_lines(size)}, None),
+    'operator_delimiter_recognizer': (lambda size: {'input': generate_c_source(size)}, None),
+    'parser_action_printer': (lambda size: {'input': generate_c_source(size)}, None),
+    'compiler_error_classifier': (lambda size: {'input': generate_compiler_error(size)}, None),
+    'compiler_log_classifier': (lambda size: {'input': generate_compiler_log(max(1, size // 80))}, None),
+    'semantic_action_simulator': (lambda size: {'input': generate_c_source(size)}, None),
+    'command_language_interpreter': (lambda size: {'input': generate_command_script(size)}, None),
+    'boolean_expression_evaluator': (lambda size: {'input': generate_boolean_lines(size)}, None),
+    'run_full_c_code': (lambda size: {'c_code': generate_c_program(size), 'user_input_string': ''}, SIZES['256KB']),
+}
+
+# Scaling benchmarks: option -> generator taking an item count. A linear
+# analyzer keeps a flat cost per item as the count grows.
+SCALING_PROFILES = {
+    'semantic_action_simulator': lambda count: {'input': generate_declarations(count)},
+    'compiler_log_classifier': lambda count: {'input': generate_compiler_log(count)},
+}
+DEFAULT_SCALING_COUNTS = (1000, 10000, 100000)
+
+# Compile-path benchmarks: (build name, kind, source paths relative to flex_bison_programs)
+_PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flex_bison_programs')
+COMPILE_TARGETS = {
+    'lexer_features': ('flex_bison', ('lexer_features/lexer_features.l', 'lexer_features/lexer_features.y')),
+    'var_extractor': ('flex_bison', ('var_extractor/var_extractor.l', 'var_extractor/var_extractor.y')),
+    'arithmetic_calculator': ('flex_bison', ('arithmetic_calculator/arithmetic_calculator.l', 'arithmetic_calculator/arithmetic_calculator.y')),
+    'boolean_evaluator': ('c', ('boolean_evaluator/boolean_evaluator.c',)),
+}
+
+
+# --- Measurement ---
+
+def percentile(sorted_samples, fraction):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    position = (len(sorted_samples) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_samples[lower]
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(samples, input_bytes):
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered)
+    return {
+        "runs": len(ordered),
+        "input_bytes": input_bytes,
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "runs_per_s": 1.0 / mean if mean > 0 else None,
+        "mb_per_s": (input_bytes / (1024 * 1024)) / mean if mean > 0 and input_bytes else None,
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    # The analyzers print DEBUG lines; keep them out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _measure(call, min_runs, max_runs, budget, before_each=None):
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - started < budget):
+        if before_each is not None:
+            before_each()
+        t0 = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+# How analyzers word the failures they report as text rather than raise
+_FAILURE_OUTPUT = re.compile(
+    r"^(?:Error\b|Regex (?:Error|Timeout):|C Code Parser Error|An (?:unexpected )?error occurred)|\bis not ready\b"
+)
+
+
+def _warm_up(option, data):
+    """
+    Runs `option` once and reports whether it failed.
+
+    Timeouts, crashed analyzers and worker failures are flagged explicitly
+    through mark_uncacheable(); errors the analyzers word themselves are
+    recognized from the output. Timing a failed run is meaningless.
+
+    Returns:
+        tuple: (output, failed)
+    """
+    with track_computation() as computation:
+        output = run_option(option, data)
+    failed = not computation.cacheable or bool(_FAILURE_OUTPUT.search(str(output)))
+    return output, failed
+
+
+def bench_option(option, size_label, args):
+    builder, max_size = OPTION_PROFILES[option]
+    size = SIZES[size_label]
+    if max_size is not None and size > max_size and not args.no_size_caps:
+        return None
+    data = builder(size)
+    data['option'] = option
+    input_bytes = sum(len(value.encode('utf-8')) for value in data.values() if isinstance(value, str))
+
+    with _quiet():
+        output, failed = _warm_up(option, data) # Also builds lazily compiled analyzers
+        before_each = None if args.warm else clear_source_analysis_cache
+        samples = _measure(lambda: run_option(option, data), args.min_runs, args.max_runs, args.budget, before_each)
+
+    result = summarize(samples, input_bytes)
+    result["output_sample"] = str(output)[:120]
+    result["failed"] = failed
+    return result
+
+
+def _compile_once(name, kind, sources):
+    paths = [os.path.join(_PROGRAMS_DIR, source) for source in sources]
+    output_dir = os.path.dirname(paths[0])
+    if kind == 'c':
+        return flex_bison_utils.compile_c_program(name, paths[0], output_dir)
+    return flex_bison_utils.compile_flex_bison(name, paths[0], paths[1], output_dir)
+
+
+def bench_compile(name, args):
+    """Times a cold build (empty cache directory) and a warm build-cache hit."""
+    kind, sources = COMPILE_TARGETS[name]
+    original_dir = flex_bison_utils.BUILD_CACHE_DIR
+    original_enabled = flex_bison_utils.BUILD_CACHE_ENABLED
+    scratch = tempfile.mkdtemp(prefix='fb-bench-')
+    results = {}
+    try:
+        flex_bison_utils.BUILD_CACHE_ENABLED = True
+        with _quiet():
+            def cold():
+                flex_bison_utils.BUILD_CACHE_DIR = tempfile.mkdtemp(dir=scratch)
+                return _compile_once(name, kind, sources)
+
+            success, message = cold()
+            if not success:
+                return {"cold": {"error": message.strip()[:300]}}
+            samples = _measure(cold, 1, max(1, min(args.max_runs, 5)), args.budget)
+            results["cold"] = summarize(samples, 0)
+
+            warm = lambda: _compile_once(name, kind, sources)
+            samples = _measure(warm, args.min_runs, args.max_runs, args.budget)
+            results["warm"] = summarize(samples, 0)
+    finally:
+        flex_bison_utils.BUILD_CACHE_DIR = original_dir
+        flex_bison_utils.BUILD_CACHE_ENABLED = original_enabled
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def bench_scaling(option, counts, args):
+    """
+    Times `option` on generated inputs of increasing item counts.
+
+    Returns:
+        dict: count -> summary with an extra "us_per_item" field.
+    """
+    results = {}
+    for count in counts:
+        data = SCALING_PROFILES[option](count)
+        data['option'] = option
+        with _quiet():
+            output, failed = _warm_up(option, data)
+            samples = _measure(lambda: run_option(option, data), args.min_runs, args.max_runs, args.budget)
+        result = summarize(samples, len(data['input'].encode('utf-8')))
+        result["count"] = count
+        result["us_per_item"] = result["p50_ms"] * 1000 / count
+        result["output_sample"] = str(output)[:120]
+        result["failed"] = failed
+        results[count] = result
+    return results
+
+
+def run_scaling(args):
+    options = list(SCALING_PROFILES) if args.options == 'all' else [o.strip() for o in args.options.split(',') if o.strip()]
+    for option in options:
+        if option not in SCALING_PROFILES:
+            sys.exit(f"No scaling profile for {option} (choose from {', '.join(SCALING_PROFILES)})")
+    counts = sorted(int(c) for c in args.counts.split(',') if c.strip())
+
+    report = {"meta": {"created": time.strftime('%Y-%m-%dT%H:%M:%S%z'), "git_revision": _git_revision()}, "results": {}}
+    for option in options:
+        results = bench_scaling(option, counts, args)
+        for count, result in results.items():
+            key = f"scaling:{option}@{count}"
+            report["results"][key] = result
+            if result["failed"]:
+                _print_row(key, result)
+            else:
+                print(f"{key:<50} p50={result['p50_ms']:10.3f}ms {result['us_per_item']:8.3f}us/item", flush=True)
+        measured = [results[c] for c in counts if not results[c]["failed"]]
+        if len(measured) > 1:
+            # Per-item cost at the largest count relative to the smallest: ~1 for linear, ~count ratio for quadratic
+            growth = measured[-1]["us_per_item"] / measured[0]["us_per_item"]
+            print(f"{option}: per-item cost x{growth:.2f} from {measured[0]['count']} to {measured[-1]['count']} items")
+    return report
+
+
+def _git_revision():
+    try:
+        proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return proc.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(args):
+    options = list(OPTION_PROFILES) if args.options == 'all' else [o.strip() for o in args.options.split(',') if o.strip()]
+    sizes = list(SIZES) if args.sizes == 'all' else [s.strip().upper() for s in args.sizes.split(',') if s.strip()]
+    for option in options:
+        if option not in OPTION_PROFILES:
+            sys.exit(f"Unknown option: {option} (choose from {', '.join(OPTION_PROFILES)})")
+    for size in sizes:
+        if size not in SIZES:
+            sys.exit(f"Unknown size: {size} (choose from {', '.join(SIZES)})")
+
+    report = {
+        "meta": {
+            "created": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "warm_caches": args.warm,
+        },
+        "results": {},
+    }
+
+    for option in options:
+        for size in sizes:
+            result = bench_option(option, size, args)
+            if result is None:
+                continue
+            key = f"{option}@{size}"
+            report["results"][key] = result
+            _print_row(key, result)
+
+    if args.compile:
+        for name in COMPILE_TARGETS:
+            for phase, result in bench_compile(name, args).items():
+                key = f"compile:{name}@{phase}"
+                report["results"][key] = result
+                _print_row(key, result)
+    return report
+
+
+def _print_row(key, result):
+    if "error" in result:
+        print(f"{key:<50} ERROR {result['error'].splitlines()[0]}")
+        return
+    if result.get("failed"):
+        print(f"{key:<50} FAILED {result['output_sample'].splitlines()[0]}")
+        return
+    throughput = f"{result['mb_per_s']:9.2f} MB/s" if result.get('mb_per_s') else " " * 14
+    print(f"{key:<50} runs={result['runs']:<4} p50={result['p50_ms']:10.3f}ms p95={result['p95_ms']:10.3f}ms "
+          f"p99={result['p99_ms']:10.3f}ms {throughput} {result['runs_per_s']:10.1f}/s", flush=True)
+
+
+# --- Baselines and comparison ---
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def _comparable(before, now):
+    if not before or "error" in before or "error" in now:
+        return False
+    if before.get("failed") or now.get("failed"):
+        return False
+    return before.get("input_bytes") == now.get("input_bytes") # A changed generator is not a regression
+
+
+def compare_reports(baseline, current, threshold, min_delta_ms):
+    """
+    Compares p50 and p95 latencies case by case.
+
+    Returns:
+        list: (key, metric, baseline_ms, current_ms, change) for every
+        metric that got slower by more than `threshold` (a fraction) and by
+        more than `min_delta_ms` in absolute terms.
+    """
+    regressions = []
+    for key, now in sorted(current.get("results", {}).items()):
+        before = baseline.get("results", {}).get(key)
+        if not _comparable(before, now):
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            old, new = before[metric], now[metric]
+            if old > 0 and new > old * (1 + threshold) and new - old > min_delta_ms:
+                regressions.append((key, metric, old, new, new / old - 1))
+    return regressions
+
+
+def print_comparison(baseline, current, threshold, min_delta_ms):
+    for key, now in sorted(current.get("results", {}).items()):
+        before = baseline.get("results", {}).get(key)
+        if not _comparable(before, now):
+            continue
+        change = now["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] > 0 else 0.0
+        print(f"{key:<50} p50 {before['p50_ms']:10.3f}ms -> {now['p50_ms']:10.3f}ms ({change:+7.1%})")
+
+    regressions = compare_reports(baseline, current, threshold, min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for key, metric, old, new, change in regressions:
+            print(f"  REGRESSION {key} {metric}: {old:.3f}ms -> {new:.3f}ms ({change:+.1%})")
+    else:
+        print(f"\nNo regressions beyond {threshold:.0%}.")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the /api/interpret options.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--options", default="all", help="Comma-separated options, or 'all'")
+    run.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"Comma-separated sizes from {', '.join(SIZES)}, or 'all'")
+    run.add_argument("--min-runs", type=int, default=5)
+    run.add_argument("--max-runs", type=int, default=200)
+    run.add_argument("--budget", type=float, default=2.0, help="Seconds to spend per case once --min-runs is reached")
+    run.add_argument("--warm", action="store_true", help="Keep in-process caches warm between runs")
+    run.add_argument("--compile", action="store_true", help="Also time cold builds and build-cache hits")
+    run.add_argument("--no-size-caps", action="store_true", help="Ignore per-option size caps (e.g. for run_full_c_code)")
+    run.add_argument("--output", help="Write the results to this JSON file")
+    run.add_argument("--save-baseline", action="store_true", help="Also write the results as the baseline")
+    run.add_argument("--compare", action="store_true", help="Compare the results against the baseline")
+    run.add_argument("--baseline", default=DEFAULT_BASELINE)
+    run.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown that counts as a regression")
+    run.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+
+    compare = commands.add_parser("compare", help="Compare a results file against the baseline")
+    compare.add_argument("--current", required=True)
+    compare.add_argument("--baseline", default=DEFAULT_BASELINE)
+    compare.add_argument("--threshold", type=float, default=0.15)
+    compare.add_argument("--min-delta-ms", type=float, default=0.05)
+
+    scaling = commands.add_parser("scaling", help="Measure how the cost per item grows with the input")
+    scaling.add_argument("--options", default="all", help=f"Comma-separated options from {', '.join(SCALING_PROFILES)}, or 'all'")
+    scaling.add_argument("--counts", default=",".join(str(c) for c in DEFAULT_SCALING_COUNTS))
+    scaling.add_argument("--min-runs", type=int, default=3)
+    scaling.add_argument("--max-runs", type=int, default=50)
+    scaling.add_argument("--budget", type=float, default=2.0)
+    scaling.add_argument("--output", help="Write the results to this JSON file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "scaling":
+        report = run_scaling(args)
+        if args.output:
+            save_report(report, args.output)
+        return 0
+
+    if args.command == "compare":
+        regressions = print_comparison(load_report(args.baseline), load_report(args.current), args.threshold, args.min_delta_ms)
+        return 1 if regressions else 0
+
+    report = run_benchmarks(args)
+    if args.output:
+        save_report(report, args.output)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+            return 1
+        print()
+        regressions = print_comparison(load_report(args.baseline), report, args.threshold, args.min_delta_ms)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Build state for the analyzers that need a compiled executable.
+#
+# Each analyzer's compile function runs at most once per process. The first
+# caller, whether the startup prebuild or a request, creates a Future and
+# runs the build. Every concurrent caller waits on that same Future instead
+# of starting its own bison/flex/g++ run. start_all() builds every
+# registered analyzer in parallel in the background; states() reports
+# progress for the /ready endpoint. Readiness waits only for the builds
+# start_all() scheduled: with prebuilding off, every analyzer is built lazily
+# by its first request and the server is ready at once.
+
+PRECOMPILE_AT_STARTUP = os.environ.get('PRECOMPILE_AT_STARTUP', '1') != '0'
+PRECOMPILE_MAX_WORKERS = int(os.environ.get('PRECOMPILE_MAX_WORKERS', str(os.cpu_count() or 1)))
+
+logger = logging.getLogger(__name__)
+
+
+class BuildRegistry:
+    """
+    Runs each registered build once and shares its completion.
+
+    A build is a compile function with no arguments that records its outcome
+    elsewhere (the interpreter_logic globals). `status()` is read afterwards
+    and returns (executable path or None, error message or None).
+    """
+
+    def __init__(self):
+        self._builds = {} # name -> (build, status)
+        self._futures = {} # name -> Future, created by the first caller
+        self._timings = {} # name -> [started, finished or None]
+        self._scheduled = set() # Names start_all() submitted; readiness waits for these
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def register(self, name, build, status):
+        self._builds[name] = (build, status)
+
+    def names(self):
+        return list(self._builds)
+
+    def ensure(self, name):
+        """
+        Builds `name` unless it has been built already, or waits for the
+        build another thread is running.
+
+        Raises:
+            Exception: Whatever the build function raised, in every caller.
+        """
+        with self._lock:
+            future = self._futures.get(name)
+            owner = future is None
+            if owner:
+                future = self._futures[name] = Future()
+                self._timings[name] = [time.monotonic(), None]
+        if not owner:
+            future.result()
+            return
+
+        build, _ = self._builds[name]
+        try:
+            build()
+        except BaseException as e:
+            self._timings[name][1] = time.monotonic()
+            future.set_exception(e)
+            raise
+        self._timings[name][1] = time.monotonic()
+        future.set_result(None)
+
+    def start_all(self, max_workers=PRECOMPILE_MAX_WORKERS):
+        """Starts every build that has not started yet on a background thread pool."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prebuild')
+            pending = [name for name in self._builds if name not in self._futures]
+            self._scheduled.update(pending)
+        for name in pending:
+            self._executor.submit(self._background_build, name)
+
+    def _background_build(self, name):
+        try:
+            self.ensure(name)
+        except Exception as e:
+            logger.debug("Background build of %s raised: %s", name, e)
+
+    def states(self):
+        """
+        Returns {name: state} where state has a 'state' of 'lazy' (not
+        started and not scheduled; the first request builds it), 'pending'
+        (scheduled by start_all()), 'building', 'ready' or 'failed', the
+        'error' for failed builds and the build time in 'seconds' once it has
+        finished.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+            timings = {name: list(timing) for name, timing in self._timings.items()}
+            scheduled = set(self._scheduled)
+        states = {}
+        for name, (_, status) in self._builds.items():
+            future = futures.get(name)
+            if future is None:
+                states[name] = {'state': 'pending' if name in scheduled else 'lazy'}
+                continue
+            if not future.done():
+                states[name] = {'state': 'building'}
+                continue
+            executable, error = status()
+            if future.exception() is not None:
+                error = str(future.exception())
+            state = {'state': 'ready' if executable and error is None else 'failed'}
+            if state['state'] == 'failed':
+                state['error'] = error or "Build did not produce an executable."
+            started, finished = timings[name]
+            if finished is not None:
+                state['seconds'] = round(finished - started, 3)
+            states[name] = state
+        return states
+
+    def readiness(self):
+        """
+        Returns (ready, states); ready once every build start_all() scheduled
+        has finished. Lazy builds, and builds a request started, do not count.
+        """
+        with self._lock:
+            scheduled = set(self._scheduled)
+        states = self.states()
+        ready = all(states[name]['state'] in ('ready', 'failed') for name in scheduled)
+        return ready, states
@@ -0,0 +1,196 @@
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+# Server-side state for the interactive command-language CLI.
+#
+# The browser used to send its whole variable table with every command and
+# get all of it back. Sessions keep the table here instead: a request carries
+# the session ID (cookie or token) and one command, and the response carries
+# the output plus only the variables that command changed. Sessions are
+# evicted least-recently-used first once they have been idle for
+# CLI_SESSION_IDLE_TTL seconds, or when the store exceeds its session count
+# or approximate memory budget. A single session may not grow past
+# CLI_SESSION_MAX_BYTES_PER_SESSION.
+
+CLI_SESSION_IDLE_TTL = float(os.environ.get('CLI_SESSION_IDLE_TTL', '1800'))
+CLI_SESSION_MAX_SESSIONS = int(os.environ.get('CLI_SESSION_MAX_SESSIONS', '10000'))
+CLI_SESSION_MAX_BYTES = int(os.environ.get('CLI_SESSION_MAX_BYTES', str(64 * 1024 * 1024)))
+CLI_SESSION_MAX_BYTES_PER_SESSION = int(os.environ.get('CLI_SESSION_MAX_BYTES_PER_SESSION', str(256 * 1024)))
+
+SESSION_COOKIE = 'cli_session'
+SESSION_HEADER = 'X-CLI-Session'
+
+
+class SessionLimitExceeded(Exception):
+    """Raised when a command would grow a session past CLI_SESSION_MAX_BYTES_PER_SESSION."""
+
+
+class _VariableOverlay:
+    """
+    The variable table a command runs against: reads fall through to the
+    session's table, assignments are collected so they can be size-checked
+    before they are applied. Nothing is copied per command.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.assigned = {}
+
+    def __contains__(self, name):
+        return name in self.assigned or name in self.base
+
+    def __getitem__(self, name):
+        if name in self.assigned:
+            return self.assigned[name]
+        return self.base[name]
+
+    def __setitem__(self, name, value):
+        self.assigned[name] = value
+
+
+def _entry_size(name, value):
+    return len(name) + len(str(value))
+
+
+class CliSession:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.variables = {}
+        self.size = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock() # Commands within one session run one at a time
+
+
+class CliSessionStore:
+    """Thread-safe LRU store of CliSession objects."""
+
+    def __init__(self, idle_ttl, max_sessions, max_bytes, max_bytes_per_session):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_bytes_per_session = max_bytes_per_session
+        self._sessions = OrderedDict() # session ID -> CliSession, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _evict_locked(self, now):
+        # Idle sessions sit at the front, so expiry stops at the first live one
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used + self.idle_ttl > now:
+                break
+            self._drop_locked(session.session_id)
+            self.expired += 1
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            self._drop_locked(next(iter(self._sessions)))
+            self.evicted += 1
+
+    def _drop_locked(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.size
+
+    def get_or_create(self, session_id):
+        """
+        Returns (session, created) for `session_id`, starting a new session if
+        the ID is missing, unknown or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                session.last_used = now
+                self._sessions.move_to_end(session_id)
+                return session, False
+            session = CliSession(secrets.token_urlsafe(24))
+            self._sessions[session.session_id] = session
+            self.created += 1
+            self._evict_locked(now)
+            return session, True
+
+    def end(self, session_id):
+        with self._lock:
+            self._drop_locked(session_id)
+
+    def execute(self, session, command, run):
+        """
+        Runs `command` against the session's variables with run(command, variables).
+
+        Returns:
+            tuple: (output, delta) where delta maps each variable the command
+            assigned to its new value.
+
+        Raises:
+            SessionLimitExceeded: If the command would push the session over
+                its size limit; the variables are left unchanged.
+        """
+        with session.lock:
+            variables = _VariableOverlay(session.variables)
+            output = run(command, variables)
+            delta = variables.assigned
+            size = session.size
+            for name, value in delta.items():
+                if name in session.variables:
+                    size -= _entry_size(name, session.variables[name])
+                size += _entry_size(name, value)
+            if size > self.max_bytes_per_session:
+                raise SessionLimitExceeded(
+                    f"Error: Session variables would exceed {self.max_bytes_per_session} bytes; command not applied.")
+            session.variables.update(delta)
+            with self._lock:
+                if session.session_id in self._sessions:
+                    self._bytes += size - session.size
+                session.size = size
+                self._evict_locked(time.monotonic())
+            return output, delta
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+CLI_SESSIONS = CliSessionStore(CLI_SESSION_IDLE_TTL, CLI_SESSION_MAX_SESSIONS, CLI_SESSION_MAX_BYTES,
+                               CLI_SESSION_MAX_BYTES_PER_SESSION)
+
+
+def run_session_command(session_id, command, run):
+    """
+    Runs one CLI command in the session `session_id` (starting a new session
+    if it is unknown or expired) and returns the response body.
+
+    Returns:
+        dict: {"output", "changed", "session", "new_session", "ended"} where
+        changed holds only the variables this command assigned. An "exit"
+        command ends the session.
+    """
+    session, created = CLI_SESSIONS.get_or_create(session_id)
+    try:
+        output, changed = CLI_SESSIONS.execute(session, command, run)
+    except SessionLimitExceeded as e:
+        output, changed = str(e), {}
+    ended = output == "Exiting..."
+    if ended:
+        CLI_SESSIONS.end(session.session_id)
+    return {
+        "output": output,
+        "changed": changed,
+        "session": session.session_id,
+        "new_session": created,
+        "ended": ended,
+    }
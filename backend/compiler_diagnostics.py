@@ -0,0 +1,129 @@
+import re
+from collections import Counter
+
+# Rule-based classification of C compiler diagnostics.
+#
+# The rules are combined into one alternation, so a message is scanned once
+# no matter how many rules there are; when several rules match, the one
+# listed first wins. classify_compiler_log() splits a whole gcc/clang/ld log
+# into diagnostics with a single pass of _DIAGNOSTIC_PATTERN and classifies
+# each one, so a log is processed in time linear in its length.
+
+# (rule, pattern) in priority order. A pattern may capture one subject (the
+# identifier or symbol the message is about); a rule may have several patterns.
+# The patterns match everything compiler_error_classifier's original checks
+# did, and are looser so that they also match gcc's wording in whole build
+# logs: "'x' undeclared", "expected expression" and "expected ')'" without a
+# following "before", "incompatible type", and undefined references quoted
+# with ' as well as `.
+_RULES = (
+    ('missing_semicolon', r"expected ';'"),
+    ('undeclared_identifier', r"undeclared identifier(?: '([^']+)')?"),
+    ('undeclared_identifier', r"'([^']+)' undeclared"),
+    ('expected_expression', r"expected expression"),
+    ('type_mismatch', r"conflicting types for|incompatible types?"),
+    ('missing_parenthesis', r"expected '\)'"),
+    ('undefined_reference', r"undefined reference to(?: [`']([^'`]+)')?"),
+    ('syntax_error', r"syntax error"),
+)
+
+_RULE_PATTERN = re.compile('|'.join(f'(?P<r{i}>{pattern})' for i, (_, pattern) in enumerate(_RULES)))
+# Group number of each pattern's subject, or None
+_SUBJECT_GROUPS = tuple(
+    _RULE_PATTERN.groupindex[f'r{i}'] + 1 if re.compile(pattern).groups else None
+    for i, (_, pattern) in enumerate(_RULES)
+)
+
+# rule -> error type reported for it
+ERROR_TYPES = {
+    'missing_semicolon': "Syntax Error",
+    'undeclared_identifier': "Semantic Error",
+    'expected_expression': "Syntax Error",
+    'type_mismatch': "Semantic Error",
+    'missing_parenthesis': "Syntax Error",
+    'undefined_reference': "Linker Error",
+    'syntax_error': "Syntax Error",
+    'generic_error': "Semantic Error",
+    'generic_linker_error': "Linker Error",
+    'warning': "Warning",
+}
+
+# One diagnostic per match: "file:line[:column]: severity: message" from the
+# compiler, or "object:(.section+0x1e): message" from the linker. Notes,
+# "In function" headers and the source excerpts gcc prints below a
+# diagnostic do not match and are skipped.
+_DIAGNOSTIC_PATTERN = re.compile(
+    r'^(?P<file>[^:\n]+):(?P<line>\d+):(?:(?P<column>\d+):)? (?P<severity>fatal error|error|warning): (?P<message>[^\n]*)'
+    r'|^(?P<object>[^:\n]+):\([^)\n]*\): (?P<link_message>[^\n]*)',
+    re.MULTILINE,
+)
+
+
+def classify_message(message):
+    """
+    Finds the highest-priority rule matching a diagnostic message.
+
+    Args:
+        message (str): The diagnostic text, e.g. "expected ';' before 'return'".
+
+    Returns:
+        tuple: (rule, subject); rule is None when nothing matched and subject
+            is None when the rule does not capture one.
+    """
+    best = None
+    for match in _RULE_PATTERN.finditer(message):
+        index = int(match.lastgroup[1:])
+        if best is None or index < best[0]:
+            best = (index, match)
+            if index == 0:
+                break
+    if best is None:
+        return None, None
+    index, match = best
+    group = _SUBJECT_GROUPS[index]
+    return _RULES[index][0], match.group(group) if group else None
+
+
+def classify_compiler_log(log_text):
+    """
+    Splits a compiler/linker log into diagnostics and classifies each one.
+
+    Args:
+        log_text (str): The complete build output.
+
+    Returns:
+        tuple: (diagnostics, counts). diagnostics is a list of dicts with
+            file, line, column, severity, message, rule, error_type and
+            subject keys, in log order; counts is a Counter of error types.
+    """
+    diagnostics = []
+    counts = Counter()
+    for match in _DIAGNOSTIC_PATTERN.finditer(log_text):
+        if match.group('object') is not None:
+            file, line, column = match.group('object'), None, None
+            severity, message = 'error', match.group('link_message')
+        else:
+            file, line, column = match.group('file'), int(match.group('line')), match.group('column')
+            severity, message = match.group('severity'), match.group('message')
+            column = int(column) if column else None
+
+        # Severity first: a warning that mentions, say, "incompatible types" is still a warning
+        if severity == 'warning':
+            rule, subject = 'warning', None
+        else:
+            rule, subject = classify_message(message)
+            if rule is None:
+                rule = 'generic_linker_error' if match.group('object') is not None else 'generic_error'
+        error_type = ERROR_TYPES[rule]
+        counts[error_type] += 1
+        diagnostics.append({
+            'file': file,
+            'line': line,
+            'column': column,
+            'severity': severity,
+            'message': message,
+            'rule': rule,
+            'error_type': error_type,
+            'subject': subject,
+        })
+    return diagnostics, counts
@@ -0,0 +1,224 @@
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import threading
+from collections import Counter
+
+# Email classification against a list of institution and provider domains.
+#
+# The domain rules are read from a data file (EMAIL_DOMAINS_FILE, by default
+# backend/email_domains.txt) into a trie keyed by reversed labels: a rule for
+# cse.diu.edu.bd is stored under bd -> edu -> diu -> cse. An address is
+# classified by checking its syntax with one precompiled regex and then
+# walking its domain's labels from the right, once, remembering the most
+# specific rule seen. The cost per address does not depend on how many rules
+# there are, so mailing lists of millions of addresses can be checked
+# against thousands of domains.
+#
+#   python -m backend.email_domains addresses.txt            # or - for stdin
+#   python -m backend.email_domains addresses.txt --json --rules my_domains.txt
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DOMAINS_FILE = os.environ.get('EMAIL_DOMAINS_FILE', os.path.join(os.path.dirname(__file__), 'email_domains.txt'))
+
+EMAIL_REGEX = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}" # Relaxed start/end anchors
+_EMAIL_PATTERN = re.compile(EMAIL_REGEX)
+
+# Rule category -> (status, university mail), as email_parser reports them
+CATEGORIES = {
+    'university': ("Valid (University)", "Yes"),
+    'personal': ("Valid (Personal)", "No"),
+}
+_UNKNOWN = ("Valid (Unknown)", "No")
+_INVALID = ("Invalid", "No")
+
+# Status -> the bucket bulk classification counts it in
+SUMMARY_BUCKETS = {
+    "Valid (University)": 'University',
+    "Valid (Personal)": 'Personal',
+    "Valid (Unknown)": 'Unknown',
+    "Invalid": 'Invalid',
+}
+
+
+class DomainRulesError(ValueError):
+    """Raised for a malformed line in a domain rules file."""
+
+    def __init__(self, message, path, line_number):
+        super().__init__(f"{path}:{line_number}: {message}")
+        self.path = path
+        self.line_number = line_number
+
+
+class _Node:
+    __slots__ = ('children', 'exact', 'subdomains')
+
+    def __init__(self):
+        self.children = {}
+        self.exact = None # Category for this domain itself
+        self.subdomains = None # Category for this domain and everything below it
+
+
+class DomainTrie:
+    """Domain rules keyed by reversed labels; lookup() returns the most specific match."""
+
+    def __init__(self):
+        self._root = _Node()
+        self.rules = 0
+
+    def add(self, domain, category, subdomains=False):
+        node = self._root
+        for label in reversed(domain.lower().split('.')):
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _Node()
+            node = child
+        if subdomains:
+            node.subdomains = category
+        else:
+            node.exact = category
+        self.rules += 1
+
+    def lookup(self, domain):
+        """Returns the category of the most specific rule matching `domain`, or None."""
+        labels = domain.lower().split('.')
+        node = self._root
+        best = None
+        for index in range(len(labels) - 1, -1, -1):
+            node = node.children.get(labels[index])
+            if node is None:
+                return best
+            if node.subdomains is not None:
+                best = node.subdomains
+        return node.exact if node.exact is not None else best
+
+
+def load_domain_rules(path=EMAIL_DOMAINS_FILE):
+    """
+    Reads a rules file into a DomainTrie.
+
+    Each non-blank line that does not start with '#' holds a category from
+    CATEGORIES and a domain; a leading dot on the domain matches its
+    subdomains too.
+
+    Raises:
+        OSError: If the file cannot be read.
+        DomainRulesError: For a malformed line.
+    """
+    trie = DomainTrie()
+    with open(path, encoding='utf-8') as rules_file:
+        for line_number, line in enumerate(rules_file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split()
+            if len(fields) != 2:
+                raise DomainRulesError(f"Expected '<category> <domain>', got '{line}'", path, line_number)
+            category, domain = fields[0].lower(), fields[1]
+            if category not in CATEGORIES:
+                raise DomainRulesError(f"Unknown category '{fields[0]}'; use one of: {', '.join(CATEGORIES)}", path, line_number)
+            subdomains = domain.startswith('.')
+            domain = domain[1:] if subdomains else domain
+            if not domain or '' in domain.split('.'):
+                raise DomainRulesError(f"Invalid domain '{fields[1]}'", path, line_number)
+            trie.add(domain, category, subdomains)
+    return trie
+
+
+_DEFAULT_RULES = None
+_DEFAULT_RULES_LOCK = threading.Lock()
+
+
+def default_rules():
+    """The rules from EMAIL_DOMAINS_FILE, loaded on first use."""
+    global _DEFAULT_RULES
+    with _DEFAULT_RULES_LOCK:
+        if _DEFAULT_RULES is None:
+            _DEFAULT_RULES = load_domain_rules(EMAIL_DOMAINS_FILE)
+            logger.debug("Loaded %d email domain rules from %s", _DEFAULT_RULES.rules, EMAIL_DOMAINS_FILE)
+        return _DEFAULT_RULES
+
+
+def classify_address(address, rules=None):
+    """Returns (status category, "Yes"/"No" university mail) for one address."""
+    if not _EMAIL_PATTERN.fullmatch(address):
+        return _INVALID
+    category = (rules or default_rules()).lookup(address[address.index('@') + 1:])
+    return CATEGORIES[category] if category is not None else _UNKNOWN
+
+
+def iter_addresses(lines):
+    """Yields the address on each line, stripped; blank lines and '#' comments are skipped."""
+    for line in lines:
+        address = line.strip()
+        if address and not address.startswith('#'):
+            yield address
+
+
+def classify_addresses(lines, rules=None, counts=None):
+    """
+    Classifies one address per line, in input order and without keeping them.
+
+    Args:
+        lines (iterable): Text lines, e.g. an open file.
+        rules (DomainTrie | None): The rules; default_rules() when None.
+        counts (Counter | None): Updated with each address's SUMMARY_BUCKETS
+            bucket as it is classified.
+
+    Yields:
+        tuple: (address, status category, "Yes"/"No" university mail).
+    """
+    rules = rules or default_rules()
+    for address in iter_addresses(lines):
+        status, university = classify_address(address, rules)
+        if counts is not None:
+            counts[SUMMARY_BUCKETS[status]] += 1
+        yield address, status, university
+
+
+def empty_summary():
+    return Counter({bucket: 0 for bucket in SUMMARY_BUCKETS.values()})
+
+
+def render_summary(counts):
+    return "Summary: " + ", ".join(f"{bucket}: {counts[bucket]}" for bucket in SUMMARY_BUCKETS.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a list of email addresses, one per line.")
+    parser.add_argument('source', help="File of addresses, or - for stdin")
+    parser.add_argument('--rules', default=EMAIL_DOMAINS_FILE, help="Domain rules file")
+    parser.add_argument('--json', action='store_true', help="Print one JSON record per line")
+    parser.add_argument('--summary-only', action='store_true', help="Print only the counts")
+    args = parser.parse_args(argv)
+
+    try:
+        rules = load_domain_rules(args.rules)
+    except (OSError, DomainRulesError) as e:
+        parser.error(f"Could not load domain rules: {e}")
+    counts = empty_summary()
+    source = sys.stdin if args.source == '-' else open(args.source, encoding='utf-8', errors='replace')
+    try:
+        for address, status, university in classify_addresses(source, rules, counts):
+            if args.summary_only:
+                continue
+            if args.json:
+                print(json.dumps({'type': 'email', 'email': address, 'status': status, 'university': university == "Yes"}))
+            else:
+                print(f"Email: {address} | Status: {status} | Is University Mail (.edu): {university}")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    if args.json:
+        print(json.dumps({'type': 'summary', 'counts': dict(counts)}))
+    else:
+        print(render_summary(counts))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
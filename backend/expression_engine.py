@@ -0,0 +1,300 @@
+import re
+import warnings
+
+# Arithmetic expression engine used by calculator().
+#
+# Expressions are tokenized and parsed once into a small AST of tuples,
+# constant sub-expressions are folded while parsing, and variables are
+# resolved through a symbol-table lookup at evaluation time. The accepted
+# language matches what calculator() used to hand to eval(): numbers,
+# identifiers, + - * / ** and parentheses.
+#
+# AST nodes:
+#   ('num', value)
+#   ('var', name)
+#   ('neg', operand)
+#   ('pos', operand)
+#   ('bin', op, left, right)
+
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<num>\d+\.?\d*|\.\d+)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|[-+*/()])
+  | (?P<bad>.)
+''', re.VERBOSE | re.DOTALL)
+
+
+# calculator() used to hand an expression to eval() only when, after
+# variable substitution, it held nothing but these characters
+_LEGACY_EXPRESSION = re.compile(r'[\d\s+\-*/().]+')
+
+_MAX_INT_EXPONENT = 100000 # Guards against 9**9**9-style inputs that would never finish
+
+
+class ExpressionError(Exception):
+    """Raised for malformed expressions."""
+
+
+class InvalidCharacters(ExpressionError):
+    """Raised when an expression contains characters outside the arithmetic subset."""
+
+
+class UnknownIdentifier(ExpressionError):
+    """Raised when an expression refers to a name missing from the symbol table."""
+
+    def __init__(self, name):
+        super().__init__(f"unknown identifier '{name}'")
+        self.name = name
+
+
+def tokenize(text):
+    """
+    Splits an expression into (kind, value, start, end) tuples in one pass.
+
+    Raises:
+        InvalidCharacters: If the text contains anything but numbers,
+            identifiers, operators, parentheses and whitespace.
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'ws':
+            continue
+        if kind == 'bad':
+            raise InvalidCharacters(f"invalid character {match.group()!r}")
+        value = match.group()
+        if kind == 'num':
+            value = float(value) if '.' in value else int(value)
+        tokens.append((kind, value, match.start(), match.end()))
+    return tokens
+
+
+def _apply(op, left, right):
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if right == 0:
+            raise ZeroDivisionError("division by zero")
+        return left / right
+    if op == '**':
+        if isinstance(right, int) and abs(right) > _MAX_INT_EXPONENT and abs(left) > 1:
+            raise OverflowError("exponent too large")
+        if left == 0 and right < 0:
+            raise ZeroDivisionError("zero raised to a negative power")
+        return left ** right
+    raise ExpressionError(f"unknown operator {op!r}")
+
+
+def _fold_binary(op, left, right):
+    if left[0] == 'num' and right[0] == 'num':
+        try:
+            return ('num', _apply(op, left[1], right[1]))
+        except (ZeroDivisionError, OverflowError):
+            pass # Leave it for evaluation so the error is reported there
+    return ('bin', op, left, right)
+
+
+def _fold_unary(kind, operand):
+    if operand[0] == 'num':
+        return ('num', -operand[1] if kind == 'neg' else operand[1])
+    return (kind, operand)
+
+
+class _Parser:
+    """
+    Recursive-descent parser following Python's precedence rules:
+
+        expr   := term (('+' | '-') term)*
+        term   := factor (('*' | '/') factor)*
+        factor := ('+' | '-') factor | power
+        power  := atom ['**' factor]
+        atom   := NUMBER | NAME | '(' expr ')'
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take_op(self, *ops):
+        token = self._peek()
+        if token and token[0] == 'op' and token[1] in ops:
+            self.pos += 1
+            return token[1]
+        return None
+
+    def _error(self, expected):
+        token = self._peek()
+        if token is None:
+            return ExpressionError(f"unexpected end of expression, expected {expected}")
+        return ExpressionError(f"unexpected {token[1]!r} at position {token[2]}, expected {expected}")
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("empty expression")
+        node = self.expr()
+        if self._peek() is not None:
+            raise self._error("an operator")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while True:
+            op = self._take_op('+', '-')
+            if op is None:
+                return node
+            node = _fold_binary(op, node, self.term())
+
+    def term(self):
+        node = self.factor()
+        while True:
+            op = self._take_op('*', '/')
+            if op is None:
+                return node
+            node = _fold_binary(op, node, self.factor())
+
+    def factor(self):
+        op = self._take_op('+', '-')
+        if op is not None:
+            return _fold_unary('neg' if op == '-' else 'pos', self.factor())
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self._take_op('**'):
+            node = _fold_binary('**', node, self.factor())
+        return node
+
+    def atom(self):
+        token = self._peek()
+        if token is None:
+            raise self._error("a number, name or '('")
+        kind, value = token[0], token[1]
+        if kind == 'num':
+            self.pos += 1
+            return ('num', value)
+        if kind == 'name':
+            self.pos += 1
+            return ('var', value)
+        if self._take_op('('):
+            node = self.expr()
+            if not self._take_op(')'):
+                raise self._error("')'")
+            return node
+        raise self._error("a number, name or '('")
+
+
+def parse_expression(text):
+    """
+    Parses an arithmetic expression into a constant-folded AST.
+
+    Args:
+        text (str): The expression source.
+
+    Returns:
+        tuple: The root AST node.
+
+    Raises:
+        InvalidCharacters: For characters outside the arithmetic subset.
+        ExpressionError: For syntax errors.
+    """
+    return _Parser(tokenize(text)).parse()
+
+
+def free_variables(node):
+    """Returns the set of variable names referenced by an AST."""
+    names = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current[0] == 'var':
+            names.add(current[1])
+        elif current[0] in ('neg', 'pos'):
+            stack.append(current[1])
+        elif current[0] == 'bin':
+            stack.extend((current[2], current[3]))
+    return names
+
+
+def evaluate(node, symbols):
+    """
+    Evaluates an AST against a symbol table.
+
+    Args:
+        node (tuple): A node returned by parse_expression.
+        symbols (dict): Variable name -> numeric value.
+
+    Returns:
+        int | float: The value, with Python's int/float semantics.
+
+    Raises:
+        UnknownIdentifier: If a variable is missing from `symbols`.
+        ZeroDivisionError: If any divisor evaluates to exactly zero.
+    """
+    kind = node[0]
+    if kind == 'num':
+        return node[1]
+    if kind == 'var':
+        try:
+            return symbols[node[1]]
+        except KeyError:
+            raise UnknownIdentifier(node[1])
+    if kind == 'neg':
+        return -evaluate(node[1], symbols)
+    if kind == 'pos':
+        return +evaluate(node[1], symbols)
+    return _apply(node[1], evaluate(node[2], symbols), evaluate(node[3], symbols))
+
+
+def substitute_known(text, symbols):
+    """
+    Renders `text` with every known variable replaced by its value.
+
+    Used for error messages, which show the expression as it looked after
+    substitution.
+    """
+    parts = []
+    last = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        if match.lastgroup == 'name' and match.group() in symbols:
+            parts.append(text[last:match.start()])
+            parts.append(str(symbols[match.group()]))
+            last = match.end()
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def legacy_error(text, error):
+    """
+    Classifies a failed expression the way calculator()'s eval() version did.
+
+    Args:
+        text (str): The expression with known variables substituted.
+        error (Exception): What parse_expression or evaluate raised.
+
+    Returns:
+        tuple: (kind, detail). kind is 'invalid' for characters outside the
+            arithmetic subset (unknown names and forms like 1e3 included),
+            'zero_division' or 'error'. For 'error', detail is the message
+            eval() gave for the same syntax error, or str(error) where
+            Python accepts the syntax (e.g. the call in 2(3)).
+    """
+    if not _LEGACY_EXPRESSION.fullmatch(text):
+        return 'invalid', None
+    if isinstance(error, ZeroDivisionError):
+        return 'zero_division', None
+    if isinstance(error, ExpressionError):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore') # e.g. "'int' object is not callable" for 2(3)
+                compile(text, '<string>', 'eval') # Compiled for its error message only, never run
+        except SyntaxError as e:
+            return 'error', str(e)
+    return 'error', str(error)
@@ -0,0 +1,180 @@
+import os
+import re
+import mmap
+import tempfile
+from contextlib import contextmanager
+
+# Uploaded inputs, scanned without loading them into Python strings.
+#
+# spool_upload() copies a request body into a SpooledTemporaryFile chunk by
+# chunk. The scanners below memory-map that file and run byte-pattern
+# regexes over the mapping, decoding only the matched pieces, so Python
+# memory stays around a chunk plus whatever the analyzer collects. The same
+# file object can be handed to a Flex/Bison executable as its stdin (see
+# run_process in flex_bison_utils).
+#
+# The byte patterns mirror source_analysis.py: block comments are removed
+# first, then line comments, and printf string literals are taken from what
+# is left. Python's str `\s` also matches a few non-ASCII spaces, which are
+# spelled out as their UTF-8 encodings so results match the in-memory
+# analyzers for valid UTF-8 input.
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+UPLOAD_SPOOL_MAX_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MAX_MEMORY', str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(512 * 1024 * 1024)))
+
+_WHITESPACE = (rb'(?:[\t-\r\x1c- ]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]'
+               rb'|\xe2\x81\x9f|\xe3\x80\x80)')
+_BLOCK_COMMENT_PATTERN = re.compile(rb'/\*.*?\*/', re.DOTALL)
+_LINE_COMMENT_PATTERN = re.compile(rb'//.*')
+_PRINTF_STRING_PATTERN = re.compile(rb'printf' + _WHITESPACE + rb'*\(' + _WHITESPACE + rb'*"(.*?)"', re.DOTALL)
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+def spool_upload(read, max_bytes=UPLOAD_MAX_BYTES):
+    """
+    Copies a stream into a spooled temporary file.
+
+    Args:
+        read (callable): read(size) -> bytes, e.g. a request stream's read.
+        max_bytes (int): Upper bound on the upload size.
+
+    Returns:
+        SpooledTemporaryFile: Positioned at the start. The caller closes it.
+
+    Raises:
+        UploadTooLarge: If more than `max_bytes` bytes arrive.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY)
+    total = 0
+    try:
+        while True:
+            chunk = read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes.")
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+def file_size(file):
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+@contextmanager
+def mapped(file):
+    """Yields a read-only buffer over the whole file: an mmap, or b'' for an empty file."""
+    if file_size(file) == 0:
+        yield b''
+        return
+    file.flush()
+    view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) # fileno() moves a spooled file to disk
+    try:
+        yield view
+    finally:
+        view.close()
+
+
+def _decode(data):
+    return data.decode('utf-8', errors='replace')
+
+
+def iter_block_comments(buffer):
+    """Yields the text of each `/* ... */` comment."""
+    for match in _BLOCK_COMMENT_PATTERN.finditer(buffer):
+        yield _decode(match.group())
+
+
+def iter_line_comments(buffer):
+    """Yields the text of each `// ...` comment in the raw text."""
+    for match in _LINE_COMMENT_PATTERN.finditer(buffer):
+        yield _decode(match.group())
+
+
+def _comment_free_pieces(buffer):
+    # The spans between block comments, in chunks of at most UPLOAD_CHUNK_SIZE bytes
+    last = 0
+    for match in _BLOCK_COMMENT_PATTERN.finditer(buffer):
+        for start in range(last, match.start(), UPLOAD_CHUNK_SIZE):
+            yield buffer[start:min(start + UPLOAD_CHUNK_SIZE, match.start())]
+        last = match.end()
+    for start in range(last, len(buffer), UPLOAD_CHUNK_SIZE):
+        yield buffer[start:min(start + UPLOAD_CHUNK_SIZE, len(buffer))]
+
+
+def write_clean_text(buffer, out):
+    """
+    Writes `buffer` with block comments and then line comments removed to
+    `out`, as SourceArtifact.clean_text does, one chunk at a time.
+    """
+    in_line_comment = False
+    pending = b'' # A trailing '/' that may start '//' together with the next piece
+    for piece in _comment_free_pieces(buffer):
+        data = pending + piece
+        pending = b''
+        position = 0
+        while position < len(data):
+            if in_line_comment:
+                newline = data.find(b'\n', position)
+                if newline == -1:
+                    position = len(data)
+                    break
+                in_line_comment = False
+                position = newline # The newline itself is kept
+            start = data.find(b'//', position)
+            if start == -1:
+                if data.endswith(b'/'):
+                    out.write(data[position:-1])
+                    pending = b'/'
+                else:
+                    out.write(data[position:])
+                break
+            out.write(data[position:start])
+            in_line_comment = True
+            position = start + 2
+    out.write(pending)
+
+
+def iter_printf_strings(file):
+    """
+    Yields the first string literal of every printf call outside comments,
+    like SourceArtifact.printf_strings, for an uploaded file.
+    """
+    with tempfile.TemporaryFile() as clean:
+        with mapped(file) as buffer:
+            write_clean_text(buffer, clean)
+        with mapped(clean) as buffer:
+            for match in _PRINTF_STRING_PATTERN.finditer(buffer):
+                yield _decode(match.group(1))
+
+
+def iter_lines(file):
+    """
+    Yields the file's lines, decoded one at a time. A line longer than
+    UPLOAD_CHUNK_SIZE bytes is yielded in pieces of at most that size.
+    """
+    file.seek(0)
+    for line in iter(lambda: file.readline(UPLOAD_CHUNK_SIZE), b''):
+        yield _decode(line)
+
+
+def read_text(file, max_bytes):
+    """Decodes the whole file as text, for analyzers without a streaming path."""
+    if file_size(file) > max_bytes:
+        raise UploadTooLarge(f"This analyzer reads its whole input into memory; files over {max_bytes} bytes are not supported.")
+    file.seek(0)
+    return _decode(file.read())
+
@@ -2,13 +2,27 @@
 #include <stdio.h>
 #include <math.h> // For NAN
 #include <stdlib.h> // For exit
+#include "../fb_records.h" // Results are written as JSON Lines records
 
 extern int yylex();
 extern void yyerror(const char *s); // Corrected declaration as void
 // extern double yylval; // Removed conflicting declaration
 
+static int line_number = 1; // Input line being parsed
+
 void yyerror(const char *s) {
-    fprintf(stderr, "Error: %s\n", s);
+    fb_record_begin(stdout, "error");
+    fb_record_str(stdout, "kind", "parser");
+    fb_record_str(stdout, "message", s);
+    fb_record_int(stdout, "line", line_number);
+    fb_record_end(stdout);
+}
+
+// Writes a record that carries only its type and the current line
+static void line_record(const char *type) {
+    fb_record_begin(stdout, type);
+    fb_record_int(stdout, "line", line_number);
+    fb_record_end(stdout);
 }
 
 extern FILE *yyin;
@@ -39,10 +53,16 @@ program:
 ;
 
 line:
-    expr EOL        { printf("= %f\n", $1); }
-    | EXIT_CMD EOL  { printf("Exiting...\n"); YYACCEPT; } // YYACCEPT exits the parser
-    | EOL           { /* empty line, do nothing */ }
-    | error EOL     { yyclearin; yyerrok; printf("Error: Invalid expression\n"); }
+    expr EOL        {
+        fb_record_begin(stdout, "result");
+        fb_record_int(stdout, "line", line_number);
+        fb_record_num(stdout, "value", $1);
+        fb_record_end(stdout);
+        line_number++;
+    }
+    | EXIT_CMD EOL  { line_record("exit"); YYACCEPT; } // YYACCEPT exits the parser
+    | EOL           { line_number++; /* empty line, do nothing */ }
+    | error EOL     { yyclearin; yyerrok; line_record("invalid"); line_number++; }
 ;
 
 expr:
@@ -0,0 +1,89 @@
+/*
+ * fb_records.h - structured output shared by the Flex/Bison analyzers.
+ *
+ * Analyzers report their results as JSON Lines: one JSON object per line,
+ * each with a "type" field naming the record kind, for example
+ *
+ *   {"type":"variable","name":"s1","value":"He said \"hi\""}
+ *   {"type":"error","line":4,"message":"Undeclared variable 'z'"}
+ *
+ * Strings are escaped as RFC 8259 requires, so quotes, backslashes and
+ * control characters in the input cannot break the framing. Bytes >= 0x80
+ * are copied unchanged (the input is expected to be UTF-8). Python decodes
+ * the stream with backend/records.py.
+ *
+ *   fb_record_begin(out, "variable");
+ *   fb_record_str(out, "name", name);
+ *   fb_record_end(out);
+ */
+#ifndef FB_RECORDS_H
+#define FB_RECORDS_H
+
+#include <stdio.h>
+#include <string.h>
+#include <math.h>
+
+static void fb_json_string(FILE *out, const char *s, size_t length) {
+    static const char hex[] = "0123456789abcdef";
+    fputc('"', out);
+    for (size_t i = 0; i < length; i++) {
+        unsigned char c = (unsigned char)s[i];
+        switch (c) {
+            case '"':  fputs("\\\"", out); break;
+            case '\\': fputs("\\\\", out); break;
+            case '\n': fputs("\\n", out); break;
+            case '\r': fputs("\\r", out); break;
+            case '\t': fputs("\\t", out); break;
+            default:
+                if (c < 0x20) {
+                    fputs("\\u00", out);
+                    fputc(hex[c >> 4], out);
+                    fputc(hex[c & 0xf], out);
+                } else {
+                    fputc(c, out);
+                }
+        }
+    }
+    fputc('"', out);
+}
+
+static void fb_record_begin(FILE *out, const char *type) {
+    fputs("{\"type\":", out);
+    fb_json_string(out, type, strlen(type));
+}
+
+static void fb_record_key(FILE *out, const char *key) {
+    fputc(',', out);
+    fb_json_string(out, key, strlen(key));
+    fputc(':', out);
+}
+
+static void fb_record_strn(FILE *out, const char *key, const char *value, size_t length) {
+    fb_record_key(out, key);
+    fb_json_string(out, value, length);
+}
+
+static void fb_record_str(FILE *out, const char *key, const char *value) {
+    fb_record_strn(out, key, value, strlen(value));
+}
+
+static void fb_record_int(FILE *out, const char *key, long value) {
+    fb_record_key(out, key);
+    fprintf(out, "%ld", value);
+}
+
+// JSON has no NaN or infinity; those are written as null
+static void fb_record_num(FILE *out, const char *key, double value) {
+    fb_record_key(out, key);
+    if (isfinite(value)) {
+        fprintf(out, "%.17g", value);
+    } else {
+        fputs("null", out);
+    }
+}
+
+static void fb_record_end(FILE *out) {
+    fputs("}\n", out);
+}
+
+#endif // FB_RECORDS_H
@@ -0,0 +1,219 @@
+/*
+ * fb_serve.h - persistent "serve" mode shared by the Flex/Bison analyzers.
+ *
+ * An analyzer started with --serve prints a banner and then handles many
+ * requests over stdin/stdout instead of exiting after a single input:
+ *
+ *   banner   : "FBSERVE 1\n"
+ *   request  : "<n>\n" followed by n input bytes
+ *              "PING\n" is answered with "PONG\n" (health check)
+ *   response : "<n_out> <n_err>\n" followed by n_out bytes of output
+ *              and n_err bytes of diagnostics
+ *
+ * Analyzers write their normal output to fb_out and diagnostics to fb_err.
+ * In serve mode these point at per-request temporary files so the two
+ * streams can be framed separately.
+ *
+ * Built with -DFB_SHARED_LIBRARY (as a shared library), an analyzer that
+ * invokes FB_DEFINE_LIBRARY_ENTRY(handler) also exports:
+ *
+ *   int  fb_analyze(const char *input, long length,
+ *                   char **out, long *out_len, char **err, long *err_len);
+ *   void fb_free(char *buffer);
+ *
+ * fb_analyze runs the handler in-process and returns malloc'd copies of the
+ * output and diagnostics, which the caller releases with fb_free. It returns
+ * 0 on success. The analyzers keep their state in globals, so calls into one
+ * loaded library must not overlap.
+ */
+#ifndef FB_SERVE_H
+#define FB_SERVE_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#ifdef _WIN32
+#include <io.h>
+#include <fcntl.h>
+#endif
+
+#define FB_SERVE_FLAG "--serve"
+#define FB_SERVE_BANNER "FBSERVE 1\n"
+
+extern FILE *fb_out;
+extern FILE *fb_err;
+
+typedef void (*fb_handler)(const char *input, int length);
+
+static int fb_is_serve_mode(int argc, char **argv) {
+    return argc > 1 && strcmp(argv[1], FB_SERVE_FLAG) == 0;
+}
+
+// Copy the first n bytes of a temporary file to stdout
+static void fb_copy_to_stdout(FILE *src, long n) {
+    char chunk[4096];
+    rewind(src);
+    while (n > 0) {
+        size_t want = n < (long)sizeof(chunk) ? (size_t)n : sizeof(chunk);
+        size_t got = fread(chunk, 1, want, src);
+        if (got == 0) break;
+        fwrite(chunk, 1, got, stdout);
+        n -= (long)got;
+    }
+}
+
+static int fb_serve(fb_handler handle) {
+    char header[64];
+    char *input = NULL;
+    long capacity = 0;
+
+#ifdef _WIN32
+    _setmode(_fileno(stdin), _O_BINARY);
+    _setmode(_fileno(stdout), _O_BINARY);
+#endif
+
+    fputs(FB_SERVE_BANNER, stdout);
+    fflush(stdout);
+
+    while (fgets(header, sizeof(header), stdin)) {
+        if (strcmp(header, "PING\n") == 0) {
+            fputs("PONG\n", stdout);
+            fflush(stdout);
+            continue;
+        }
+
+        long length = strtol(header, NULL, 10);
+        if (length < 0) break;
+        if (length + 1 > capacity) {
+            char *grown = (char *)realloc(input, length + 1);
+            if (!grown) break;
+            input = grown;
+            capacity = length + 1;
+        }
+        if ((long)fread(input, 1, length, stdin) != length) break;
+        input[length] = '\0';
+
+        FILE *out = tmpfile();
+        FILE *err = tmpfile();
+        if (!out || !err) break;
+
+        fb_out = out;
+        fb_err = err;
+        handle(input, (int)length);
+        fflush(out);
+        fflush(err);
+
+        long n_out = ftell(out);
+        long n_err = ftell(err);
+        printf("%ld %ld\n", n_out, n_err);
+        fb_copy_to_stdout(out, n_out);
+        fb_copy_to_stdout(err, n_err);
+        fflush(stdout);
+
+        fclose(out);
+        fclose(err);
+    }
+
+    free(input);
+    fb_out = stdout;
+    fb_err = stderr;
+    return 0;
+}
+
+#ifdef FB_SHARED_LIBRARY
+
+#ifdef _WIN32
+#define FB_EXPORT __declspec(dllexport)
+#else
+#define FB_EXPORT __attribute__((visibility("default")))
+#endif
+
+#ifdef __cplusplus
+#define FB_EXTERN_C extern "C"
+#else
+#define FB_EXTERN_C
+#endif
+
+#ifdef _WIN32
+// No open_memstream on Windows: capture through a temporary file instead
+static FILE *fb_capture_open(char **buffer, size_t *length) {
+    *buffer = NULL;
+    *length = 0;
+    return tmpfile();
+}
+
+static int fb_capture_close(FILE *stream, char **buffer, size_t *length) {
+    long n;
+    fflush(stream);
+    n = ftell(stream);
+    *buffer = (char *)malloc(n > 0 ? (size_t)n : 1);
+    if (!*buffer) {
+        fclose(stream);
+        return -1;
+    }
+    rewind(stream);
+    *length = n > 0 ? fread(*buffer, 1, (size_t)n, stream) : 0;
+    fclose(stream);
+    return 0;
+}
+#else
+static FILE *fb_capture_open(char **buffer, size_t *length) {
+    return open_memstream(buffer, length);
+}
+
+static int fb_capture_close(FILE *stream, char **buffer, size_t *length) {
+    (void)buffer;
+    (void)length;
+    return fclose(stream) == 0 ? 0 : -1;
+}
+#endif
+
+static int fb_library_call(fb_handler handle, const char *input, long length,
+                           char **out, long *out_len, char **err, long *err_len) {
+    char *out_buffer = NULL, *err_buffer = NULL;
+    size_t out_size = 0, err_size = 0;
+    FILE *out_stream, *err_stream;
+    int status = 0;
+
+    *out = *err = NULL;
+    *out_len = *err_len = 0;
+
+    out_stream = fb_capture_open(&out_buffer, &out_size);
+    err_stream = fb_capture_open(&err_buffer, &err_size);
+    if (!out_stream || !err_stream) {
+        if (out_stream) fclose(out_stream);
+        if (err_stream) fclose(err_stream);
+        free(out_buffer);
+        free(err_buffer);
+        return -1;
+    }
+
+    fb_out = out_stream;
+    fb_err = err_stream;
+    handle(input, (int)length);
+    fb_out = stdout;
+    fb_err = stderr;
+
+    if (fb_capture_close(out_stream, &out_buffer, &out_size) != 0) status = -1;
+    if (fb_capture_close(err_stream, &err_buffer, &err_size) != 0) status = -1;
+
+    *out = out_buffer;
+    *out_len = (long)out_size;
+    *err = err_buffer;
+    *err_len = (long)err_size;
+    return status;
+}
+
+#define FB_DEFINE_LIBRARY_ENTRY(handler)                                              \
+    FB_EXTERN_C FB_EXPORT int fb_analyze(const char *input, long length,              \
+                                         char **out, long *out_len,                   \
+                                         char **err, long *err_len) {                 \
+        return fb_library_call(handler, input, length, out, out_len, err, err_len);   \
+    }                                                                                 \
+    FB_EXTERN_C FB_EXPORT void fb_free(char *buffer) { free(buffer); }
+
+#else
+#define FB_DEFINE_LIBRARY_ENTRY(handler)
+#endif // FB_SHARED_LIBRARY
+
+#endif // FB_SERVE_H
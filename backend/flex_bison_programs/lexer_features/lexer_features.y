@@ -4,10 +4,17 @@
 #include <set>
 #include <string>
 #include <iostream>
+#include "../fb_serve.h"
+#include "../fb_records.h"
 
 extern int yylex();
 extern FILE* yyin;
 void yyerror(const char *s);
+void fb_scan_begin(const char *input, int length);
+void fb_scan_end(void);
+
+FILE *fb_out;
+FILE *fb_err;
 
 // Sets to store unique tokens
 std::set<std::string> keywords;
@@ -82,40 +89,62 @@ token:
 %%
 
 void yyerror(const char *s) {
-    fprintf(stderr, "PARSER ERROR: %s\n", s);
+    fb_record_begin(fb_out, "error");
+    fb_record_str(fb_out, "kind", "parser");
+    fb_record_str(fb_out, "message", s);
+    fb_record_end(fb_out);
 }
 
-int main(void) {
-    yyin = stdin;
-    do {
-        yyparse();
-    } while (!feof(yyin));
-
-    printf("- Keywords: ");
-    for (auto it = keywords.begin(); it != keywords.end(); ++it) {
-        printf("%s%s", it->c_str(), std::next(it) == keywords.end() ? "" : ", ");
+// One "token" record per distinct token, grouped by category in sorted order (see fb_records.h)
+static void print_set(const char *category, const std::set<std::string> &items) {
+    for (auto it = items.begin(); it != items.end(); ++it) {
+        fb_record_begin(fb_out, "token");
+        fb_record_str(fb_out, "category", category);
+        fb_record_strn(fb_out, "text", it->data(), it->size());
+        fb_record_end(fb_out);
     }
+}
 
-    printf("\n- Identifiers: ");
-    for (auto it = identifiers.begin(); it != identifiers.end(); ++it) {
-        printf("%s%s", it->c_str(), std::next(it) == identifiers.end() ? "" : ", ");
-    }
+static void print_summary(void) {
+    print_set("keyword", keywords);
+    print_set("identifier", identifiers);
+    print_set("operator", operators);
+    print_set("delimiter", delimiters);
+    print_set("string_literal", stringLiterals);
+}
 
-    printf("\n- Operators: ");
-    for (auto it = operators.begin(); it != operators.end(); ++it) {
-        printf("%s%s", it->c_str(), std::next(it) == operators.end() ? "" : ", ");
-    }
+// Handle one serve-mode request: reset state, parse the buffer, print the summary
+static void analyze_buffer(const char *input, int length) {
+    keywords.clear();
+    identifiers.clear();
+    operators.clear();
+    delimiters.clear();
+    stringLiterals.clear();
 
-    printf("\n- Delimiters: ");
-    for (auto it = delimiters.begin(); it != delimiters.end(); ++it) {
-        printf("%s%s", it->c_str(), std::next(it) == delimiters.end() ? "" : ", ");
-    }
-    
-    printf("\n- String Literals: ");
-    for (auto it = stringLiterals.begin(); it != stringLiterals.end(); ++it) {
-        printf("%s%s", it->c_str(), std::next(it) == stringLiterals.end() ? "" : ", ");
+    fb_scan_begin(input, length);
+    yyparse();
+    fb_scan_end();
+
+    print_summary();
+}
+
+// In-process entry point when built as a shared library (see fb_serve.h)
+FB_DEFINE_LIBRARY_ENTRY(analyze_buffer)
+
+int main(int argc, char **argv) {
+    fb_out = stdout;
+    fb_err = stderr;
+
+    if (fb_is_serve_mode(argc, argv)) {
+        return fb_serve(analyze_buffer);
     }
-    printf("\n");
+
+    yyin = stdin;
+    do {
+        yyparse();
+    } while (!feof(yyin));
+
+    print_summary();
 
     return 0;
 }
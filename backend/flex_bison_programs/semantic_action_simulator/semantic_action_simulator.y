@@ -3,68 +3,137 @@
 #include <stdlib.h> // For atof, atoi, malloc, free
 #include <string.h> // For strdup
 #include <math.h>   // For fmod
+#include <stdarg.h> // For report_error
+#include "symbol_table.h" // Scoped hash-table symbol table
+#include "../fb_serve.h"
+#include "../fb_records.h" // Results are written as JSON Lines records
 
 extern int yylex();
-extern int yyerror(const char *s);
+void yyerror(const char *s);
 extern int yylineno; // Line number from Flex
-extern YYSTYPE yylval; // Lexer populates this, so it must be extern here
-
-// Structure to hold variable information in the symbol table
-typedef struct {
-    char *name;
-    enum { INT_TYPE, FLOAT_TYPE, CHAR_TYPE, UNKNOWN_TYPE } type;
-    union {
-        int ival;
-        float fval;
-        char cval;
-    } value;
-} Symbol;
-
-#define MAX_SYMBOLS 100
-Symbol symbol_table[MAX_SYMBOLS];
-int symbol_count = 0;
-
-Symbol* find_symbol(const char *name) {
-    for (int i = 0; i < symbol_count; i++) {
-        if (strcmp(symbol_table[i].name, name) == 0) {
-            return &symbol_table[i];
-        }
-    }
-    return NULL;
-}
-
-Symbol* add_symbol(const char *name, int type) {
-    Symbol *sym = find_symbol(name);
-    if (sym) {
-        // Update type for existing symbol, assume redeclaration in same scope is update for simulation
-        sym->type = type;
-        return sym;
-    }
-    if (symbol_count < MAX_SYMBOLS) {
-        sym = &symbol_table[symbol_count++];
-        sym->name = strdup(name);
-        sym->type = type;
-        return sym;
-    }
-    fprintf(stderr, "Error: Symbol table full. Cannot add '%s' at line %d\n", name, yylineno);
-    return NULL;
-}
-
-void yyerror(const char *s) {
-    fprintf(stderr, "PARSER ERROR: %s at line %d\n", s, yylineno);
+extern FILE *yyin;
+void fb_scan_begin(const char *input, int length);
+void fb_scan_end(void);
+
+FILE *fb_out;
+FILE *fb_err;
+
+// Writes an "error" record; `kind` is "parser", "lexical" or NULL for semantic errors
+void report_error(const char *kind, const char *format, ...) {
+    char message[512];
+    va_list args;
+    va_start(args, format);
+    vsnprintf(message, sizeof(message), format, args);
+    va_end(args);
+    fb_record_begin(fb_out, "error");
+    if (kind) fb_record_str(fb_out, "kind", kind);
+    fb_record_str(fb_out, "message", message);
+    fb_record_int(fb_out, "line", yylineno);
+    fb_record_end(fb_out);
 }
 
 %}
 
 %define parse.error verbose
 
+%code requires {
+// The result of an expression: its C type (a SymbolType) and value; chars are held in ival
+typedef struct {
+    int type;
+    int ival;
+    float fval;
+} Value;
+}
+
 %union {
     int ival;
     float fval;
     char cval;
     char *str_val; // For identifiers, types, string literals
+    Value value;
+}
+
+%{
+// Type named by the declaration_specifiers of the declaration being parsed
+static SymbolType current_type = UNKNOWN_TYPE;
+
+// Maps a specifier string such as "const unsigned int" to a simulated type
+static SymbolType type_from_specifiers(const char *specifiers) {
+    if (strstr(specifiers, "float") || strstr(specifiers, "double")) return FLOAT_TYPE;
+    if (strstr(specifiers, "char")) return CHAR_TYPE;
+    if (strstr(specifiers, "int") || strstr(specifiers, "long") || strstr(specifiers, "short")
+        || strstr(specifiers, "signed")) return INT_TYPE;
+    return UNKNOWN_TYPE;
+}
+
+static Value int_value(int i) { Value v; v.type = INT_TYPE; v.ival = i; v.fval = (float)i; return v; }
+static Value float_value(float f) { Value v; v.type = FLOAT_TYPE; v.ival = (int)f; v.fval = f; return v; }
+static Value char_value(char c) { Value v; v.type = CHAR_TYPE; v.ival = c; v.fval = (float)c; return v; }
+
+static Value symbol_value(const Symbol *sym) {
+    if (sym->type == INT_TYPE) return int_value(sym->value.ival);
+    if (sym->type == FLOAT_TYPE) return float_value(sym->value.fval);
+    return char_value(sym->value.cval);
+}
+
+// Stores `v` into `sym` with C's implicit conversions and writes an "assign" record
+static void assign_symbol(Symbol *sym, Value v) {
+    if (sym->type == UNKNOWN_TYPE) {
+        report_error(NULL, "Variable '%s' has an unknown type for assignment", sym->name);
+        return;
+    }
+    fb_record_begin(fb_out, "assign");
+    fb_record_str(fb_out, "name", sym->name);
+    if (sym->type == INT_TYPE) {
+        sym->value.ival = v.type == FLOAT_TYPE ? (int)v.fval : v.ival;
+        fb_record_str(fb_out, "value_type", "int");
+        fb_record_int(fb_out, "value", sym->value.ival);
+    } else if (sym->type == FLOAT_TYPE) {
+        sym->value.fval = v.type == FLOAT_TYPE ? v.fval : (float)v.ival;
+        fb_record_str(fb_out, "value_type", "float");
+        fb_record_num(fb_out, "value", sym->value.fval);
+    } else {
+        sym->value.cval = v.type == FLOAT_TYPE ? (char)v.fval : (char)v.ival;
+        fb_record_str(fb_out, "value_type", "char");
+        fb_record_strn(fb_out, "value", &sym->value.cval, 1);
+    }
+    fb_record_end(fb_out);
+}
+
+// Applies a binary operator with the usual arithmetic conversions: float if
+// either side is float, int otherwise (char promotes to int). Returns 0 after
+// reporting a division by zero.
+static int arithmetic(char op, Value a, Value b, Value *result) {
+    if (a.type == FLOAT_TYPE || b.type == FLOAT_TYPE) {
+        if ((op == '/' || op == '%') && b.fval == 0.0f) {
+            report_error(NULL, "Float %s by zero", op == '/' ? "division" : "modulo");
+            return 0;
+        }
+        switch (op) {
+            case '+': *result = float_value(a.fval + b.fval); break;
+            case '-': *result = float_value(a.fval - b.fval); break;
+            case '*': *result = float_value(a.fval * b.fval); break;
+            case '/': *result = float_value(a.fval / b.fval); break;
+            default: *result = float_value((float)fmod(a.fval, b.fval)); break;
+        }
+        return 1;
+    }
+    if ((op == '/' || op == '%') && b.ival == 0) {
+        report_error(NULL, "Integer %s by zero", op == '/' ? "division" : "modulo");
+        return 0;
+    }
+    switch (op) {
+        case '+': *result = int_value(a.ival + b.ival); break;
+        case '-': *result = int_value(a.ival - b.ival); break;
+        case '*': *result = int_value(a.ival * b.ival); break;
+        case '/': *result = int_value(a.ival / b.ival); break;
+        default: *result = int_value(a.ival % b.ival); break;
+    }
+    return 1;
 }
 
+%}
+
 // Tokens from Lexer
 %token <str_val> IDENTIFIER TYPE_INT TYPE_FLOAT TYPE_CHAR TYPE_VOID TYPE_DOUBLE TYPE_LONG TYPE_SHORT
 %token <ival> INT_LITERAL
@@ -88,15 +157,12 @@ void yyerror(const char *s) {
 %left EQ_OP NE_OP
 %left LT_OP GT_OP LE_OP GE_OP
 %left ADD SUB
-%left MUL DIV MOD
-%right NOT_OP ASTERISK AMPERSAND // Unary operators and address-of
+%left ASTERISK DIV MOD
+%right NOT_OP UNARY // Unary operators
 
-%type <ival> int_expression_result
-%type <fval> float_expression_result
-%type <cval> char_expression_result
-%type <str_val> type_specifier declaration_specifiers
-%type <str_val> declarator direct_declarator identifier_list
-%type <str_val> constant_expression
+%type <value> expression
+%type <str_val> type_specifier type_qualifier declaration_specifiers
+%type <str_val> declarator
 
 %start program
 
@@ -120,20 +186,17 @@ preprocessor_directive:
 function_definitions:
     /* empty */
     | function_definitions function_definition
+    | function_definitions EOL // Blank lines, and lines that held only a # directive
     ;
 
 function_definition:
-    TYPE_INT MAIN_KEYWORD LPAREN RPAREN compound_statement {
-        // Here we could free associated strings if TYPE_INT or MAIN_KEYWORD were str_val
-        // but they are direct tokens.
-    }
-    | TYPE_VOID MAIN_KEYWORD LPAREN RPAREN compound_statement {
-        // Handle void main() as well
-    }
+    TYPE_INT MAIN_KEYWORD LPAREN RPAREN compound_statement { free($1); }
+    | TYPE_VOID MAIN_KEYWORD LPAREN RPAREN compound_statement { free($1); } // Handle void main() as well
     ;
 
+// Each block gets its own scope; inner declarations shadow outer ones
 compound_statement:
-    LBRACE statement_list RBRACE
+    LBRACE { if (!scope_push()) YYABORT; } statement_list RBRACE { scope_pop(); }
     ;
 
 statement_list:
@@ -145,14 +208,15 @@ statement_list:
 statement:
     declaration SEMICOLON
     | assignment SEMICOLON
-    | RETURN_KEYWORD int_expression_result SEMICOLON { /* Ignore return statement */ }
+    | compound_statement
+    | RETURN_KEYWORD expression SEMICOLON { /* Ignore return statement */ }
     | RETURN_KEYWORD SEMICOLON { /* Ignore return statement */ }
-    | error SEMICOLON { yyclearin; yyerrok; } // Basic error recovery for a statement
-    | error { yyclearin; yyerrok; } // Basic error recovery for a statement without semicolon
+    | error SEMICOLON { yyclearin; yyerrok; current_type = UNKNOWN_TYPE; } // Resume at the next statement; also after semantic errors (YYERROR)
     ;
 
 declaration:
-    declaration_specifiers init_declarator_list {
+    declaration_specifiers { current_type = type_from_specifiers($1); } init_declarator_list {
+        current_type = UNKNOWN_TYPE;
         if ($1) free($1); // Free the combined type string
     }
     ;
@@ -162,16 +226,9 @@ declaration_specifiers:
         $$ = $1;
     }
     | type_qualifier declaration_specifiers {
-        char *temp = (char *)malloc(strlen($1) + 1 + strlen($2) + 1);
-        sprintf(temp, "%s %s", $1, $2);
-        $$ = strdup(temp);
-        free($1); free($2); free(temp);
-    }
-    | declaration_specifiers type_qualifier {
-        char *temp = (char *)malloc(strlen($1) + 1 + strlen($2) + 1);
-        sprintf(temp, "%s %s", $1, $2);
-        $$ = strdup(temp);
-        free($1); free($2); free(temp);
+        $$ = (char *)malloc(strlen($1) + 1 + strlen($2) + 1);
+        sprintf($$, "%s %s", $1, $2);
+        free($1); free($2);
     }
     ;
 
@@ -179,18 +236,16 @@ type_qualifier:
     CONST_QUALIFIER     { $$ = strdup("const"); }
     | SIGNED_QUALIFIER  { $$ = strdup("signed"); }
     | UNSIGNED_QUALIFIER { $$ = strdup("unsigned"); }
-    | TYPE_LONG         { $$ = strdup("long"); }
-    | TYPE_SHORT        { $$ = strdup("short"); }
     ;
 
 type_specifier:
-    TYPE_VOID           { $$ = strdup("void"); }
-    | TYPE_CHAR         { $$ = strdup("char"); }
-    | TYPE_SHORT        { $$ = strdup("short"); }
-    | TYPE_INT          { $$ = strdup("int"); }
-    | TYPE_LONG         { $$ = strdup("long"); }
-    | TYPE_FLOAT        { $$ = strdup("float"); }
-    | TYPE_DOUBLE       { $$ = strdup("double"); }
+    TYPE_VOID           { free($1); $$ = strdup("void"); }
+    | TYPE_CHAR         { free($1); $$ = strdup("char"); }
+    | TYPE_SHORT        { free($1); $$ = strdup("short"); }
+    | TYPE_INT          { free($1); $$ = strdup("int"); }
+    | TYPE_LONG         { free($1); $$ = strdup("long"); }
+    | TYPE_FLOAT        { free($1); $$ = strdup("float"); }
+    | TYPE_DOUBLE       { free($1); $$ = strdup("double"); }
     ;
 
 init_declarator_list:
@@ -200,58 +255,28 @@ init_declarator_list:
 
 init_declarator:
     declarator {
-        // If it's just a declaration, add to symbol table, but don't print yet (no assignment)
-        Symbol *sym = add_symbol($1, UNKNOWN_TYPE); // Type will be determined by declaration_specifiers later
-        if (sym && current_type_specifier) { // Use the type passed down from declaration_specifiers, stored in current_type_specifier
-            if (strcmp(current_type_specifier, "int") == 0) sym->type = INT_TYPE;
-            else if (strcmp(current_type_specifier, "float") == 0) sym->type = FLOAT_TYPE;
-            else if (strcmp(current_type_specifier, "char") == 0) sym->type = CHAR_TYPE;
-            // No printing for bare declarations
-        }
-        if ($1) free($1);
+        // A bare declaration: add to the current scope, but don't print (no assignment)
+        Symbol *sym = add_symbol($1, current_type);
+        free($1);
+        if (!sym) YYABORT; // Out of memory
     }
-    | declarator ASSIGN constant_expression {
-        // This is an assignment in declaration, handle and print it
-        Symbol *sym = find_symbol($1);
-        if (!sym) { // If not found, add it (first declaration with assignment)
-            int type_enum = UNKNOWN_TYPE;
-            if (current_type_specifier) {
-                if (strcmp(current_type_specifier, "int") == 0) type_enum = INT_TYPE;
-                else if (strcmp(current_type_specifier, "float") == 0) type_enum = FLOAT_TYPE;
-                else if (strcmp(current_type_specifier, "char") == 0) type_enum = CHAR_TYPE;
-            }
-            sym = add_symbol($1, type_enum);
-        }
-
-        if (sym) {
-            // Determine the type of the constant expression and assign
-            // This is a simplification; a full C compiler would parse the actual type
-            // Here, we convert $3 (string) to appropriate type based on variable type
-            if (sym->type == INT_TYPE) {
-                sym->value.ival = atoi($3);
-                printf("- %s = %d\n", sym->name, sym->value.ival);
-            } else if (sym->type == FLOAT_TYPE) {
-                sym->value.fval = atof($3);
-                printf("- %s = %.2f\n", sym->name, sym->value.fval);
-            } else if (sym->type == CHAR_TYPE) {
-                sym->value.cval = $3[0]; // Take first char if it's a string constant
-                printf("- %s = '%c'\n", sym->name, sym->value.cval);
-            } else {
-                fprintf(stderr, "Error: Variable '%s' has an unknown type for assignment in declaration at line %d\n", sym->name, yylineno);
-            }
+    | declarator ASSIGN expression {
+        // An initialized declaration: add to the current scope and print the value
+        Symbol *sym = add_symbol($1, current_type);
+        if (!sym) { free($1); YYABORT; } // Out of memory
+        if (sym->type == UNKNOWN_TYPE) {
+            report_error(NULL, "Variable '%s' has an unknown type for assignment in declaration", sym->name);
+        } else {
+            assign_symbol(sym, $3);
         }
-        if ($1) free($1);
-        if ($3) free($3);
+        free($1);
     }
     ;
 
 declarator:
     ASTERISK declarator {
-        // Pointers. Strip '*' from name. Just pass the identifier part up.
-        // We only care about the base identifier. 
-        // The type needs to reflect it's a pointer if we were doing full type checking.
-        // For this simulator, we just pass the variable name.
-        $$ = $2; // Pass the identifier string up
+        // Pointers. We only care about the base identifier, so pass it up.
+        $$ = $2;
     }
     | IDENTIFIER {
         $$ = $1; // Pass the identifier string up
@@ -259,201 +284,92 @@ declarator:
     ;
 
 assignment:
-    IDENTIFIER ASSIGN int_expression_result SEMICOLON { // For int/char assignments
+    IDENTIFIER ASSIGN expression {
         Symbol *sym = find_symbol($1);
         if (sym) {
-            if (sym->type == INT_TYPE) {
-                sym->value.ival = $3;
-                printf("- %s = %d\n", sym->name, sym->value.ival);
-            } else if (sym->type == FLOAT_TYPE) { // Implicit int to float conversion
-                sym->value.fval = (float)$3;
-                printf("- %s = %.2f\n", sym->name, sym->value.fval);
-            } else if (sym->type == CHAR_TYPE) { // Implicit int to char conversion
-                sym->value.cval = (char)$3;
-                printf("- %s = '%c'\n", sym->name, sym->value.cval);
-            } else {
-                fprintf(stderr, "Error: Variable '%s' has an unknown type for assignment at line %d\n", sym->name, yylineno);
-            }
+            assign_symbol(sym, $3);
         } else {
-            fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno);
+            report_error(NULL, "Undeclared variable '%s'", $1);
         }
         free($1);
     }
-    | IDENTIFIER ASSIGN float_expression_result SEMICOLON { // For float assignments
+    ;
+
+// --- Expression Evaluation ---
+// Operands keep their C type; binary operators apply the usual arithmetic
+// conversions (char promotes to int, int to float). Operator precedence is
+// defined by the %left/%right directives.
+
+expression:
+    INT_LITERAL             { $$ = int_value($1); }
+    | FLOAT_LITERAL         { $$ = float_value($1); }
+    | CHAR_LITERAL          { $$ = char_value($1); }
+    | LPAREN expression RPAREN { $$ = $2; }
+    | IDENTIFIER            {
         Symbol *sym = find_symbol($1);
-        if (sym) {
-            if (sym->type == INT_TYPE) { // Implicit float to int conversion
-                sym->value.ival = (int)$3;
-                printf("- %s = %d\n", sym->name, sym->value.ival);
-            } else if (sym->type == FLOAT_TYPE) {
-                sym->value.fval = $3;
-                printf("- %s = %.2f\n", sym->name, sym->value.fval);
-            } else if (sym->type == CHAR_TYPE) { // Implicit float to char conversion
-                sym->value.cval = (char)$3;
-                printf("- %s = '%c'\n", sym->name, sym->value.cval);
-            } else {
-                fprintf(stderr, "Error: Variable '%s' has an unknown type for assignment at line %d\n", sym->name, yylineno);
-            }
-        } else {
-            fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno);
-        }
+        if (!sym) { report_error(NULL, "Undeclared variable '%s'", $1); free($1); YYERROR; }
+        if (sym->type == UNKNOWN_TYPE) { report_error(NULL, "Variable '%s' has unknown type", $1); free($1); YYERROR; }
+        $$ = symbol_value(sym);
         free($1);
     }
-    | IDENTIFIER ASSIGN char_expression_result SEMICOLON { // For char assignments
-        Symbol *sym = find_symbol($1);
-        if (sym) {
-            if (sym->type == INT_TYPE) { // Implicit char to int conversion
-                sym->value.ival = (int)$3;
-                printf("- %s = %d\n", sym->name, sym->value.ival);
-            } else if (sym->type == FLOAT_TYPE) { // Implicit char to float conversion
-                sym->value.fval = (float)$3;
-                printf("- %s = %.2f\n", sym->name, sym->value.fval);
-            } else if (sym->type == CHAR_TYPE) {
-                sym->value.cval = $3;
-                printf("- %s = '%c'\n", sym->name, sym->value.cval);
-            } else {
-                fprintf(stderr, "Error: Variable '%s' has an unknown type for assignment at line %d\n", sym->name, yylineno);
-            }
-        } else {
-            fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno);
-        }
-        free($1);
+    | SUB expression %prec UNARY {
+        $$ = $2.type == FLOAT_TYPE ? float_value(-$2.fval) : int_value(-$2.ival);
     }
+    | expression ADD expression      { if (!arithmetic('+', $1, $3, &$$)) YYERROR; }
+    | expression SUB expression      { if (!arithmetic('-', $1, $3, &$$)) YYERROR; }
+    | expression ASTERISK expression { if (!arithmetic('*', $1, $3, &$$)) YYERROR; }
+    | expression DIV expression      { if (!arithmetic('/', $1, $3, &$$)) YYERROR; }
+    | expression MOD expression      { if (!arithmetic('%', $1, $3, &$$)) YYERROR; }
     ;
 
-expression_statement:
-    // For now, any expression followed by a semicolon is an expression statement.
-    // We will ignore its value.
-    expression_result
-    | int_expression_result
-    | float_expression_result
-    | char_expression_result
-    ;
-
-expression_result: // A generic expression result (needed for expression_statement to consume)
-    int_expression_result       { }
-    | float_expression_result   { }
-    | char_expression_result    { }
-    ;
+%%
 
-// Generic C statements that we parse and ignore for simulation purposes
-labeled_statement:
-    IDENTIFIER ':' statement // for goto labels
-    ;
+void yyerror(const char *s) {
+    report_error("parser", "%s", s);
+}
 
-selection_statement:
-    IF_KEYWORD LPAREN expression_result RPAREN statement
-    | IF_KEYWORD LPAREN expression_result RPAREN statement ELSE_KEYWORD statement
-    | SWITCH_KEYWORD LPAREN expression_result RPAREN compound_statement // Assuming SWITCH_KEYWORD token exists
-    ;
+// The symbol table could not allocate; the parse was abandoned
+static void report_out_of_memory(void) {
+    fprintf(fb_err, "Error: Out of memory in symbol table\n");
+}
 
-iteration_statement:
-    WHILE_KEYWORD LPAREN expression_result RPAREN statement
-    | DO_KEYWORD statement WHILE_KEYWORD LPAREN expression_result RPAREN SEMICOLON // Assuming DO_KEYWORD token exists
-    | FOR_KEYWORD LPAREN expression_result SEMICOLON expression_result SEMICOLON expression_result RPAREN statement
-    ;
+// Handle one serve-mode or library request: start from an empty symbol table and parse the buffer.
+// The table is freed first, so a long-lived process does not keep the names of earlier requests.
+static void analyze_buffer(const char *input, int length) {
+    symtab_reset();
+    current_type = UNKNOWN_TYPE;
+    yylineno = 1;
+    if (!scope_push()) { // File scope
+        report_out_of_memory();
+        return;
+    }
 
-jump_statement:
-    GOTO_KEYWORD IDENTIFIER SEMICOLON // Assuming GOTO_KEYWORD token exists
-    | CONTINUE_KEYWORD SEMICOLON // Assuming CONTINUE_KEYWORD token exists
-    | BREAK_KEYWORD SEMICOLON // Assuming BREAK_KEYWORD token exists
-    | RETURN_KEYWORD expression_result SEMICOLON
-    | RETURN_KEYWORD SEMICOLON
-    ;
+    fb_scan_begin(input, length);
+    yyparse();
+    fb_scan_end();
+    if (symtab_out_of_memory) report_out_of_memory();
+}
 
-// --- Constant expression for initializer
-constant_expression:
-    INT_LITERAL             { $$ = (char*)malloc(sizeof(char) * 20); sprintf($$, "%d", $1); }
-    | FLOAT_LITERAL           { $$ = (char*)malloc(sizeof(char) * 20); sprintf($$, "%.2f", $1); }
-    | CHAR_LITERAL            { $$ = (char*)malloc(sizeof(char) * 2); sprintf($$, "%c", $1); }
-    | STRING_LITERAL        { $$ = strdup($1); }
-    | IDENTIFIER            { $$ = strdup($1); } // If a const identifier is used as an initializer
+// In-process entry point when built as a shared library (see fb_serve.h)
+FB_DEFINE_LIBRARY_ENTRY(analyze_buffer)
 
-// --- Expression Evaluation ---
-// These rules handle type promotion and evaluation.
-// Operator precedence is defined by %left/%right directives.
+int main(int argc, char **argv) {
+    fb_out = stdout;
+    fb_err = stderr;
 
-int_expression_result:
-    INT_LITERAL             { $$ = $1; }
-    | CHAR_LITERAL          { $$ = (int)$1; }
-    | LPAREN int_expression_result RPAREN { $$ = $2; }
-    | IDENTIFIER            {
-        Symbol *sym = find_symbol($1);
-        if (sym) {
-            if (sym->type == INT_TYPE) { $$ = sym->value.ival; }
-            else if (sym->type == FLOAT_TYPE) { $$ = (int)sym->value.fval; } // Implicit conversion
-            else if (sym->type == CHAR_TYPE) { $$ = (int)sym->value.cval; } // Implicit conversion
-            else { fprintf(stderr, "Error: Variable '%s' has unknown type at line %d\n", $1, yylineno); YYABORT; }
-        } else { fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno); YYABORT; }
-        free($1);
-    }
-    | int_expression_result ADD int_expression_result { $$ = $1 + $3; }
-    | int_expression_result SUB int_expression_result { $$ = $1 - $3; }
-    | int_expression_result MUL int_expression_result { $$ = $1 * $3; }
-    | int_expression_result DIV int_expression_result {
-        if ($3 == 0) { fprintf(stderr, "Error: Integer division by zero at line %d\n", yylineno); YYABORT; }
-        $$ = $1 / $3;
-    }
-    | int_expression_result MOD int_expression_result {
-        if ($3 == 0) { fprintf(stderr, "Error: Integer modulo by zero at line %d\n", yylineno); YYABORT; }
-        $$ = $1 % $3;
+    if (fb_is_serve_mode(argc, argv)) {
+        return fb_serve(analyze_buffer);
     }
-    | float_expression_result { $$ = (int)$1; } // Convert float result to int
-    ;
 
-float_expression_result:
-    FLOAT_LITERAL           { $$ = $1; }
-    | INT_LITERAL           { $$ = (float)$1; } // Promote int to float
-    | CHAR_LITERAL          { $$ = (float)$1; }
-    | LPAREN float_expression_result RPAREN { $$ = $2; }
-    | IDENTIFIER            {
-        Symbol *sym = find_symbol($1);
-        if (sym) {
-            if (sym->type == INT_TYPE) { $$ = (float)sym->value.ival; }
-            else if (sym->type == FLOAT_TYPE) { $$ = sym->value.fval; }
-            else if (sym->type == CHAR_TYPE) { $$ = (float)sym->value.cval; }
-            else { fprintf(stderr, "Error: Variable '%s' has unknown type at line %d\n", $1, yylineno); YYABORT; }
-        } else { fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno); YYABORT; }
-        free($1);
+    yyin = stdin;
+    if (!scope_push()) { // File scope
+        report_out_of_memory();
+        return 1;
     }
-    | float_expression_result ADD float_expression_result { $$ = $1 + $3; }
-    | float_expression_result SUB float_expression_result { $$ = $1 - $3; }
-    | float_expression_result MUL float_expression_result { $$ = $1 * $3; }
-    | float_expression_result DIV float_expression_result {
-        if ($3 == 0.0f) { fprintf(stderr, "Error: Float division by zero at line %d\n", yylineno); YYABORT; }
-        $$ = $1 / $3;
+    yyparse();
+    if (symtab_out_of_memory) {
+        report_out_of_memory();
+        return 1;
     }
-    | int_expression_result { $$ = (float)$1; } // Convert int result to float
-    ;
-
-char_expression_result:
-    CHAR_LITERAL            { $$ = $1; }
-    | INT_LITERAL           { $$ = (char)$1; } // Convert int to char
-    | LPAREN char_expression_result RPAREN { $$ = $2; }
-    | IDENTIFIER            {
-        Symbol *sym = find_symbol($1);
-        if (sym) {
-            if (sym->type == CHAR_TYPE) { $$ = sym->value.cval; }
-            else if (sym->type == INT_TYPE) { $$ = (char)sym->value.ival; }
-            else if (sym->type == FLOAT_TYPE) { $$ = (char)sym->value.fval; }
-            else { fprintf(stderr, "Error: Variable '%s' has unknown type at line %d\n", $1, yylineno); YYABORT; }
-        } else { fprintf(stderr, "Error: Undeclared variable '%s' at line %d\n", $1, yylineno); YYABORT; }
-        free($1);
-    }
-    | char_expression_result ADD char_expression_result { $$ = $1 + $3; } // Char arithmetic is int arithmetic
-    | char_expression_result SUB char_expression_result { $$ = $1 - $3; }
-    | char_expression_result MUL char_expression_result { $$ = $1 * $3; }
-    | char_expression_result DIV char_expression_result {
-        if ($3 == 0) { fprintf(stderr, "Error: Char division by zero (int conversion) at line %d\n", yylineno); YYABORT; }
-        $$ = $1 / $3;
-    }
-    | int_expression_result { $$ = (char)$1; } // Convert int result to char
-    ;
-
-%%
-
-int main() {
-    // This main is usually not used when integrated with Python.
-    // Python will call yylex/yyparse directly.
     return 0;
 }
@@ -0,0 +1,221 @@
+/*
+ * symbol_table.h - scoped symbol table for the semantic action simulator.
+ *
+ * Identifier names are interned once, so every later comparison is a
+ * pointer comparison. Each scope owns an open-addressing hash table (linear
+ * probing, power-of-two capacity, grown at 70% load) keyed by the interned
+ * name, and scopes form a stack: lookups walk from the innermost scope
+ * outwards, declarations always go into the innermost one. There is no
+ * fixed limit on the number of symbols; declaring and looking up n names
+ * takes O(n) expected time overall.
+ *
+ * Symbol pointers stay valid until the next declaration in the same scope
+ * (a resize moves the entries) or until that scope is popped.
+ *
+ * The table is process-wide. symtab_reset() frees every scope and interned
+ * name, so a long-running process (serve or library mode) resets it before
+ * each input instead of keeping every name it has ever seen. Allocation
+ * failures never exit the process: the failing call returns NULL (or 0) and
+ * sets symtab_out_of_memory, which the caller reports; symtab_reset()
+ * clears it.
+ */
+#ifndef SYMBOL_TABLE_H
+#define SYMBOL_TABLE_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+
+typedef enum { INT_TYPE, FLOAT_TYPE, CHAR_TYPE, UNKNOWN_TYPE } SymbolType;
+
+// Structure to hold variable information in the symbol table
+typedef struct {
+    const char *name; // Interned; NULL marks an empty slot
+    SymbolType type;
+    union {
+        int ival;
+        float fval;
+        char cval;
+    } value;
+} Symbol;
+
+typedef struct Scope {
+    Symbol *slots;
+    size_t capacity; // Always a power of two
+    size_t count;
+    struct Scope *parent;
+} Scope;
+
+#define SYMTAB_INITIAL_CAPACITY 16
+
+// --- Name interning ---
+// An open-addressing set of strings; each distinct name is stored once.
+
+static char **symtab_names = NULL;
+static size_t symtab_names_capacity = 0;
+static size_t symtab_names_count = 0;
+
+// Set when an allocation failed
+static int symtab_out_of_memory = 0;
+
+static size_t symtab_hash_string(const char *s) {
+    // FNV-1a
+    uint64_t h = 1469598103934665603ULL;
+    for (; *s; s++) {
+        h ^= (unsigned char)*s;
+        h *= 1099511628211ULL;
+    }
+    return (size_t)h;
+}
+
+static size_t symtab_hash_pointer(const void *p) {
+    // Fibonacci hashing; the low bits of heap pointers are mostly zero
+    uint64_t h = (uint64_t)(uintptr_t)p * 11400714819323198485ULL;
+    return (size_t)((h >> 32) ^ h);
+}
+
+static void *symtab_calloc(size_t n, size_t size) {
+    void *p = calloc(n, size);
+    if (!p) symtab_out_of_memory = 1;
+    return p;
+}
+
+static int symtab_names_grow(void) {
+    size_t capacity = symtab_names_capacity ? symtab_names_capacity * 2 : 256;
+    char **names = (char **)symtab_calloc(capacity, sizeof(char *));
+    if (!names) return 0;
+    for (size_t i = 0; i < symtab_names_capacity; i++) {
+        if (symtab_names[i]) {
+            size_t j = symtab_hash_string(symtab_names[i]) & (capacity - 1);
+            while (names[j]) j = (j + 1) & (capacity - 1);
+            names[j] = symtab_names[i];
+        }
+    }
+    free(symtab_names);
+    symtab_names = names;
+    symtab_names_capacity = capacity;
+    return 1;
+}
+
+// Returns the interned copy of `name`, or NULL if it was never interned
+static const char *intern_lookup(const char *name) {
+    if (!symtab_names_capacity) return NULL;
+    size_t mask = symtab_names_capacity - 1;
+    for (size_t i = symtab_hash_string(name) & mask; symtab_names[i]; i = (i + 1) & mask) {
+        if (strcmp(symtab_names[i], name) == 0) return symtab_names[i];
+    }
+    return NULL;
+}
+
+// Returns the interned copy of `name`, or NULL if memory ran out
+static const char *intern(const char *name) {
+    const char *existing = intern_lookup(name);
+    if (existing) return existing;
+    if ((symtab_names_count + 1) * 10 > symtab_names_capacity * 7 && !symtab_names_grow()) return NULL;
+    char *copy = strdup(name);
+    if (!copy) {
+        symtab_out_of_memory = 1;
+        return NULL;
+    }
+    size_t mask = symtab_names_capacity - 1;
+    size_t i = symtab_hash_string(name) & mask;
+    while (symtab_names[i]) i = (i + 1) & mask;
+    symtab_names[i] = copy;
+    symtab_names_count++;
+    return copy;
+}
+
+// --- Scopes ---
+
+static Scope *current_scope = NULL;
+
+// Opens a new innermost scope; returns 0 if memory ran out
+static int scope_push(void) {
+    Scope *scope = (Scope *)symtab_calloc(1, sizeof(Scope));
+    if (!scope) return 0;
+    scope->capacity = SYMTAB_INITIAL_CAPACITY;
+    scope->slots = (Symbol *)symtab_calloc(scope->capacity, sizeof(Symbol));
+    if (!scope->slots) {
+        free(scope);
+        return 0;
+    }
+    scope->parent = current_scope;
+    current_scope = scope;
+    return 1;
+}
+
+static void scope_pop(void) {
+    Scope *scope = current_scope;
+    if (!scope) return;
+    current_scope = scope->parent;
+    free(scope->slots);
+    free(scope);
+}
+
+// Finds the slot for `name` in one scope: the symbol itself, or the empty slot where it would go
+static Symbol *scope_slot(Scope *scope, const char *name) {
+    size_t mask = scope->capacity - 1;
+    size_t i = symtab_hash_pointer(name) & mask;
+    while (scope->slots[i].name && scope->slots[i].name != name) i = (i + 1) & mask;
+    return &scope->slots[i];
+}
+
+static int scope_grow(Scope *scope) {
+    Symbol *slots = (Symbol *)symtab_calloc(scope->capacity * 2, sizeof(Symbol));
+    if (!slots) return 0;
+    Symbol *old_slots = scope->slots;
+    size_t old_capacity = scope->capacity;
+    scope->slots = slots;
+    scope->capacity *= 2;
+    for (size_t i = 0; i < old_capacity; i++) {
+        if (old_slots[i].name) *scope_slot(scope, old_slots[i].name) = old_slots[i];
+    }
+    free(old_slots);
+    return 1;
+}
+
+// Looks `name` up from the innermost scope outwards
+static Symbol *find_symbol(const char *name) {
+    const char *key = intern_lookup(name);
+    if (!key) return NULL;
+    for (Scope *scope = current_scope; scope; scope = scope->parent) {
+        Symbol *sym = scope_slot(scope, key);
+        if (sym->name) return sym;
+    }
+    return NULL;
+}
+
+// Declares `name` in the innermost scope; redeclaring it there updates the type.
+// Returns NULL if memory ran out.
+static Symbol *add_symbol(const char *name, SymbolType type) {
+    if (!current_scope && !scope_push()) return NULL;
+    Scope *scope = current_scope;
+    const char *key = intern(name);
+    if (!key) return NULL;
+    Symbol *sym = scope_slot(scope, key);
+    if (!sym->name) {
+        if ((scope->count + 1) * 10 > scope->capacity * 7) {
+            if (!scope_grow(scope)) return NULL;
+            sym = scope_slot(scope, key);
+        }
+        sym->name = key;
+        sym->value.ival = 0;
+        scope->count++;
+    }
+    sym->type = type;
+    return sym;
+}
+
+// Frees every scope and interned name and clears symtab_out_of_memory
+static void symtab_reset(void) {
+    while (current_scope) scope_pop();
+    for (size_t i = 0; i < symtab_names_capacity; i++) free(symtab_names[i]);
+    free(symtab_names);
+    symtab_names = NULL;
+    symtab_names_capacity = 0;
+    symtab_names_count = 0;
+    symtab_out_of_memory = 0;
+}
+
+#endif // SYMBOL_TABLE_H
@@ -5,10 +5,17 @@
 #include <vector>
 #include <map>
 #include <stdio.h>
+#include "../fb_serve.h"
+#include "../fb_records.h"
 
 extern int yylex();
 extern FILE* yyin;
 void yyerror(const char *s);
+void fb_scan_begin(const char *input, int length);
+void fb_scan_end(void);
+
+FILE *fb_out;
+FILE *fb_err;
 
 // Global data structures to hold extracted info
 std::map<std::string, std::string> variables;
@@ -67,25 +74,48 @@ void yyerror(const char *s) {
     /* Suppress errors */
 }
 
-int main(void) {
-    yyin = stdin;
-    yyparse();
-    
-    // Print JSON output
-    printf("{\n");
-    printf("  \"variables\": {\n");
+// One "variable" record per declared string, then one "print" record per printf argument (see fb_records.h)
+static void print_records(void) {
     for (auto it = variables.begin(); it != variables.end(); ++it) {
-        printf("    \"%s\": \"%s\"%s\n", it->first.c_str(), it->second.c_str(),
-               std::next(it) == variables.end() ? "" : ",");
+        fb_record_begin(fb_out, "variable");
+        fb_record_strn(fb_out, "name", it->first.data(), it->first.size());
+        fb_record_strn(fb_out, "value", it->second.data(), it->second.size());
+        fb_record_end(fb_out);
     }
-    printf("  },\n");
-    printf("  \"print_order\": [\n");
     for (auto it = print_order.begin(); it != print_order.end(); ++it) {
-        printf("    \"%s\"%s\n", it->c_str(),
-               std::next(it) == print_order.end() ? "" : ",");
+        fb_record_begin(fb_out, "print");
+        fb_record_strn(fb_out, "name", it->data(), it->size());
+        fb_record_end(fb_out);
     }
-    printf("  ]\n");
-    printf("}\n");
+}
+
+// Handle one serve-mode request: reset state, parse the buffer, print the records
+static void analyze_buffer(const char *input, int length) {
+    variables.clear();
+    print_order.clear();
+
+    fb_scan_begin(input, length);
+    yyparse();
+    fb_scan_end();
+
+    print_records();
+}
+
+// In-process entry point when built as a shared library (see fb_serve.h)
+FB_DEFINE_LIBRARY_ENTRY(analyze_buffer)
+
+int main(int argc, char **argv) {
+    fb_out = stdout;
+    fb_err = stderr;
+
+    if (fb_is_serve_mode(argc, argv)) {
+        return fb_serve(analyze_buffer);
+    }
+
+    yyin = stdin;
+    yyparse();
+    
+    print_records();
     
     return 0;
-}
\ No newline at end of file
+}
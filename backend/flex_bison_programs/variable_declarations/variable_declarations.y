@@ -2,26 +2,52 @@
 #include <stdio.h>
 #include <stdlib.h> // For free
 #include <string.h> // For strdup
+#include "../fb_serve.h"
+#include "../fb_records.h" // Results are written as JSON Lines records
 
 extern int yylex();
 extern int yyerror(const char *s);
 extern FILE *yyin;
 extern int yylineno; // Line number from Flex
+void fb_scan_begin(const char *input, int length);
+void fb_scan_end(void);
 
-
+FILE *fb_out;
+FILE *fb_err;
 
 char *current_type_specifier = NULL; // To hold the type across multiple declarators
 
+// Writes an "error" record; `kind` is "parser" or NULL for recovery notices
+static void report_error(const char *kind, const char *message) {
+    fb_record_begin(fb_out, "error");
+    if (kind) fb_record_str(fb_out, "kind", kind);
+    fb_record_str(fb_out, "message", message);
+    fb_record_int(fb_out, "line", yylineno);
+    fb_record_end(fb_out);
+}
+
+// Writes a "declare" record for one declarator
+static void declare(const char *name) {
+    fb_record_begin(fb_out, "declare");
+    fb_record_str(fb_out, "specifiers", current_type_specifier ? current_type_specifier : "UnknownType");
+    fb_record_str(fb_out, "name", name);
+    fb_record_end(fb_out);
+}
+
 %}
 
 %define parse.error verbose
 
+%union {
+    char *str_val;
+}
+
 %token <str_val> IDENTIFIER TYPE_SPECIFIER
 %token SEMICOLON COMMA ASSIGN NUMBER ASTERISK
 
 // Reserved C keywords that are not directly types or part of variable names
 %token AUTO BREAK CASE CONST CONTINUE DEFAULT DO ELSE ENUM EXTERN FOR GOTO IF INLINE REGISTER RESTRICT RETURN SIZEOF STATIC STRUCT SWITCH TYPEDEF UNION VOLATILE WHILE
-%token TYPE_CHAR TYPE_DOUBLE TYPE_FLOAT TYPE_INT TYPE_LONG TYPE_SHORT TYPE_VOID SIGNED UNSIGNED
+%token TYPE_CHAR TYPE_DOUBLE TYPE_FLOAT TYPE_INT TYPE_LONG TYPE_SHORT TYPE_VOID SIGNED UNSIGNED LONG SHORT
 
 %type <str_val> type_qualifier type_specifier declaration_specifiers
 %type <str_val> declarator direct_declarator
@@ -44,8 +70,8 @@ declaration_statement:
             current_type_specifier = NULL;
         }
     }
-    | error SEMICOLON { yyclearin; yyerrok; fprintf(stderr, "Error: Invalid declaration statement skipped at line %d.\n", yylineno); }
-    | error { yyclearin; yyerrok; fprintf(stderr, "Error: Invalid input, recovering at line %d.\n", yylineno); }
+    | error SEMICOLON { yyclearin; yyerrok; report_error(NULL, "Invalid declaration statement skipped"); }
+    | error { yyclearin; yyerrok; report_error(NULL, "Invalid input, recovering"); }
     ;
 
 declaration_specifiers:
@@ -107,19 +133,11 @@ declarator:
 
 direct_declarator:
     IDENTIFIER {
-        if (current_type_specifier) {
-            printf("- Declare %s %s\n", current_type_specifier, $1);
-        } else {
-            printf("- Declare UnknownType %s\n", $1);
-        }
+        declare($1);
         $$ = $1; // Pass the identifier string up
     }
     | IDENTIFIER ASSIGN /* IGNORE VALUE */ {
-        if (current_type_specifier) {
-            printf("- Declare %s %s\n", current_type_specifier, $1);
-        } else {
-            printf("- Declare UnknownType %s\n", $1);
-        }
+        declare($1);
         $$ = $1; // Pass the identifier string up
         // We explicitly ignore everything after ASSIGN until the next COMMA or SEMICOLON
         // The lexer handles skipping numbers, and parser rules would skip other parts.
@@ -133,14 +151,35 @@ direct_declarator:
 %%
 
 int yyerror(const char *s) {
-    fprintf(stderr, "Error: %s at line %d\n", s, yylineno);
+    report_error("parser", s);
     return 0;
 }
 
-int main() {
-    // This main is for testing purposes if compiled directly.
-    // In our setup, yylex and yyparse will be called by the Python wrapper.
-    // For now, an empty main or omitted main is fine as long as yylex/yyparse are accessible.
-    // The Python utility will manage the input stream (yyin) and call yyparse.
+// Handle one serve-mode request: reset state and parse the buffer
+static void analyze_buffer(const char *input, int length) {
+    if (current_type_specifier) {
+        free(current_type_specifier);
+        current_type_specifier = NULL;
+    }
+    yylineno = 1;
+
+    fb_scan_begin(input, length);
+    yyparse();
+    fb_scan_end();
+}
+
+// In-process entry point when built as a shared library (see fb_serve.h)
+FB_DEFINE_LIBRARY_ENTRY(analyze_buffer)
+
+int main(int argc, char **argv) {
+    fb_out = stdout;
+    fb_err = stderr;
+
+    if (fb_is_serve_mode(argc, argv)) {
+        return fb_serve(analyze_buffer);
+    }
+
+    yyin = stdin;
+    yyparse();
     return 0;
 }
@@ -1,58 +1,174 @@
 import subprocess
 import os
+import re
+import asyncio
+import time
+import atexit
+import shutil
+import hashlib
+import weakref
+import tempfile
+import threading
+import queue
+import codecs
+import ctypes
+import sys
+import logging
+
+from backend.metrics import timed_phase, count_compile_failure, count_timeout
+from backend.result_cache import mark_uncacheable
+
+logger = logging.getLogger(__name__)
 
 FLEX_BIN = 'flex'
 BISON_BIN = 'bison'
 GPP_BIN = 'g++'
+GCC_BIN = 'gcc'
 
-def compile_flex_bison(name, flex_file, bison_file, output_dir="."):
+GPP_FLAGS = ['-mconsole'] if os.name == 'nt' else [] # Windows needs a console subsystem binary
+GCC_FLAGS = []
+
+# --- Build cache settings ---
+# Compiled analyzers are stored under a key derived from their sources, the
+# compiler flags and the toolchain binaries, so restarts and other worker
+# processes reuse them instead of running bison/flex/g++ again.
+BUILD_CACHE_ENABLED = os.environ.get('FLEX_BISON_BUILD_CACHE', '1') != '0'
+BUILD_CACHE_DIR = os.environ.get(
+    'FLEX_BISON_BUILD_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.build_cache')
+)
+
+# Upper bound on child processes started concurrently by the async helpers
+ASYNC_MAX_CONCURRENT_PROCESSES = int(os.environ.get('ASYNC_MAX_CONCURRENT_PROCESSES', '256'))
+
+# --- Worker pool settings (see fb_serve.h for the wire protocol) ---
+# A pool size of 0 keeps the original spawn-per-request behaviour.
+WORKER_POOL_SIZE = int(os.environ.get('FLEX_BISON_POOL_SIZE', '0'))
+WORKER_MAX_REQUESTS = int(os.environ.get('FLEX_BISON_POOL_MAX_REQUESTS', '500'))
+WORKER_HEALTH_CHECK_INTERVAL = 30.0 # Seconds a worker may sit idle before it is pinged
+WORKER_STARTUP_TIMEOUT = 2.0
+WORKER_REQUEST_TIMEOUT = 15.0
+WORKER_SERVE_FLAG = '--serve'
+WORKER_SERVE_BANNER = b'FBSERVE 1\n'
+
+# --- Shared-library mode (see FB_DEFINE_LIBRARY_ENTRY in fb_serve.h) ---
+# Grammars that export fb_analyze are also built as shared libraries and
+# called in-process through ctypes, skipping process startup entirely. A
+# crash inside a grammar would take the server down with it, so this is
+# opt-in; anything that cannot be loaded falls back to the executable.
+LIBRARY_MODE_ENABLED = os.environ.get('FLEX_BISON_LIBRARY_MODE', '0') == '1'
+LIBRARY_FLAGS = ['-shared', '-fPIC', '-DFB_SHARED_LIBRARY']
+
+_LOCAL_INCLUDE_PATTERN = re.compile(rb'#include\s+"([^"]+)"')
+
+
+def _executable_name(name):
+    return f"{name}.exe" if os.name == 'nt' else name
+
+
+def _library_name(name):
+    if os.name == 'nt':
+        return f"{name}.dll"
+    return f"lib{name}.dylib" if sys.platform == 'darwin' else f"lib{name}.so"
+
+
+def _toolchain_fingerprint(binaries):
+    # Identify each tool by its resolved path, size and mtime; cheaper than running --version.
+    parts = []
+    for binary in binaries:
+        path = shutil.which(binary)
+        if path is None:
+            parts.append(f"{binary}:missing")
+        else:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def build_cache_key(source_files, flags, binaries):
     """
-    Compiles a Flex (.l) and Bison (.y) file pair into an executable.
-    
+    Computes the content-addressed cache key for a build.
+
+    Local headers pulled in with #include "..." (such as fb_serve.h) are
+    hashed along with the sources, so editing them also invalidates the key.
+
     Args:
-        name (str): The base name for the generated files (e.g., 'calculator').
-        flex_file (str): Path to the .l file.
-        bison_file (str): Path to the .y file.
-        output_dir (str): Directory to place generated files and executable.
-        
+        source_files (list): Paths of the .l/.y/.c sources.
+        flags (list): Compiler flags used for the build.
+        binaries (list): Names of the toolchain executables involved.
+
     Returns:
-        tuple: (bool, str) - True if successful, False otherwise, and a message.
+        str: A hex SHA-256 digest.
     """
-    
-    if not os.path.isabs(output_dir):
-        output_dir = os.path.abspath(output_dir)
-        
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    digest = hashlib.sha256()
+    seen = set()
+    pending = [os.path.abspath(path) for path in source_files]
+    while pending:
+        path = pending.pop(0)
+        if path in seen or not os.path.isfile(path):
+            continue
+        seen.add(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(os.path.basename(path).encode('utf-8') + b'\0' + content + b'\0')
+        for include in _LOCAL_INCLUDE_PATTERN.findall(content):
+            pending.append(os.path.normpath(os.path.join(os.path.dirname(path), include.decode('utf-8'))))
+    digest.update(" ".join(flags).encode('utf-8') + b'\0')
+    digest.update(_toolchain_fingerprint(binaries).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _cached_build(name, key, build, artifact_name=None):
+    """
+    Returns the cached executable for `key`, building and publishing it on a miss.
+
+    `build(build_dir)` must compile into `build_dir` and return (bool, str)
+    like compile_flex_bison. The finished directory is published with a single
+    rename, so concurrent builders never observe a half-written entry.
+    `artifact_name` is the file the build produces (the executable by default).
+    """
+    entry_dir = os.path.join(BUILD_CACHE_DIR, f"{name}-{key[:24]}")
+    executable_path = os.path.join(entry_dir, artifact_name or _executable_name(name))
+    if os.path.isfile(executable_path):
+        logger.debug("Build cache hit for %s: %s", name, executable_path)
+        return True, executable_path
+
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=BUILD_CACHE_DIR)
+    try:
+        success, message = build(build_dir)
+        if not success:
+            return False, message
+        try:
+            os.rename(build_dir, entry_dir)
+        except OSError:
+            # Another process published the same key first; its artifact is identical.
+            if not os.path.isfile(executable_path):
+                return False, f"Could not publish build of {name} to {entry_dir}."
+        return True, executable_path
+    finally:
+        if os.path.isdir(build_dir):
+            shutil.rmtree(build_dir, ignore_errors=True)
 
-    # Change to output directory for compilation
-    original_cwd = os.getcwd()
-    os.chdir(output_dir)
 
+def _build_flex_bison(name, flex_file, bison_file, build_dir, output_name=None, extra_flags=()):
+    source_dir = os.path.dirname(bison_file)
+    output_name = output_name or name
     try:
         # 1. Compile Bison file
         bison_command = [BISON_BIN, "-d", bison_file]
-        # Make bison_file an absolute path if it's not already
-        if not os.path.isabs(bison_file):
-            bison_file = os.path.join(original_cwd, bison_file)
-        
-        print(f"DEBUG: Running bison command: {' '.join(bison_command)}") # DIAGNOSTIC PRINT
-        print(f"DEBUG: Current working directory: {os.getcwd()}") # DIAGNOSTIC PRINT
+        logger.debug("Running bison command: %s", ' '.join(bison_command))
+        logger.debug("Build directory: %s", build_dir)
 
-        proc = subprocess.run(bison_command, capture_output=True, check=False) # REMOVED text=True
+        proc = subprocess.run(bison_command, capture_output=True, check=False, cwd=build_dir) # REMOVED text=True
         if proc.returncode != 0:
             return False, f"Bison compilation failed for {bison_file}:\n{proc.stderr.decode('utf-8')}" # DECODE manually
-        
+
         # 2. Compile Flex file
         flex_command = [FLEX_BIN, flex_file]
-        # Make flex_file an absolute path if it's not already
-        if not os.path.isabs(flex_file):
-            flex_file = os.path.join(original_cwd, flex_file)
-            
-        print(f"DEBUG: Running flex command: {' '.join(flex_command)}") # DIAGNOSTIC PRINT
-        print(f"DEBUG: Current working directory: {os.getcwd()}") # DIAGNOSTIC PRINT
-            
-        proc = subprocess.run(flex_command, capture_output=True, check=False) # REMOVED text=True
+        logger.debug("Running flex command: %s", ' '.join(flex_command))
+
+        proc = subprocess.run(flex_command, capture_output=True, check=False, cwd=build_dir) # REMOVED text=True
         if proc.returncode != 0:
             return False, f"Flex compilation failed for {flex_file}:\n{proc.stderr.decode('utf-8')}" # DECODE manually
 
@@ -60,52 +176,717 @@ def compile_flex_bison(name, flex_file, bison_file, output_dir="."):
         # The .y file generates name.tab.c and name.tab.h
         # The .l file generates lex.yy.c
         # Ensure name.tab.c and lex.yy.c are linked
+        # -I lets relative includes such as "../fb_serve.h" resolve against the source directory
         c_files = [f"{name}.tab.c", "lex.yy.c"]
-        output_exec = name
-        
-        gpp_command = [GPP_BIN] + c_files + ["-o", output_exec]
-        if os.name == 'nt': # Check if running on Windows
-            gpp_command.append('-mconsole')
-        
-        print(f"DEBUG: Running g++ command: {' '.join(gpp_command)}") # DIAGNOSTIC PRINT
-        print(f"DEBUG: Current working directory: {os.getcwd()}") # DIAGNOSTIC PRINT
+        gpp_command = [GPP_BIN] + c_files + ["-I", source_dir, "-o", output_name] + GPP_FLAGS + list(extra_flags)
+
+        logger.debug("Running g++ command: %s", ' '.join(gpp_command))
 
-        proc = subprocess.run(gpp_command, capture_output=True, text=True, check=False)
+        proc = subprocess.run(gpp_command, capture_output=True, text=True, check=False, cwd=build_dir)
         if proc.returncode != 0:
             return False, f"GCC compilation failed for {name}:\n{proc.stderr}"
 
-        return True, os.path.join(output_dir, output_exec) # Return the absolute path to the executable
+        return True, os.path.join(build_dir, output_name) # Return the absolute path to the executable
 
     except FileNotFoundError as e:
         return False, f"Compiler not found: {e.filename}. Make sure Flex, Bison, and GCC are installed and in PATH."
     except Exception as e:
         return False, f"An unexpected error occurred during compilation: {str(e)}"
-    finally:
-        os.chdir(original_cwd) # Revert to original directory
+
+
+def compile_flex_bison(name, flex_file, bison_file, output_dir="."):
+    """
+    Compiles a Flex (.l) and Bison (.y) file pair into an executable.
+
+    With the build cache enabled the executable is looked up by a hash of the
+    sources, flags and toolchain, and the toolchain only runs on a miss.
+    Otherwise the generated files and executable are written to output_dir.
+    
+    Args:
+        name (str): The base name for the generated files (e.g., 'calculator').
+        flex_file (str): Path to the .l file.
+        bison_file (str): Path to the .y file.
+        output_dir (str): Directory to place generated files and executable
+            when the build cache is disabled.
+        
+    Returns:
+        tuple: (bool, str) - True if successful, False otherwise, and a message.
+    """
+    flex_file = os.path.abspath(flex_file)
+    bison_file = os.path.abspath(bison_file)
+
+    if not BUILD_CACHE_ENABLED:
+        output_dir = os.path.abspath(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        result = _build_flex_bison(name, flex_file, bison_file, output_dir)
+    else:
+        try:
+            key = build_cache_key([flex_file, bison_file], GPP_FLAGS, [BISON_BIN, FLEX_BIN, GPP_BIN])
+            result = _cached_build(name, key, lambda build_dir: _build_flex_bison(name, flex_file, bison_file, build_dir))
+        except OSError as e:
+            result = (False, f"An unexpected error occurred during compilation: {str(e)}")
+
+    if result[0]:
+        if LIBRARY_MODE_ENABLED:
+            _register_flex_bison_library(result[1], name, flex_file, bison_file, output_dir)
+    else:
+        count_compile_failure(name)
+    return result
+
+
+def compile_flex_bison_library(name, flex_file, bison_file, output_dir="."):
+    """
+    Compiles a Flex (.l) and Bison (.y) file pair into a shared library.
+
+    The grammar must export fb_analyze through FB_DEFINE_LIBRARY_ENTRY (see
+    fb_serve.h) to be callable in-process; the build itself does not check.
+
+    Args:
+        name (str): The base name for the generated files (e.g., 'calculator').
+        flex_file (str): Path to the .l file.
+        bison_file (str): Path to the .y file.
+        output_dir (str): Directory to place generated files and the library
+            when the build cache is disabled.
+
+    Returns:
+        tuple: (bool, str) - True if successful, False otherwise, and the library path or an error message.
+    """
+    flex_file = os.path.abspath(flex_file)
+    bison_file = os.path.abspath(bison_file)
+    library_name = _library_name(name)
+
+    def build(build_dir):
+        return _build_flex_bison(name, flex_file, bison_file, build_dir, library_name, LIBRARY_FLAGS)
+
+    if not BUILD_CACHE_ENABLED:
+        output_dir = os.path.abspath(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        return build(output_dir)
+
+    try:
+        key = build_cache_key([flex_file, bison_file], GPP_FLAGS + LIBRARY_FLAGS, [BISON_BIN, FLEX_BIN, GPP_BIN])
+        return _cached_build(f"{name}-lib", key, build, library_name)
+    except OSError as e:
+        return False, f"An unexpected error occurred during compilation: {str(e)}"
+
+
+def _build_c_program(name, c_file, build_dir):
+    executable_path = os.path.join(build_dir, _executable_name(name))
+    compile_command = [GCC_BIN, c_file, "-o", executable_path] + GCC_FLAGS
+    try:
+        proc = subprocess.run(compile_command, capture_output=True, text=True, check=False, timeout=10)
+    except subprocess.TimeoutExpired:
+        return False, f"Compilation of {name} timed out."
+    except FileNotFoundError:
+        return False, "GCC compiler not found. Please install GCC."
+    if proc.returncode != 0:
+        return False, proc.stderr
+    return True, executable_path
+
+
+def compile_c_program(name, c_file, output_dir="."):
+    """
+    Compiles a single C source file with gcc, using the same build cache as
+    compile_flex_bison.
+
+    Args:
+        name (str): The base name for the executable.
+        c_file (str): Path to the .c file.
+        output_dir (str): Directory for the executable when the build cache is disabled.
+
+    Returns:
+        tuple: (bool, str) - True and the executable path, or False and the error output.
+    """
+    c_file = os.path.abspath(c_file)
+
+    if not BUILD_CACHE_ENABLED:
+        output_dir = os.path.abspath(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        result = _build_c_program(name, c_file, output_dir)
+    else:
+        try:
+            key = build_cache_key([c_file], GCC_FLAGS, [GCC_BIN])
+            result = _cached_build(name, key, lambda build_dir: _build_c_program(name, c_file, build_dir))
+        except OSError as e:
+            result = (False, f"An unexpected error occurred during compilation: {str(e)}")
+
+    if not result[0]:
+        count_compile_failure(name)
+    return result
+
+
+# Deadlines of in-flight worker exchanges, enforced by one shared watchdog thread
+_WATCHDOG_DEADLINES = {}
+_WATCHDOG_LOCK = threading.Lock()
+_WATCHDOG_THREAD = None
+
+
+def _watchdog_loop():
+    while True:
+        time.sleep(0.25)
+        now = time.monotonic()
+        with _WATCHDOG_LOCK:
+            overdue = [worker for worker, deadline in _WATCHDOG_DEADLINES.items() if deadline < now]
+        for worker in overdue:
+            worker.proc.kill()
+
+
+def _arm_watchdog(worker, timeout):
+    global _WATCHDOG_THREAD
+    with _WATCHDOG_LOCK:
+        _WATCHDOG_DEADLINES[worker] = time.monotonic() + timeout
+        if _WATCHDOG_THREAD is None:
+            _WATCHDOG_THREAD = threading.Thread(target=_watchdog_loop, name="flex-bison-watchdog", daemon=True)
+            _WATCHDOG_THREAD.start()
+
+
+def _disarm_watchdog(worker):
+    with _WATCHDOG_LOCK:
+        _WATCHDOG_DEADLINES.pop(worker, None)
+
+
+class FlexBisonWorkerError(Exception):
+    """Raised when a pooled analyzer process fails or breaks the protocol."""
+
+
+class FlexBisonProtocolUnsupported(FlexBisonWorkerError):
+    """Raised when an executable does not answer --serve with the expected banner."""
+
+
+class _FlexBisonWorker:
+    """A single long-lived analyzer process started in --serve mode."""
+
+    def __init__(self, executable_path):
+        self.executable_path = executable_path
+        self.requests_served = 0
+        self.last_used = time.monotonic()
+        with timed_phase('spawn'):
+            self.proc = subprocess.Popen(
+                [executable_path, WORKER_SERVE_FLAG],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            banner = self._with_deadline(WORKER_STARTUP_TIMEOUT, self.proc.stdout.readline)
+        if banner != WORKER_SERVE_BANNER:
+            self.close()
+            raise FlexBisonProtocolUnsupported(f"{executable_path} does not support {WORKER_SERVE_FLAG}")
+
+    def _with_deadline(self, timeout, func, *args):
+        # The watchdog kills the process if the exchange takes too long; the blocked read then returns EOF.
+        _arm_watchdog(self, timeout)
+        try:
+            return func(*args)
+        finally:
+            _disarm_watchdog(self)
+
+    def _read_exact(self, n):
+        data = self.proc.stdout.read(n) if n else b''
+        if len(data) != n:
+            raise FlexBisonWorkerError("Analyzer process closed its output mid-response.")
+        return data
+
+    def _exchange(self, payload):
+        self.proc.stdin.write(f"{len(payload)}\n".encode('ascii') + payload)
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 2:
+            raise FlexBisonWorkerError("Analyzer process sent a malformed response header.")
+        n_out, n_err = int(header[0]), int(header[1])
+        return self._read_exact(n_out), self._read_exact(n_err)
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+    def ping(self):
+        try:
+            self.proc.stdin.write(b"PING\n")
+            self.proc.stdin.flush()
+            return self._with_deadline(WORKER_STARTUP_TIMEOUT, self.proc.stdout.readline) == b"PONG\n"
+        except (OSError, ValueError):
+            return False
+
+    def run(self, input_text):
+        try:
+            out, err = self._with_deadline(WORKER_REQUEST_TIMEOUT, self._exchange, input_text.encode('utf-8'))
+        except (OSError, ValueError) as e:
+            raise FlexBisonWorkerError(f"Analyzer process failed: {e}")
+        self.requests_served += 1
+        self.last_used = time.monotonic()
+        return out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace')
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=1)
+        except Exception:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class FlexBisonWorkerPool:
+    """
+    A fixed-size pool of long-lived processes for one analyzer executable.
+
+    Workers are started lazily, pinged when they have been idle for a while,
+    and recycled after serving `max_requests` requests.
+    """
+
+    def __init__(self, executable_path, size=WORKER_POOL_SIZE, max_requests=WORKER_MAX_REQUESTS):
+        self.executable_path = executable_path
+        self.size = size
+        self.max_requests = max_requests
+        self._idle = []
+        self._started = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    def _acquire(self):
+        while True:
+            with self._available:
+                while not self._idle and self._started >= self.size:
+                    self._available.wait()
+                if self._idle:
+                    worker = self._idle.pop()
+                else:
+                    self._started += 1
+                    worker = None
+
+            if worker is None:
+                try:
+                    return _FlexBisonWorker(self.executable_path)
+                except Exception:
+                    self._forget()
+                    raise
+
+            idle_for = time.monotonic() - worker.last_used
+            if worker.is_alive() and (idle_for <= WORKER_HEALTH_CHECK_INTERVAL or worker.ping()):
+                return worker
+            self._discard(worker)
+
+    def _release(self, worker):
+        if self._closed or worker.requests_served >= self.max_requests:
+            self._discard(worker)
+            return
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def _forget(self):
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    def _discard(self, worker):
+        worker.close()
+        self._forget()
+
+    def run(self, input_text):
+        worker = self._acquire()
+        try:
+            result = worker.run(input_text)
+        except FlexBisonWorkerError:
+            self._discard(worker)
+            raise
+        self._release(worker)
+        return result
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            self._discard(worker)
+
+
+# One pool per executable; None marks executables that do not speak the protocol.
+_WORKER_POOLS = {}
+_WORKER_POOLS_LOCK = threading.Lock()
+
+
+def _get_worker_pool(executable_path):
+    with _WORKER_POOLS_LOCK:
+        if executable_path not in _WORKER_POOLS:
+            _WORKER_POOLS[executable_path] = FlexBisonWorkerPool(executable_path)
+        return _WORKER_POOLS[executable_path]
+
+
+def shutdown_worker_pools():
+    """Stops every pooled analyzer process."""
+    with _WORKER_POOLS_LOCK:
+        pools = [pool for pool in _WORKER_POOLS.values() if pool]
+        _WORKER_POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(shutdown_worker_pools)
+
+
+# --- In-process shared libraries ---
+class FlexBisonLibrary:
+    """
+    A grammar loaded as a shared library and called through ctypes.
+
+    The grammars keep their parser and scanner state in globals, so calls
+    into one library are serialized; different grammars run in parallel
+    because ctypes releases the GIL during the call.
+    """
+
+    def __init__(self, library_path):
+        self.library_path = library_path
+        library = ctypes.CDLL(library_path)
+        try:
+            self._analyze = library.fb_analyze
+            self._free = library.fb_free
+        except AttributeError:
+            raise FlexBisonProtocolUnsupported(f"{library_path} does not export fb_analyze")
+        self._analyze.argtypes = [
+            ctypes.c_char_p, ctypes.c_long,
+            ctypes.POINTER(ctypes.c_void_p), ctypes.POINTER(ctypes.c_long),
+            ctypes.POINTER(ctypes.c_void_p), ctypes.POINTER(ctypes.c_long),
+        ]
+        self._analyze.restype = ctypes.c_int
+        self._free.argtypes = [ctypes.c_void_p]
+        self._free.restype = None
+        self._library = library
+        self._lock = threading.Lock()
+
+    def _take(self, pointer, length):
+        # Copy a buffer returned by fb_analyze and release the original
+        if not pointer.value:
+            return b''
+        try:
+            return ctypes.string_at(pointer.value, length.value)
+        finally:
+            self._free(pointer.value)
+
+    def run(self, input_text):
+        """
+        Analyzes `input_text` in-process.
+
+        Returns:
+            tuple: (str, str) - stdout, stderr
+
+        Raises:
+            FlexBisonWorkerError: If the library could not capture the output.
+        """
+        data = input_text.encode('utf-8')
+        out, out_len = ctypes.c_void_p(), ctypes.c_long()
+        err, err_len = ctypes.c_void_p(), ctypes.c_long()
+        with self._lock:
+            status = self._analyze(data, len(data), ctypes.byref(out), ctypes.byref(out_len),
+                                   ctypes.byref(err), ctypes.byref(err_len))
+        stdout = self._take(out, out_len)
+        stderr = self._take(err, err_len)
+        if status != 0:
+            raise FlexBisonWorkerError(f"fb_analyze failed in {self.library_path} (status {status})")
+        return _decode_output(stdout), _decode_output(stderr)
+
+
+# Executable path -> FlexBisonLibrary, or None when the grammar has no usable library.
+_LIBRARIES = {}
+_LIBRARIES_LOCK = threading.Lock()
+
+
+def _register_flex_bison_library(executable_path, name, flex_file, bison_file, output_dir):
+    with _LIBRARIES_LOCK:
+        if executable_path in _LIBRARIES:
+            return
+    library = None
+    success, message = compile_flex_bison_library(name, flex_file, bison_file, output_dir)
+    if success:
+        try:
+            library = FlexBisonLibrary(message)
+            logger.debug("Loaded %s as a shared library: %s", name, message)
+        except (OSError, FlexBisonWorkerError) as e:
+            logger.debug("Shared-library mode unavailable for %s (%s); using the executable.", name, e)
+    else:
+        logger.debug("Shared-library build failed for %s; using the executable.\n%s", name, message)
+    with _LIBRARIES_LOCK:
+        _LIBRARIES.setdefault(executable_path, library)
 
 
 def run_flex_bison_program(executable_path, input_text):
     """
     Runs a compiled Flex/Bison executable with the given input.
+
+    In library mode the grammar is called in-process when it was built as a
+    shared library. Otherwise, when WORKER_POOL_SIZE is greater than zero the
+    input is sent to a pooled long-lived process. Executables that do not
+    support the serve protocol fall back to a fresh process per request.
     
+    An uploaded file is always given to a fresh process as its stdin, so it
+    is never read into memory here.
+
     Args:
         executable_path (str): Path to the compiled executable.
-        input_text (str): The input to feed to the program's stdin.
+        input_text (str | file): The input to feed to the program's stdin,
+            or a binary file object to use as stdin.
         
     Returns:
         tuple: (str, str) - stdout, stderr
     """
+    library = None if _is_file(input_text) else _LIBRARIES.get(executable_path)
+    if library is not None:
+        try:
+            return library.run(input_text)
+        except FlexBisonWorkerError as e:
+            logger.debug("%s; retrying with the executable.", e)
+
+    if WORKER_POOL_SIZE > 0 and not _is_file(input_text):
+        pool = _get_worker_pool(executable_path)
+        if pool is not None:
+            try:
+                return pool.run(input_text)
+            except FlexBisonProtocolUnsupported as e:
+                logger.debug("%s; falling back to one process per request.", e)
+                with _WORKER_POOLS_LOCK:
+                    _WORKER_POOLS[executable_path] = None
+                pool.close()
+            except (FlexBisonWorkerError, OSError) as e:
+                logger.debug("Pooled worker failed (%s); retrying in a fresh process.", e)
+
     try:
-        # Pass input_text to stdin of the subprocess
-        proc = subprocess.run(
-            [executable_path],
-            input=input_text,
-            capture_output=True,
+        # Pass input_text to stdin of the subprocess; same deadline as a pooled request
+        proc = run_process([executable_path], input_text, timeout=WORKER_REQUEST_TIMEOUT)
+        return proc.stdout, proc.stderr
+    except subprocess.TimeoutExpired:
+        count_timeout()
+        mark_uncacheable()
+        return "", f"Error: Execution timed out after {WORKER_REQUEST_TIMEOUT:g} seconds."
+    except FileNotFoundError:
+        mark_uncacheable()
+        return "", f"Error: Executable not found at {executable_path}. Has it been compiled?"
+    except Exception as e:
+        mark_uncacheable()
+        return "", f"An unexpected error occurred during execution: {str(e)}"
+
+
+def _is_file(input_text):
+    return hasattr(input_text, 'fileno')
+
+
+def _stdin_for(input_text):
+    # stdin argument for a child given `input_text`: a pipe for text, the file itself for a file object
+    if input_text is None:
+        return subprocess.DEVNULL
+    if _is_file(input_text):
+        input_text.seek(0)
+        return input_text
+    return subprocess.PIPE
+
+
+def run_process(args, input_text=None, timeout=None):
+    """
+    Runs a command to completion, like subprocess.run(args, input=input_text,
+    capture_output=True, text=True, timeout=timeout), timing the process
+    start as the 'spawn' phase of the current request. `input_text` may also
+    be a binary file object, which the child reads from the start as stdin.
+
+    Returns:
+        subprocess.CompletedProcess: With decoded stdout and stderr.
+
+    Raises:
+        subprocess.TimeoutExpired: If the process runs longer than `timeout`; it is killed first.
+        FileNotFoundError: If the executable does not exist.
+    """
+    with timed_phase('spawn'):
+        proc = subprocess.Popen(
+            args,
+            stdin=_stdin_for(input_text),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            check=False
         )
+    with proc:
+        try:
+            stdout, stderr = proc.communicate(None if _is_file(input_text) else input_text, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        except BaseException:
+            proc.kill()
+            raise
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+# --- Streaming execution ---
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _pump_pipe(pipe, name, chunks):
+    # Reader thread: forwards raw chunks from one pipe until EOF, then a None marker
+    try:
+        while True:
+            data = os.read(pipe.fileno(), _STREAM_CHUNK_SIZE)
+            if not data:
+                break
+            chunks.put((name, data))
+    except OSError:
+        pass
+    finally:
+        pipe.close()
+        chunks.put((name, None))
+
+
+def _feed_stdin(pipe, payload):
+    try:
+        pipe.write(payload)
+    except (BrokenPipeError, OSError):
+        pass # The program exited or stopped reading; that is its business
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def stream_process(args, input_text=None, timeout=None, on_start=None):
+    """
+    Runs a command and yields its output while it is still running.
+
+    Args:
+        args (list): The command line.
+        input_text (str): Text written to stdin, or None for no input.
+        timeout (float): Seconds before the process is killed, or None.
+        on_start (callable): Called with the Popen object as soon as the child has started, e.g. to set its rlimits.
+
+    Yields:
+        tuple: ('stdout' | 'stderr', str) chunks in the order they were read.
+
+    Returns:
+        int: The exit code (as the generator's return value).
+
+    Raises:
+        subprocess.TimeoutExpired: If the process runs longer than `timeout`; it is killed first.
+        FileNotFoundError: If the executable does not exist.
+    """
+    with timed_phase('spawn'):
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        if on_start is not None:
+            try:
+                on_start(proc)
+            except BaseException:
+                proc.kill()
+                proc.wait()
+                raise
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    chunks = queue.Queue()
+    decoders = {name: codecs.getincrementaldecoder('utf-8')(errors='replace') for name in ('stdout', 'stderr')}
+    threads = [
+        threading.Thread(target=_pump_pipe, args=(proc.stdout, 'stdout', chunks), daemon=True),
+        threading.Thread(target=_pump_pipe, args=(proc.stderr, 'stderr', chunks), daemon=True),
+    ]
+    if input_text is not None:
+        threads.append(threading.Thread(target=_feed_stdin, args=(proc.stdin, input_text.encode('utf-8')), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    try:
+        open_pipes = 2
+        while open_pipes:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired(args, timeout)
+            try:
+                name, data = chunks.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(args, timeout)
+            if data is None:
+                open_pipes -= 1
+                text = decoders[name].decode(b'', final=True)
+            else:
+                text = decoders[name].decode(data)
+            if text:
+                yield name, text.replace('\r\n', '\n')
+
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        return proc.wait(timeout=max(remaining, 0) if remaining is not None else None)
+    finally:
+        # Also reached when the consumer stops early (e.g. the client disconnected)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+# --- Async variants (for the asyncio serving mode) ---
+_ASYNC_PROCESS_SLOTS = weakref.WeakKeyDictionary() # event loop -> asyncio.Semaphore
+
+
+def _decode_output(data):
+    # Matches subprocess.run(text=True) closely enough: UTF-8 with universal newlines
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+
+async def run_process_async(args, input_text=None, timeout=None):
+    """
+    Runs a command with asyncio.create_subprocess_exec.
+
+    Mirrors subprocess.run(args, input=input_text, capture_output=True,
+    text=True, timeout=timeout) without blocking the event loop. Like
+    run_process, `input_text` may be a binary file object used as stdin.
+
+    Returns:
+        subprocess.CompletedProcess: With decoded stdout and stderr.
+
+    Raises:
+        subprocess.TimeoutExpired: If the process runs longer than `timeout`; it is killed first.
+        FileNotFoundError: If the executable does not exist.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _ASYNC_PROCESS_SLOTS.get(loop)
+    if slots is None:
+        slots = _ASYNC_PROCESS_SLOTS[loop] = asyncio.Semaphore(ASYNC_MAX_CONCURRENT_PROCESSES)
+
+    async with slots:
+        with timed_phase('spawn'):
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=_stdin_for(input_text),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        payload = input_text.encode('utf-8') if isinstance(input_text, str) else None
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(payload), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(args, timeout)
+    return subprocess.CompletedProcess(args, proc.returncode, _decode_output(stdout), _decode_output(stderr))
+
+
+async def run_flex_bison_program_async(executable_path, input_text):
+    """
+    Async variant of run_flex_bison_program.
+
+    In-process libraries and pooled workers are thread-based, so in those
+    modes the call is handed to a thread; otherwise a child process is
+    started on the event loop.
+
+    Returns:
+        tuple: (str, str) - stdout, stderr
+    """
+    if not _is_file(input_text) and (WORKER_POOL_SIZE > 0 or _LIBRARIES.get(executable_path) is not None):
+        return await asyncio.to_thread(run_flex_bison_program, executable_path, input_text)
+    try:
+        proc = await run_process_async([executable_path], input_text, timeout=WORKER_REQUEST_TIMEOUT)
         return proc.stdout, proc.stderr
+    except subprocess.TimeoutExpired:
+        count_timeout()
+        mark_uncacheable()
+        return "", f"Error: Execution timed out after {WORKER_REQUEST_TIMEOUT:g} seconds."
     except FileNotFoundError:
+        mark_uncacheable()
         return "", f"Error: Executable not found at {executable_path}. Has it been compiled?"
     except Exception as e:
+        mark_uncacheable()
         return "", f"An unexpected error occurred during execution: {str(e)}"
@@ -4,7 +4,38 @@ import subprocess
 import tempfile
 import shutil
 import time
-from backend.flex_bison_utils import compile_flex_bison, run_flex_bison_program
+import asyncio
+import hashlib
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from functools import partial
+from backend.expression_engine import (
+    parse_expression, evaluate, substitute_known, legacy_error,
+)
+from backend.source_analysis import analyze_source, _WORD_PATTERN
+from backend.records import RecordOutput, RecordDecodeError, decode_records
+from backend.compiler_diagnostics import classify_message, classify_compiler_log
+from backend.word_counts import count_words, top_k
+from backend.regex_engine import find_all, RegexTimeout
+from backend.linear_regex import Unsupported
+from backend.email_domains import (
+    EMAIL_REGEX, DomainRulesError, classify_address, classify_addresses, empty_summary, render_summary,
+)
+from backend import file_analysis
+from backend.flex_bison_utils import (
+    BUILD_CACHE_DIR, compile_flex_bison, compile_c_program, run_flex_bison_program,
+    run_process, run_process_async, run_flex_bison_program_async,
+)
+from backend.build_registry import BuildRegistry, PRECOMPILE_AT_STARTUP
+from backend.metrics import timed_phase, count_compile_failure, count_timeout
+from backend.result_cache import mark_uncacheable
+from backend.sandbox import (
+    SandboxBusy, SLOT_POOLS, SANDBOX_OUTPUT_LIMIT, run_sandboxed, run_sandboxed_async, stream_limited,
+)
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -34,11 +65,8 @@ _ARITHMETIC_CALCULATOR_COMPILE_ERROR = None
 
 # --- Helper function for string processing ---
 def strip_comments(text):
-    # Remove C-style block comments (/* ... */)
-    text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
-    # Remove C-style line comments (// ...)
-    text = re.sub(r'//.*', '', text)
-    return text
+    # Remove C-style block comments (/* ... */), then line comments (// ...)
+    return analyze_source(text).clean_text
 
 
 
@@ -120,26 +148,12 @@ def _compile_boolean_evaluator():
     if _BOOLEAN_EVALUATOR_EXECUTABLE is None and _BOOLEAN_EVALUATOR_COMPILE_ERROR is None:
         c_file = os.path.join(os.path.dirname(__file__), 'flex_bison_programs', 'boolean_evaluator', 'boolean_evaluator.c')
         output_dir = os.path.join(os.path.dirname(__file__), 'flex_bison_programs', 'boolean_evaluator')
-        
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-        
-        executable_path = os.path.join(output_dir, "boolean_evaluator.exe" if os.name == 'nt' else "boolean_evaluator")
-        
-        compile_command = ["gcc", c_file, "-o", executable_path]
-        
-        try:
-            subprocess.run(compile_command, check=True, capture_output=True, text=True, timeout=10)
-            _BOOLEAN_EVALUATOR_EXECUTABLE = executable_path
+        success, message = compile_c_program('boolean_evaluator', c_file, output_dir)
+        if success:
+            _BOOLEAN_EVALUATOR_EXECUTABLE = message
             print(f"Boolean Evaluator C executable compiled at: {_BOOLEAN_EVALUATOR_EXECUTABLE}")
-        except subprocess.CalledProcessError as e:
-            _BOOLEAN_EVALUATOR_COMPILE_ERROR = f"Failed to compile Boolean Evaluator C code:\n{e.stderr}"
-            print(_BOOLEAN_EVALUATOR_COMPILE_ERROR)
-        except subprocess.TimeoutExpired:
-            _BOOLEAN_EVALUATOR_COMPILE_ERROR = "Boolean Evaluator C code compilation timed out."
-            print(_BOOLEAN_EVALUATOR_COMPILE_ERROR)
-        except FileNotFoundError:
-            _BOOLEAN_EVALUATOR_COMPILE_ERROR = "GCC compiler not found for Boolean Evaluator. Please install GCC."
+        else:
+            _BOOLEAN_EVALUATOR_COMPILE_ERROR = f"Failed to compile Boolean Evaluator C code:\n{message}"
             print(_BOOLEAN_EVALUATOR_COMPILE_ERROR)
 
 # --- New compile function for arithmetic_calculator ---
@@ -161,21 +175,60 @@ def _compile_arithmetic_calculator():
 
 
 # --- Python-based Functions ---
-def email_parser(c_code):
-    clean_code = strip_comments(c_code)
+_EMAIL_REGEX = EMAIL_REGEX # Relaxed start/end anchors; see backend/email_domains.py
+EMAIL_BULK_MAX_LISTED = int(os.environ.get('EMAIL_BULK_MAX_LISTED', '100000')) # Addresses listed per bulk response; all are counted
 
-    # Extract all string literals from printf statements
-    printf_strings_raw = re.findall(r'printf\s*\(\s*"(.*?)"', clean_code, re.DOTALL)
+def find_printf_emails(c_code):
+    """Returns every email address inside printf string literals outside comments."""
+    # String literals from printf statements outside comments
+    printf_strings_raw = analyze_source(c_code).printf_strings
     
     # Join them into a single block of text for email extraction
     full_text_for_email_search = " ".join(printf_strings_raw)
 
-    email_regex = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}" # Relaxed start/end anchors
-    academic_domain_regex = r"@(edu\.bd|ac\.bd|diu\.edu\.bd)$"
-    personal_domain_regex = r"@(gmail\.com|yahoo\.com|outlook\.com)$"
+    return re.findall(_EMAIL_REGEX, full_text_for_email_search)
 
-    potential_emails = re.findall(email_regex, full_text_for_email_search)
-    
+def email_parser(c_code):
+    return _email_report(find_printf_emails(c_code))
+
+def classify_email(email):
+    """Returns (status category, "Yes"/"No" university mail) for one address."""
+    # Domains come from the rules file (EMAIL_DOMAINS_FILE)
+    return classify_address(email)
+
+def _wants_bulk(data):
+    value = data.get('bulk')
+    return value is True or (isinstance(value, str) and value.lower() in ('1', 'true', 'yes'))
+
+def email_parser_bulk(lines):
+    """
+    Classifies a mailing list, one address per line, in input order.
+
+    Every address is counted. The first EMAIL_BULK_MAX_LISTED are listed,
+    so the response stays bounded however long the list is.
+    """
+    counts = empty_summary()
+    lines_out = []
+    records = []
+    try:
+        for address, status, university in classify_addresses(lines, counts=counts):
+            if len(lines_out) < EMAIL_BULK_MAX_LISTED:
+                lines_out.append(f"Email: {address} | Status: {status} | Is University Mail (.edu): {university}")
+                records.append({"type": "email", "email": address, "status": status, "university": university == "Yes"})
+    except (OSError, DomainRulesError) as e:
+        mark_uncacheable()
+        return f"Error: Could not load email domain rules: {e}"
+
+    total = sum(counts.values())
+    if not total:
+        return "No email addresses found."
+    if total > len(lines_out):
+        lines_out.append(f"... {total - len(lines_out)} more addresses counted but not listed")
+    lines_out.append(render_summary(counts))
+    records.append({"type": "summary", "counts": dict(counts)})
+    return RecordOutput("\n".join(lines_out), records)
+
+def _email_report(potential_emails):
     # Remove duplicates
     unique_emails = sorted(list(set(potential_emails)))
 
@@ -184,46 +237,21 @@ def email_parser(c_code):
     
     results = []
     for email in unique_emails:
-        status_category = "Unknown"
-        is_university_mail = "No"
-
-        # Rule 1: Valid format (already handled by regex, but ensure consistency)
-        is_valid_format = bool(re.fullmatch(email_regex, email))
-        
-        if is_valid_format:
-            if re.search(academic_domain_regex, email):
-                status_category = "Valid (University)"
-                is_university_mail = "Yes"
-            elif re.search(personal_domain_regex, email):
-                status_category = "Valid (Personal)"
-            else:
-                status_category = "Valid (Unknown)" # Catches valid emails not personal/university
-        else:
-            status_category = "Invalid" # If regex didn't match fully
-            
+        status_category, is_university_mail = classify_email(email)
         results.append(f"Email: {email} | Status: {status_category} | Is University Mail (.edu): {is_university_mail}")
     
     return "\n".join(results)
 
 def normal_text_analyzer(c_code):
-    import re
     from collections import Counter
 
-    # Regex to find all string literals inside printf statements
-    # It looks for `printf(...)` and captures the first string literal inside.
-    # This is a simplified regex and might not handle all edge cases, but is good for this purpose.
-    printf_strings = re.findall(r'printf\s*\(\s*"(.*?)"', c_code, re.DOTALL)
-
-    if not printf_strings:
+    # The first string literal of every printf call (comments included),
+    # with C-style format specifiers like %d, %s removed before splitting
+    artifact = analyze_source(c_code)
+    if not artifact.raw_printf_strings:
         return "No text inside printf statements found."
 
-    # Join all found strings and clean them up
-    # This removes C-style format specifiers like %d, %s, etc.
-    full_text = " ".join(printf_strings)
-    cleaned_text = re.sub(r'%[a-zA-Z%]', '', full_text)
-    
-    # Extract words using a regex that finds sequences of alphabetic characters
-    words = re.findall(r'[a-zA-Z]+', cleaned_text.lower())
+    words = artifact.text_words
 
     if not words:
         return "No words found in printf statements for analysis."
@@ -287,27 +315,25 @@ def _compile_var_extractor():
             print(_VAR_EXTRACTOR_COMPILE_ERROR)
 
 
-def reverse_concatenate(c_code):
-    import json
-
+def _reverse_concatenate_session(c_code):
     # Ensure the var_extractor is compiled
-    _compile_var_extractor()
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'reverse_concatenate'))
     if _VAR_EXTRACTOR_COMPILE_ERROR:
         return f"Error: {_VAR_EXTRACTOR_COMPILE_ERROR}"
     if not _VAR_EXTRACTOR_EXECUTABLE:
         return "Reverse & Concatenate Analyzer is not ready (compilation failed or not attempted)."
 
-    # Run the extractor and get the JSON output
-    stdout, stderr = run_flex_bison_program(_VAR_EXTRACTOR_EXECUTABLE, c_code)
+    # Run the extractor and decode its records
+    stdout, stderr = yield ('flex_bison', _VAR_EXTRACTOR_EXECUTABLE, c_code)
     if stderr:
         return f"C Code Parser Error:\n{stderr}"
     
     try:
-        data = json.loads(stdout)
-        variables = data.get("variables", {})
-        print_order = data.get("print_order", [])
-    except json.JSONDecodeError:
+        records = decode_records(stdout)
+    except RecordDecodeError:
         return f"Error: Failed to parse analysis data from C code parser.\nRaw output:\n{stdout}"
+    variables = {record["name"]: record["value"] for record in records if record["type"] == "variable"}
+    print_order = [record["name"] for record in records if record["type"] == "print"]
 
     if not print_order:
         return "No printf statements with recognized variables found."
@@ -330,28 +356,28 @@ def reverse_concatenate(c_code):
         f"- Is the final string a palindrome? {is_palindrome}"
     ]
     
-    return "\n".join(output)
+    return RecordOutput("\n".join(output), records)
+
+
+def reverse_concatenate(c_code):
+    return _drive_session(_reverse_concatenate_session(c_code))
+
+
+async def reverse_concatenate_async(c_code):
+    return await _drive_session_async(_reverse_concatenate_session(c_code))
 
 
 def comment_detector(c_code):
-    single_line_comments = []
-    multi_line_comments = []
-
-    # Regex for multi-line comments (/* ... */)
-    multiline_comment_pattern = re.compile(r'/\*.*?\*/', re.DOTALL)
-    for match in multiline_comment_pattern.finditer(c_code):
-        comment = match.group(0)
-        # Remove internal newlines and replace with a single space
-        cleaned_comment = comment.replace('\n', ' ')
-        multi_line_comments.append(f"- {cleaned_comment}")
-
-    # Regex for single-line comments (// ...)
-    # This should be applied carefully to avoid matching // inside strings
-    singleline_comment_pattern = re.compile(r'//.*')
-    for match in singleline_comment_pattern.finditer(c_code):
-        comment = match.group(0)
-        single_line_comments.append(f"- {comment}")
-            
+    artifact = analyze_source(c_code)
+
+    # Multi-line comments (/* ... */) with internal newlines replaced by a single space
+    multi_line_comments = ["- " + c_code[start:end].replace('\n', ' ') for start, end in artifact.block_comments]
+
+    # Single-line comments (// ...); note these are not aware of string literals
+    single_line_comments = [f"- {c_code[start:end]}" for start, end in artifact.line_comments]
+    return _comment_report(single_line_comments, multi_line_comments)
+
+def _comment_report(single_line_comments, multi_line_comments):
     output_lines = []
 
     if single_line_comments:
@@ -372,24 +398,20 @@ def comment_detector(c_code):
 def word_frequency_calculator(c_code):
     from collections import Counter
 
-    clean_code = strip_comments(c_code)
-    
-    # Extract all string literals from printf statements
-    printf_strings = re.findall(r'printf\s*\(\s*"(.*?)"', clean_code, re.DOTALL)
-
-    if not printf_strings:
+    # String literals from printf statements outside comments
+    artifact = analyze_source(c_code)
+    if not artifact.printf_strings:
         return "No text inside printf statements found to analyze."
 
-    full_text = " ".join(printf_strings)
-    
-    # Extract words (sequences of letters only), case-insensitive
-    words = re.findall(r'[a-zA-Z]+', full_text.lower())
+    # Words (sequences of letters only), case-insensitive
+    words = artifact.words
 
     if not words:
         return "No words found for frequency calculation."
 
-    word_counts = Counter(words)
-    
+    return _word_frequency_report(Counter(words))
+
+def _word_frequency_report(word_counts):
     # Sort by frequency (desc), then by word (asc)
     sorted_words = sorted(word_counts.items(), key=lambda item: (-item[1], item[0]))
     
@@ -399,72 +421,404 @@ def word_frequency_calculator(c_code):
 
     return "\n".join(output_lines)
 
-def regex_matcher(text, pattern):
+# --- Top-k word frequency ---
+# Requests that set 'top_k' (and optionally 'max_vocabulary' and 'workers')
+# count words incrementally instead of building the whole word list, and
+# report only the most frequent entries; see word_counts.py.
+
+def _word_frequency_settings(data):
+    """Returns (top_k, max_vocabulary or None, sharded); raises ValueError on bad fields."""
+    settings = []
+    for field, required in (('top_k', True), ('max_vocabulary', False)):
+        value = data.get(field)
+        if value is None and not required:
+            settings.append(None)
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"'{field}' must be a positive integer.")
+        settings.append(value)
+    return settings[0], settings[1], bool(data.get('workers'))
+
+def _wants_top_k(data):
+    return data.get('top_k') is not None
+
+def _word_frequency_top_k(texts, data):
     try:
-        matches = re.findall(pattern, text)
-        if matches:
-            return "Matches found:\n" + "\n".join(matches)
-        else:
-            return "No matches found."
+        k, max_vocabulary, sharded = _word_frequency_settings(data)
+    except ValueError as e:
+        return f"Error: {e}"
+    executor = None
+    if sharded:
+        from backend.project_analysis import project_executor # project_analysis imports this module
+        executor = project_executor()
+
+    word_counts, strings_seen = count_words(texts, max_vocabulary, executor)
+    if not strings_seen:
+        return "No text inside printf statements found to analyze."
+    if not word_counts:
+        return "No words found for frequency calculation."
+
+    entries = top_k(word_counts, k)
+    if max_vocabulary is None:
+        header = f"Frequency (top {len(entries)} of {len(word_counts)} distinct words):"
+    else:
+        header = f"Frequency (top {len(entries)}, approximate counts; vocabulary capped at {max_vocabulary}):"
+    return "\n".join([header] + [f"- {word}: {count}" for word, count in entries])
+
+def word_frequency_calculator_top_k(c_code, data):
+    """word_frequency_calculator reporting only the `top_k` most frequent words."""
+    return _word_frequency_top_k(analyze_source(c_code).printf_strings, data)
+
+def regex_matcher(text, pattern, engine='auto'):
+    """
+    re.findall(pattern, text) under a deadline, in a worker process; see
+    backend/regex_engine.py. `engine` is 'auto', 're' or 'linear', and the
+    output ends with the engine that produced the matches.
+    """
+    try:
+        matches, used, note = find_all(pattern, text, engine)
     except re.error as e:
         return f"Regex Error: {e}"
+    except Unsupported as e:
+        return f"Regex Error: {e} (use engine 're' for this pattern)"
+    except RegexTimeout as e:
+        count_timeout()
+        mark_uncacheable()
+        return f"Regex Timeout: {e}"
+    except RuntimeError as e: # The worker process failed
+        mark_uncacheable()
+        return f"Regex Error: {e}"
+    except ValueError as e:
+        return f"Regex Error: {e}"
 
+    engine_line = f"Engine: {used}" + (f" ({note})" if note else "")
+    records = [{"type": "match", "value": list(match) if isinstance(match, tuple) else match} for match in matches]
+    records.append({"type": "engine", "engine": used, "fallback": note})
+    if matches:
+        lines = [repr(match) if isinstance(match, tuple) else match for match in matches]
+        return RecordOutput("Matches found:\n" + "\n".join(lines) + "\n\n" + engine_line, records)
+    return RecordOutput("No matches found.\n\n" + engine_line, records)
+
+
+
+# --- Compiled-binary cache for run_full_c_code ---
+# Resubmitting the same program (only stdin changes) reuses the executable
+# built last time. Entries are evicted least-recently-used first once the
+# cache directory grows past its byte budget. The budget is tracked per
+# server process, so with several worker processes the directory can grow
+# to workers x USER_PROGRAM_CACHE_MAX_BYTES.
+#
+# A request never runs the cache entry itself: the executable is hard-linked
+# into a private run directory first (under the cache lock), so an entry
+# evicted by another request or process while this one waits for a run slot
+# stays runnable until the run directory is removed.
+_USER_PROGRAM_COMPILE_FLAGS = []
+_USER_PROGRAM_CACHE_DIR = os.environ.get('USER_PROGRAM_CACHE_DIR', os.path.join(BUILD_CACHE_DIR, 'user_programs'))
+_USER_PROGRAM_CACHE_MAX_BYTES = int(os.environ.get('USER_PROGRAM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+_USER_PROGRAM_CACHE = None # OrderedDict: key -> entry size in bytes, least recently used first
+_USER_PROGRAM_CACHE_LOCK = threading.Lock()
+_USER_PROGRAM_RUN_PREFIX = ".run-"
+
+
+def _user_program_key(c_code):
+    digest = hashlib.sha256()
+    digest.update(" ".join(_USER_PROGRAM_COMPILE_FLAGS).encode('utf-8') + b'\0')
+    digest.update(c_code.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _user_program_paths(key):
+    entry_dir = os.path.join(_USER_PROGRAM_CACHE_DIR, key)
+    executable_path = os.path.join(entry_dir, "user_code.exe" if os.name == 'nt' else "user_code")
+    warnings_path = os.path.join(entry_dir, "compiler_warnings.txt")
+    return entry_dir, executable_path, warnings_path
+
+
+def _load_user_program_cache():
+    # Rebuild the LRU order from disk (by mtime) the first time the cache is used in this process
+    global _USER_PROGRAM_CACHE
+    if _USER_PROGRAM_CACHE is not None:
+        return
+    entries = []
+    if os.path.isdir(_USER_PROGRAM_CACHE_DIR):
+        for key in os.listdir(_USER_PROGRAM_CACHE_DIR):
+            entry_dir, executable_path, _ = _user_program_paths(key)
+            if key.startswith('.') or not os.path.isfile(executable_path):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            entries.append((os.path.getmtime(entry_dir), key, size))
+    _USER_PROGRAM_CACHE = OrderedDict((key, size) for _, key, size in sorted(entries))
 
 
-def run_full_c_code(c_code, user_input_string):
-    import subprocess
-    import tempfile
-    import shutil
-
-    # Security Warning
-    output_lines = [
-        "SECURITY WARNING: Running arbitrary C code can be dangerous.",
-        "This feature is for educational/testing purposes only. Do not run untrusted code.",
-        "--------------------------------------------------------------------------------",
-    ]
+def _link_for_run(executable_path, run_dir):
+    # A hard link keeps the executable alive if its cache entry is evicted; copy where links are unsupported
+    target = os.path.join(run_dir, os.path.basename(executable_path))
+    try:
+        os.link(executable_path, target)
+    except OSError:
+        shutil.copy2(executable_path, target)
+    return target
+
+
+def _lookup_user_program(key, run_dir):
+    """Returns (executable linked into `run_dir`, compiler warnings) for a cached build, or None."""
+    with _USER_PROGRAM_CACHE_LOCK:
+        _load_user_program_cache()
+        if key not in _USER_PROGRAM_CACHE:
+            return None
+        entry_dir, executable_path, warnings_path = _user_program_paths(key)
+        try:
+            run_executable = _link_for_run(executable_path, run_dir)
+        except OSError:
+            # Evicted on disk, e.g. by another server process
+            del _USER_PROGRAM_CACHE[key]
+            return None
+        _USER_PROGRAM_CACHE.move_to_end(key)
+        os.utime(entry_dir) # Persist the recency for the next process
+        warnings = ""
+        if os.path.exists(warnings_path):
+            with open(warnings_path) as f:
+                warnings = f.read()
+        return run_executable, warnings
+
+
+def _store_user_program(key, build_dir, executable_path, compiler_warnings, run_dir):
+    """Moves a fresh build into the cache and evicts old entries; returns the executable linked into `run_dir`."""
+    entry_dir, cached_executable, warnings_path = _user_program_paths(key)
+    run_executable = _link_for_run(executable_path, run_dir)
+    with open(os.path.join(build_dir, os.path.basename(warnings_path)), "w") as f:
+        f.write(compiler_warnings)
+    os.remove(os.path.join(build_dir, "user_code.c"))
+    size = sum(os.path.getsize(os.path.join(build_dir, name)) for name in os.listdir(build_dir))
+
+    with _USER_PROGRAM_CACHE_LOCK:
+        _load_user_program_cache()
+        try:
+            os.rename(build_dir, entry_dir)
+        except OSError:
+            # Same program published concurrently; keep the existing entry
+            if not os.path.isfile(cached_executable):
+                return run_executable
+        _USER_PROGRAM_CACHE[key] = size
+        _USER_PROGRAM_CACHE.move_to_end(key)
+
+        total = sum(_USER_PROGRAM_CACHE.values())
+        while total > _USER_PROGRAM_CACHE_MAX_BYTES and len(_USER_PROGRAM_CACHE) > 1:
+            old_key, old_size = _USER_PROGRAM_CACHE.popitem(last=False)
+            shutil.rmtree(_user_program_paths(old_key)[0], ignore_errors=True)
+            total -= old_size
+    return run_executable
+
+
+# --- Sessions: analyzer logic shared by the sync and async entry points ---
+# A session is a generator that yields the blocking steps it needs and
+# receives their results (or has the raised exception thrown into it):
+#   ('call', func)                     -> func(), e.g. a lazy compile
+#   ('run', args, input_text, timeout) -> subprocess.CompletedProcess
+#   ('sandbox', stage, args, input_text, timeout) -> sandbox.SandboxResult; user programs,
+#                                      stage 'compile' or 'run' (see backend/sandbox.py)
+#   ('flex_bison', executable, input)  -> (stdout, stderr) from run_flex_bison_program
+# The generator's return value is the analyzer output.
+
+# Step kind -> request phase it is timed as (see backend/metrics.py)
+_STEP_PHASES = {'call': 'compile', 'run': 'execute', 'flex_bison': 'execute'}
+
+
+def _step_phase(step):
+    if step[0] == 'sandbox':
+        return 'compile' if step[1] == 'compile' else 'execute'
+    return _STEP_PHASES[step[0]]
+
+
+def _perform_step(step):
+    kind = step[0]
+    with timed_phase(_step_phase(step)):
+        if kind == 'call':
+            return step[1]()
+        if kind == 'run':
+            _, args, input_text, timeout = step
+            return run_process(args, input_text, timeout)
+        if kind == 'sandbox':
+            return run_sandboxed(*step[1:])
+        return run_flex_bison_program(step[1], step[2])
+
+
+async def _perform_step_async(step):
+    kind = step[0]
+    with timed_phase(_step_phase(step)):
+        if kind == 'call':
+            return await asyncio.to_thread(step[1])
+        if kind == 'run':
+            _, args, input_text, timeout = step
+            return await run_process_async(args, input_text, timeout)
+        if kind == 'sandbox':
+            # The slot is awaited on the loop; only admitted processes take a thread
+            return await run_sandboxed_async(*step[1:])
+        return await run_flex_bison_program_async(step[1], step[2])
+
+
+def _drive_session(session):
+    """Runs a session synchronously, performing each step in the calling thread."""
+    try:
+        step = next(session)
+        while True:
+            try:
+                result = _perform_step(step)
+            except Exception as e:
+                if isinstance(e, subprocess.TimeoutExpired):
+                    count_timeout()
+                mark_uncacheable() # The session reports the failure; it says nothing about the input
+                step = session.throw(e)
+            else:
+                step = session.send(result)
+    except StopIteration as stop:
+        return stop.value
 
-    temp_dir = None
+
+async def _drive_session_async(session):
+    """Runs a session on the event loop; child processes never block it."""
     try:
-        # Create a temporary directory
-        temp_dir = tempfile.mkdtemp()
-        
-        # Write C code to a temporary file
-        c_file_path = os.path.join(temp_dir, "user_code.c")
-        with open(c_file_path, "w") as f:
-            f.write(c_code)
-        
-        # Define output executable path
-        executable_path = os.path.join(temp_dir, "user_code.exe" if os.name == 'nt' else "user_code")
-        execute_command = [executable_path] # Moved here
-
-        # Compile the C code
-        compile_command = ["gcc", c_file_path, "-o", executable_path]
-        output_lines.append(f"Compiling with: {' '.join(compile_command)}")
-        compile_process = subprocess.run(compile_command, capture_output=True, text=True, timeout=10)
-        
-        if compile_process.returncode != 0:
-            output_lines.append("\n--- COMPILATION FAILED ---")
-            output_lines.append(compile_process.stderr)
+        step = next(session)
+        while True:
+            try:
+                result = await _perform_step_async(step)
+            except Exception as e:
+                if isinstance(e, subprocess.TimeoutExpired):
+                    count_timeout()
+                mark_uncacheable() # The session reports the failure; it says nothing about the input
+                step = session.throw(e)
+            else:
+                step = session.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+_SECURITY_WARNING_LINES = (
+    "SECURITY WARNING: Running arbitrary C code can be dangerous.",
+    "This feature is for educational/testing purposes only. Do not run untrusted code.",
+    "--------------------------------------------------------------------------------",
+)
+
+
+def _user_program_build_session(c_code, output_lines, temp_dirs):
+    """
+    Sub-session that compiles `c_code`, or reuses its cached build.
+
+    Status lines are appended to `output_lines`; build directories that still
+    need cleaning up are appended to `temp_dirs`. Returns the executable
+    path, or None if compilation failed.
+    """
+    key = _user_program_key(c_code)
+    os.makedirs(_USER_PROGRAM_CACHE_DIR, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix=_USER_PROGRAM_RUN_PREFIX, dir=_USER_PROGRAM_CACHE_DIR)
+    temp_dirs.append(run_dir)
+    cached = _lookup_user_program(key, run_dir)
+
+    if cached:
+        executable_path, compiler_warnings = cached
+        output_lines.append("Build cache: hit (skipping compilation)")
+        output_lines.append("\n--- COMPILATION SUCCESSFUL ---")
+        if compiler_warnings:
+            output_lines.append("Compiler Warnings/Info:")
+            output_lines.append(compiler_warnings)
             output_lines.append("--------------------------")
+        return executable_path
+
+    output_lines.append("Build cache: miss")
+
+    # Create a temporary build directory next to the cache so publishing is a rename
+    temp_dir = tempfile.mkdtemp(prefix=".build-", dir=_USER_PROGRAM_CACHE_DIR)
+    temp_dirs.append(temp_dir)
+
+    # Write C code to a temporary file
+    c_file_path = os.path.join(temp_dir, "user_code.c")
+    with open(c_file_path, "w") as f:
+        f.write(c_code)
+
+    # Define output executable path
+    executable_path = os.path.join(temp_dir, "user_code.exe" if os.name == 'nt' else "user_code")
+
+    # Compile the C code
+    compile_command = ["gcc", c_file_path, "-o", executable_path] + _USER_PROGRAM_COMPILE_FLAGS
+    output_lines.append(f"Compiling with: {' '.join(compile_command)}")
+    compile_process = yield ('sandbox', 'compile', compile_command, None, 10)
+    output_lines.append(_queue_status('Compile', compile_process.wait_seconds, compile_process.queue_depth))
+
+    if compile_process.returncode != 0:
+        count_compile_failure('user_program')
+        output_lines.append("\n--- COMPILATION FAILED ---")
+        output_lines.append(compile_process.stderr)
+        output_lines.append("--------------------------")
+        return None
+
+    output_lines.append("\n--- COMPILATION SUCCESSFUL ---")
+    if compile_process.stderr:
+        output_lines.append("Compiler Warnings/Info:")
+        output_lines.append(compile_process.stderr)
+        output_lines.append("--------------------------")
+
+    return _store_user_program(key, temp_dir, executable_path, compile_process.stderr, run_dir)
+
+
+def _queue_status(stage, wait_seconds, queue_depth):
+    return f"{stage} queue: waited {wait_seconds * 1000:.1f} ms behind {queue_depth} queued request(s)"
+
+
+def _output_limit_status():
+    return f"--- Output limit of {SANDBOX_OUTPUT_LIMIT} bytes reached; program killed ---"
+
+
+def _append_build_error(output_lines, error):
+    # Failures raised while compiling, worded as run_full_c_code always reported them
+    if isinstance(error, subprocess.TimeoutExpired):
+        count_compile_failure('user_program')
+        output_lines.append("\n--- COMPILATION FAILED ---")
+        output_lines.append("Error: Compilation timed out after 10 seconds.")
+    elif isinstance(error, FileNotFoundError):
+        count_compile_failure('user_program')
+        output_lines.append("\n--- ERROR ---")
+        output_lines.append("Error: GCC compiler not found. Please ensure GCC is installed and in your system's PATH.")
+    else:
+        output_lines.append("\n--- UNEXPECTED ERROR ---")
+        output_lines.append(f"An unexpected error occurred: {error}")
+    output_lines.append("--------------------------")
+
+
+def _cleanup_build_dirs(output_lines, temp_dirs):
+    # Clean up temporary build directories that were not moved into the cache
+    for temp_dir in temp_dirs:
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+            if not os.path.basename(temp_dir).startswith(_USER_PROGRAM_RUN_PREFIX): # Run directories go silently
+                output_lines.append(f"\nCleaned up temporary files in {temp_dir}")
+    output_lines.append("--------------------------------------------------------------------------------")
+
+
+def _full_c_code_session(c_code, user_input_string):
+    output_lines = list(_SECURITY_WARNING_LINES)
+    temp_dirs = []
+    try:
+        executable_path = yield from _user_program_build_session(c_code, output_lines, temp_dirs)
+        if executable_path is None:
             return "\n".join(output_lines)
-        else:
-            output_lines.append("\n--- COMPILATION SUCCESSFUL ---")
-            if compile_process.stderr:
-                output_lines.append("Compiler Warnings/Info:")
-                output_lines.append(compile_process.stderr)
-                output_lines.append("--------------------------")
 
         # Execute the compiled program
-        # The execute_command is already defined
+        execute_command = [executable_path]
         output_lines.append(f"\nExecuting: {' '.join(execute_command)}")
         try:
-            execute_process = subprocess.run(execute_command, input=user_input_string, capture_output=True, text=True, timeout=5)
+            execute_process = yield ('sandbox', 'run', execute_command, user_input_string, 5)
+            output_lines.append(_queue_status('Run', execute_process.wait_seconds, execute_process.queue_depth))
             output_lines.append("\n--- PROGRAM OUTPUT ---")
             output_lines.append(execute_process.stdout)
             if execute_process.stderr:
                 output_lines.append("--- PROGRAM STDERR ---")
                 output_lines.append(execute_process.stderr)
-            output_lines.append(f"--- Program exited with code: {execute_process.returncode} ---")
+            if execute_process.output_truncated:
+                output_lines.append(_output_limit_status())
+            else:
+                output_lines.append(f"--- Program exited with code: {execute_process.returncode} ---")
+        except SandboxBusy:
+            raise
         except subprocess.TimeoutExpired:
             output_lines.append("\n--- EXECUTION FAILED ---")
             output_lines.append("Error: Program timed out after 5 seconds.")
@@ -474,116 +828,244 @@ def run_full_c_code(c_code, user_input_string):
             output_lines.append(f"Error during execution: {e}")
             output_lines.append("--------------------------")
 
-    except subprocess.TimeoutExpired:
-        output_lines.append("\n--- COMPILATION FAILED ---")
-        output_lines.append("Error: Compilation timed out after 10 seconds.")
-        output_lines.append("--------------------------")
-    except FileNotFoundError:
-        output_lines.append("\n--- ERROR ---")
-        output_lines.append("Error: GCC compiler not found. Please ensure GCC is installed and in your system's PATH.")
-        output_lines.append("--------------------------")
+    except SandboxBusy:
+        raise
     except Exception as e:
-        output_lines.append("\n--- UNEXPECTED ERROR ---")
-        output_lines.append(f"An unexpected error occurred: {e}")
-        output_lines.append("--------------------------")
+        _append_build_error(output_lines, e)
     finally:
-        # Clean up temporary directory
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            output_lines.append(f"\nCleaned up temporary files in {temp_dir}")
-        output_lines.append("--------------------------------------------------------------------------------")
+        _cleanup_build_dirs(output_lines, temp_dirs)
 
     return "\n".join(output_lines)
 
+
+def run_full_c_code(c_code, user_input_string):
+    return _drive_session(_full_c_code_session(c_code, user_input_string))
+
+
+async def run_full_c_code_async(c_code, user_input_string):
+    return await _drive_session_async(_full_c_code_session(c_code, user_input_string))
+
+def _flush_status(output_lines):
+    text = "\n".join(output_lines) + "\n"
+    output_lines.clear()
+    return ('status', text)
+
+
+def _stream_sandbox_step(step, output_lines):
+    # Status is held back until the slot is granted, so a request rejected at
+    # admission has sent nothing yet and can still be answered with a 429
+    _, stage, args, input_text, timeout = step
+    with SLOT_POOLS[stage].slot() as admission:
+        if output_lines:
+            yield _flush_status(output_lines)
+        with timed_phase(_step_phase(step)):
+            return run_sandboxed(stage, args, input_text, timeout, admission)
+
+
+def _stream_session(session, output_lines):
+    """Drives a session like _drive_session, emitting new `output_lines` as a 'status' event before each step."""
+    try:
+        step = next(session)
+        while True:
+            try:
+                if step[0] == 'sandbox':
+                    result = yield from _stream_sandbox_step(step, output_lines)
+                else:
+                    if output_lines:
+                        yield _flush_status(output_lines)
+                    result = _perform_step(step)
+            except Exception as e:
+                if isinstance(e, subprocess.TimeoutExpired):
+                    count_timeout()
+                step = session.throw(e)
+            else:
+                step = session.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def stream_full_c_code(c_code, user_input_string):
+    """
+    Streaming variant of run_full_c_code.
+
+    Yields (event, text) pairs as the work progresses: 'status' for the
+    banner, build-cache and compiler messages, 'stdout' and 'stderr' for the
+    program's output as it is produced, and 'exit' with the exit code once
+    the program finishes. Program output is forwarded, never accumulated.
+    """
+    output_lines = list(_SECURITY_WARNING_LINES)
+    temp_dirs = []
+    try:
+        build = _user_program_build_session(c_code, output_lines, temp_dirs)
+        executable_path = yield from _stream_session(build, output_lines)
+
+        if executable_path is not None:
+            execute_command = [executable_path]
+            output_lines.append(f"\nExecuting: {' '.join(execute_command)}")
+            try:
+                # The run slot is held while the output streams and released if the client goes away
+                with SLOT_POOLS['run'].slot() as (wait_seconds, queue_depth):
+                    output_lines.append(_queue_status('Run', wait_seconds, queue_depth))
+                    output_lines.append("\n--- PROGRAM OUTPUT ---")
+                    yield _flush_status(output_lines)
+                    with timed_phase('execute'):
+                        returncode, truncated = yield from stream_limited('run', execute_command, user_input_string, 5)
+                if truncated:
+                    output_lines.append(_output_limit_status())
+                else:
+                    yield ('exit', str(returncode))
+            except SandboxBusy:
+                raise
+            except subprocess.TimeoutExpired:
+                count_timeout()
+                output_lines.append("\n--- EXECUTION FAILED ---")
+                output_lines.append("Error: Program timed out after 5 seconds.")
+                output_lines.append("--------------------------")
+            except Exception as e:
+                output_lines.append("\n--- EXECUTION FAILED ---")
+                output_lines.append(f"Error during execution: {e}")
+                output_lines.append("--------------------------")
+
+    except SandboxBusy:
+        raise
+    except Exception as e:
+        _append_build_error(output_lines, e)
+    finally:
+        _cleanup_build_dirs(output_lines, temp_dirs)
+    yield _flush_status(output_lines)
+
+
 # --- Flex/Bison Integrated Functions ---
 
 
+_CALCULATOR_ASSIGNMENT_PATTERN = re.compile(r'(?:int|float|double)\s+([a-zA-Z_]\w*)\s*=\s*(.*?)\s*;')
+
 def calculator(c_code):
     symbol_table = {}
     output_lines = []
 
     clean_code = strip_comments(c_code)
     
-    # Regex to find variable assignments (int, float, double)
+    # Find variable assignments (int, float, double)
     # e.g., int x = 10; float y = x + 5;
-    assignment_pattern = re.compile(r'(?:int|float|double)\s+([a-zA-Z_]\w*)\s*=\s*(.*?)\s*;')
-
-    for match in assignment_pattern.finditer(clean_code):
+    # Each expression is parsed once and evaluated against the symbol table,
+    # so the cost no longer grows with the number of known variables.
+    for match in _CALCULATOR_ASSIGNMENT_PATTERN.finditer(clean_code):
         var_name = match.group(1)
         expression_str = match.group(2).strip()
 
-        # Substitute known variables into the expression
-        for key, value in symbol_table.items():
-            expression_str = re.sub(r'\b' + re.escape(key) + r'\b', str(value), expression_str)
-        
         try:
-            # Basic validation to prevent arbitrary code execution with eval()
-            # Only allow numbers, +, -, *, /, (, )
-            if not re.fullmatch(r'[\d\s+\-*/().]+', expression_str):
-                output_lines.append(f"Result for {var_name}: Error - Invalid characters in expression: {expression_str}")
-                continue
-            
-            # Check for division by zero before evaluation
-            if '/' in expression_str:
-                parts = re.split(r'/', expression_str)
-                for i in range(1, len(parts)):
-                    # Check if the divisor part evaluates to zero
-                    try:
-                        divisor_candidate = parts[i].strip()
-                        # Simplified check, might not catch all zero division cases in complex expressions
-                        if re.fullmatch(r'[\d\s\.\-]+', divisor_candidate): # Only simple numbers/negatives
-                            if float(divisor_candidate) == 0:
-                                raise ZeroDivisionError
-                        elif re.fullmatch(r'[\d\s+\-*/()]+', divisor_candidate):
-                             # Try to evaluate simplified divisor parts
-                            if eval(divisor_candidate, {"__builtins__": None}, {}) == 0:
-                                raise ZeroDivisionError
-                    except (SyntaxError, NameError, TypeError):
-                        # Cannot evaluate divisor safely, proceed with full eval and let it fail
-                        pass
-
-
-            result = eval(expression_str, {"__builtins__": None}, {}) # Safely evaluate
+            tree = parse_expression(expression_str)
+            result = evaluate(tree, symbol_table)
             symbol_table[var_name] = result
             output_lines.append(f"Result: {result}")
-        except ZeroDivisionError:
-            output_lines.append(f"Result for {var_name}: Error - Division by zero in expression: {expression_str}")
         except Exception as e:
-            output_lines.append(f"Result for {var_name}: Error - Could not evaluate '{expression_str}': {e}")
+            # Errors are worded as the eval() version reported them
+            shown = substitute_known(expression_str, symbol_table)
+            kind, detail = legacy_error(shown, e)
+            if kind == 'invalid':
+                output_lines.append(f"Result for {var_name}: Error - Invalid characters in expression: {shown}")
+            elif kind == 'zero_division':
+                output_lines.append(f"Result for {var_name}: Error - Division by zero in expression: {shown}")
+            else:
+                output_lines.append(f"Result for {var_name}: Error - Could not evaluate '{shown}': {detail}")
             
     if not output_lines:
         return "No arithmetic assignments found."
 
     return "\n".join(output_lines)
 
-def operator_delimiter_recognizer(c_code):
-    _compile_operator_delimiter_recognizer()
+# Token categories reported by lexer_features, in display order
+_TOKEN_CATEGORIES = (
+    ('keyword', 'Keywords'),
+    ('identifier', 'Identifiers'),
+    ('operator', 'Operators'),
+    ('delimiter', 'Delimiters'),
+    ('string_literal', 'String Literals'),
+)
+
+
+def _error_lines(records):
+    # The diagnostics among an analyzer's records, one line each as the analyzers used to print them
+    lines = []
+    for record in records:
+        if record["type"] == "error":
+            prefix = f"{record['kind'].upper()} ERROR: " if "kind" in record else "Error: "
+            suffix = f" at line {record['line']}" if "line" in record else ""
+            lines.append(f"{prefix}{record['message']}{suffix}")
+    return "\n".join(lines)
+
+
+def _operator_delimiter_recognizer_session(c_code):
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'operator_delimiter_recognizer'))
     if _OPERATOR_DELIMITER_RECOGNIZER_COMPILE_ERROR:
         return f"Error: {_OPERATOR_DELIMITER_RECOGNIZER_COMPILE_ERROR}"
     if not _OPERATOR_DELIMITER_RECOGNIZER_EXECUTABLE:
         return "Operator & Delimiter Recognizer is not ready (compilation failed or not attempted)."
 
-    stdout, stderr = run_flex_bison_program(_OPERATOR_DELIMITER_RECOGNIZER_EXECUTABLE, c_code)
+    stdout, stderr = yield ('flex_bison', _OPERATOR_DELIMITER_RECOGNIZER_EXECUTABLE, c_code)
     if stderr:
         return f"Operator & Delimiter Recognizer Error:\n{stderr}"
-    
-    return stdout
+    try:
+        records = decode_records(stdout)
+    except RecordDecodeError as e:
+        return f"Operator & Delimiter Recognizer Error:\n{e}\nRaw output:\n{stdout}"
+
+    errors = _error_lines(records)
+    if errors:
+        # The token records are kept: project analysis counts them even when some characters were not recognized
+        return RecordOutput(f"Operator & Delimiter Recognizer Error:\n{errors}", records)
+    tokens = {category: [] for category, _ in _TOKEN_CATEGORIES}
+    for record in records:
+        if record["type"] == "token":
+            tokens[record["category"]].append(record["text"])
+    summary = "\n".join(f"- {label}: {', '.join(tokens[category])}" for category, label in _TOKEN_CATEGORIES)
+    return RecordOutput(summary + "\n", records)
 
-def parser_action_printer(c_code):
-    _compile_parser_action_printer()
+
+def operator_delimiter_recognizer(c_code):
+    return _drive_session(_operator_delimiter_recognizer_session(c_code))
+
+
+async def operator_delimiter_recognizer_async(c_code):
+    return await _drive_session_async(_operator_delimiter_recognizer_session(c_code))
+
+
+def _parser_action_printer_session(c_code):
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'parser_action_printer'))
     if _PARSER_ACTION_PRINTER_COMPILE_ERROR:
         return f"Error: {_PARSER_ACTION_PRINTER_COMPILE_ERROR}"
     if not _PARSER_ACTION_PRINTER_EXECUTABLE:
         return "Parser Action Printer is not ready (compilation failed or not attempted)."
 
-    stdout, stderr = run_flex_bison_program(_PARSER_ACTION_PRINTER_EXECUTABLE, c_code)
+    stdout, stderr = yield ('flex_bison', _PARSER_ACTION_PRINTER_EXECUTABLE, c_code)
     if stderr:
         return f"Parser Action Printer Error:\n{stderr}"
-    
-    return stdout
+    try:
+        records = decode_records(stdout)
+    except RecordDecodeError as e:
+        return f"Parser Action Printer Error:\n{e}\nRaw output:\n{stdout}"
+
+    errors = _error_lines(records)
+    if errors:
+        return f"Parser Action Printer Error:\n{errors}"
+    lines = [
+        f"- Declare {record['specifiers']} {record['name']}\n"
+        for record in records if record["type"] == "declare"
+    ]
+    return RecordOutput("".join(lines), records)
+
+
+def parser_action_printer(c_code):
+    return _drive_session(_parser_action_printer_session(c_code))
+
+
+async def parser_action_printer_async(c_code):
+    return await _drive_session_async(_parser_action_printer_session(c_code))
+
 
 def compiler_error_classifier(input_text):
-    print(f"DEBUG: Input text received by compiler_error_classifier:\n'''{input_text}'''") # DEBUG LINE
+    logger.debug("compiler_error_classifier received %d characters", len(input_text))
     # Split the input into C code and error message
     parts = input_text.split("Error:", 1)
     if len(parts) < 2:
@@ -599,9 +1081,11 @@ def compiler_error_classifier(input_text):
     explanation = "No detailed explanation available."
 
     # --- Rule-based classification based on common C compiler errors ---
+    # One scan of the message picks the rule; see compiler_diagnostics.py
+    rule, subject = classify_message(compiler_error_message)
 
     # Syntax Error: Missing semicolon
-    if re.search(r"expected ';'", compiler_error_message):
+    if rule == 'missing_semicolon':
         error_type = "Syntax Error"
         cause = "A semicolon is missing at the end of a statement."
         # Attempt to find the line before the error message, assuming it refers to the line it expects a semicolon.
@@ -619,12 +1103,11 @@ def compiler_error_classifier(input_text):
         explanation = "C language requires most statements to be terminated by a semicolon to indicate their end."
 
     # Syntax Error: Undeclared identifier
-    elif re.search(r"undeclared identifier", compiler_error_message):
+    elif rule == 'undeclared_identifier':
         error_type = "Semantic Error" # Often caught by compiler, but semantically it's a naming issue
         cause = "A variable or function is used without being declared first."
-        match = re.search(r"undeclared identifier '([^']+)'", compiler_error_message)
-        if match:
-            identifier = match.group(1)
+        if subject:
+            identifier = subject
             location = f"Use of undeclared identifier '{identifier}'"
             fix = f"Declare '{identifier}' before using it, or ensure it's spelled correctly."
             explanation = "All variables and functions in C must be declared with their type before they can be used."
@@ -634,7 +1117,7 @@ def compiler_error_classifier(input_text):
             explanation = "C requires explicit declarations for all names."
 
     # Syntax Error: Expected expression (e.g., int a = ;)
-    elif re.search(r"expected expression before", compiler_error_message) and re.search(r"=", c_code_snippet):
+    elif rule == 'expected_expression' and "=" in c_code_snippet:
         error_type = "Syntax Error"
         cause = "An assignment operator (=) is used, but no value is provided on the right-hand side."
         match = re.search(r":(\d+):\d+:", compiler_error_message) # Try to find line from error
@@ -651,7 +1134,7 @@ def compiler_error_classifier(input_text):
         explanation = "The assignment operator expects an expression to its right. Providing a value or removing the operator corrects the syntax."
     
     # Semantic/Type Error: Type mismatch in assignment or function call
-    elif re.search(r"conflicting types for", compiler_error_message) or re.search(r"incompatible types", compiler_error_message):
+    elif rule == 'type_mismatch':
         error_type = "Semantic Error"
         cause = "A variable or function is being used with a type that is different from its declaration or expectation."
         location = "Assignment or function call with type mismatch."
@@ -659,7 +1142,7 @@ def compiler_error_classifier(input_text):
         explanation = "C is a strongly-typed language. Data types must match or be compatible for assignments and function arguments."
 
     # Syntax Error: Missing closing parenthesis
-    elif re.search(r"expected '\)' before", compiler_error_message):
+    elif rule == 'missing_parenthesis':
         error_type = "Syntax Error"
         cause = "A closing parenthesis is missing, often in a function call, conditional statement (if/while), or expression."
         location = "Expression or statement missing a closing parenthesis."
@@ -667,18 +1150,17 @@ def compiler_error_classifier(input_text):
         explanation = "Parentheses are used in C for grouping expressions and defining function arguments. Each opening parenthesis must have a corresponding closing one."
 
     # Linker Error: Undefined reference
-    elif re.search(r"undefined reference to", compiler_error_message):
+    elif rule == 'undefined_reference':
         error_type = "Linker Error"
         cause = "The program refers to a function or global variable that has been declared but not defined (implemented), or the library containing its definition is not linked."
-        match = re.search(r"undefined reference to `([^']+)'", compiler_error_message)
-        if match:
-            symbol = match.group(1)
+        if subject:
+            symbol = subject
             location = f"Reference to undefined symbol '{symbol}'"
             fix = f"Provide a definition (implementation) for '{symbol}', or link the necessary library using a compiler flag (e.g., `-lm` for math functions)."
             explanation = "Linking combines compiled object files and resolves references to functions and variables. If a definition is missing, the linker cannot complete its task."
 
     # Generic Syntax Error
-    elif re.search(r"syntax error", compiler_error_message):
+    elif rule == 'syntax_error':
         error_type = "Syntax Error"
         cause = "The code violates the grammatical rules of the C language."
         location = "Near the reported error message."
@@ -686,7 +1168,7 @@ def compiler_error_classifier(input_text):
         explanation = "Syntax errors prevent the compiler from understanding the structure of your code."
     
     # Generic Semantic Error
-    elif re.search(r"error:", compiler_error_message) and error_type == "Unknown":
+    elif "error:" in compiler_error_message and error_type == "Unknown":
         error_type = "Semantic Error"
         cause = "The code is grammatically correct but violates C's type or meaning rules (e.g., using a variable out of scope, incorrect types in operations)."
         location = "General location indicated by compiler error."
@@ -711,21 +1193,143 @@ def compiler_error_classifier(input_text):
 
     return "\n".join(output)
 
-def semantic_action_simulator(c_code):
-    _compile_semantic_action_simulator()
+
+def compiler_log_classifier(log_text):
+    """
+    Classifies every diagnostic in a complete compiler/linker log.
+
+    Args:
+        log_text (str): Build output as gcc, clang or ld print it.
+
+    Returns:
+        RecordOutput: Counts by error type followed by one line per
+            diagnostic; the records are one "diagnostic" per entry and a
+            final "summary" with the counts.
+    """
+    diagnostics, counts = classify_compiler_log(log_text)
+    if not diagnostics:
+        return "No compiler diagnostics found in the log."
+
+    output = [f"Diagnostics: {len(diagnostics)}"]
+    for error_type, count in counts.most_common():
+        output.append(f"- {error_type}: {count}")
+    output.append("")
+    for diagnostic in diagnostics:
+        position = diagnostic['file']
+        if diagnostic['line'] is not None:
+            position += f":{diagnostic['line']}"
+            if diagnostic['column'] is not None:
+                position += f":{diagnostic['column']}"
+        output.append(f"{position}: {diagnostic['error_type']} ({diagnostic['rule']}): {diagnostic['message']}")
+
+    records = [{'type': 'diagnostic', **diagnostic} for diagnostic in diagnostics]
+    records.append({'type': 'summary', 'total': len(diagnostics), 'counts': dict(counts)})
+    return RecordOutput("\n".join(output), records)
+
+def _format_assigned_value(record):
+    # Formats an "assign" record's value the way C's printf did: %d, %.2f or '%c'
+    value = record["value"]
+    if record["value_type"] == "float":
+        return "nan" if value is None else f"{value:.2f}"
+    if record["value_type"] == "char":
+        return f"'{value}'"
+    return str(value)
+
+
+def _semantic_action_simulator_session(c_code):
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'semantic_action_simulator'))
     if _SEMANTIC_ACTION_SIMULATOR_COMPILE_ERROR:
         return f"Error: {_SEMANTIC_ACTION_SIMULATOR_COMPILE_ERROR}"
     if not _SEMANTIC_ACTION_SIMULATOR_EXECUTABLE:
         return "Semantic Action Simulator is not ready (compilation failed or not attempted)."
 
-    stdout, stderr = run_flex_bison_program(_SEMANTIC_ACTION_SIMULATOR_EXECUTABLE, c_code)
+    stdout, stderr = yield ('flex_bison', _SEMANTIC_ACTION_SIMULATOR_EXECUTABLE, c_code)
     if stderr:
         return f"Semantic Action Simulator Error:\n{stderr}"
-    
-    return stdout
-def execute_single_command(command, variables):
-    output = ""
-    
+    try:
+        records = decode_records(stdout)
+    except RecordDecodeError as e:
+        return f"Semantic Action Simulator Error:\n{e}\nRaw output:\n{stdout}"
+
+    errors = _error_lines(records)
+    if errors:
+        return f"Semantic Action Simulator Error:\n{errors}"
+    lines = []
+    for record in records:
+        if record["type"] == "assign":
+            lines.append(f"- {record['name']} = {_format_assigned_value(record)}\n")
+    return RecordOutput("".join(lines), records)
+
+
+def semantic_action_simulator(c_code):
+    return _drive_session(_semantic_action_simulator_session(c_code))
+
+
+async def semantic_action_simulator_async(c_code):
+    return await _drive_session_async(_semantic_action_simulator_session(c_code))
+
+# --- Command language: one-pass classification into instructions ---
+# Each line is classified by its first word through a dispatch table, so at
+# most one precompiled pattern runs per line. process_command_language turns
+# a whole script into a list of instructions before running any of them.
+_COMMAND_PATTERNS = {
+    'set': re.compile(r"set (\w+) to (.+)", re.IGNORECASE),
+    'show': re.compile(r"show (\w+)", re.IGNORECASE),
+    'add': re.compile(r"add (.+) and (.+)", re.IGNORECASE),
+    'multiply': re.compile(r"multiply (.+) and (.+)", re.IGNORECASE),
+    'divide': re.compile(r"divide (.+) by (.+)", re.IGNORECASE),
+    'if': re.compile(r"if (.+?) then print (.+)", re.IGNORECASE),
+}
+_CONDITION_PATTERN = re.compile(r"(\w+)\s*([><=!]+)\s*(.+)")
+_BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+_LINE_COMMENT_PATTERN = re.compile(r'//.*')
+
+_OP_NOOP, _OP_SET, _OP_SHOW, _OP_ARITH, _OP_IF, _OP_EXIT, _OP_UNKNOWN = range(7)
+
+
+def _strip_line_comments(line):
+    # Same result as strip_comments(line), but skips the regexes when no comment marker is present
+    if '/*' in line:
+        line = _BLOCK_COMMENT_PATTERN.sub('', line)
+    if '//' in line:
+        line = _LINE_COMMENT_PATTERN.sub('', line)
+    return line
+
+
+def _compile_command(command):
+    """Classifies one command line into an (opcode, command, *operands) instruction."""
+    if not command or command.startswith('//') or command.startswith('#'):
+        return (_OP_NOOP, command)
+
+    keyword = command.split(' ', 1)[0].casefold()
+    pattern = _COMMAND_PATTERNS.get(keyword)
+    match = pattern.match(command) if pattern else None
+
+    if match:
+        if keyword == 'set':
+            var, val = match.groups()
+            return (_OP_SET, command, var, val.strip())
+        if keyword == 'show':
+            return (_OP_SHOW, command, match.group(1))
+        if keyword == 'if':
+            condition, text = match.groups()
+            cond_match = _CONDITION_PATTERN.match(condition)
+            if cond_match:
+                return (_OP_IF, command, condition, *cond_match.groups(), text.strip())
+            return (_OP_IF, command, condition, None, None, None, None)
+        a_str, b_str = match.groups()
+        return (_OP_ARITH, command, keyword, a_str, b_str)
+
+    if command.lower() == "exit":
+        return (_OP_EXIT, command)
+
+    return (_OP_UNKNOWN, command)
+
+
+def _run_instruction(instruction, variables):
+    """Executes one compiled instruction and returns its output text."""
+    opcode, command = instruction[0], instruction[1]
+
     # Helper to resolve value (either a number or a variable)
     def _get_val(v):
         v = v.strip()
@@ -736,101 +1340,78 @@ def execute_single_command(command, variables):
                 raise ValueError(f"Variable '{v}' is not a number.")
         return float(v)
 
-    if not command or command.startswith('//') or command.startswith('#'):
-        return {"output": "", "new_variables": variables}
+    if opcode == _OP_NOOP:
+        return ""
 
     # "set <variable> to <value>"
-    match = re.match(r"set (\w+) to (.+)", command, re.IGNORECASE)
-    if match:
-        var, val = match.groups()
-        variables[var] = val.strip()
-        output = f"Set {var} = {val.strip()}"
-        return {"output": output, "new_variables": variables}
+    if opcode == _OP_SET:
+        var, val = instruction[2], instruction[3]
+        variables[var] = val
+        return f"Set {var} = {val}"
 
     # "show <variable>"
-    match = re.match(r"show (\w+)", command, re.IGNORECASE)
-    if match:
-        var = match.group(1)
+    if opcode == _OP_SHOW:
+        var = instruction[2]
         if var in variables:
-            output = f"{var} = {variables[var]}"
-        else:
-            output = f"Error: Variable '{var}' not found."
-        return {"output": output, "new_variables": variables}
-
-    # "add <a> and <b>"
-    match = re.match(r"add (.+) and (.+)", command, re.IGNORECASE)
-    if match:
-        a_str, b_str = match.groups()
-        try:
-            a = _get_val(a_str)
-            b = _get_val(b_str)
-            output = str(a + b)
-        except (ValueError, KeyError) as e:
-            output = f"Error in add: Invalid number or variable in '{command}'."
-        return {"output": output, "new_variables": variables}
-
-    # "multiply <a> and <b>"
-    match = re.match(r"multiply (.+) and (.+)", command, re.IGNORECASE)
-    if match:
-        a_str, b_str = match.groups()
-        try:
-            a = _get_val(a_str)
-            b = _get_val(b_str)
-            output = str(a * b)
-        except (ValueError, KeyError) as e:
-            output = f"Error in multiply: Invalid number or variable in '{command}'."
-        return {"output": output, "new_variables": variables}
+            return f"{var} = {variables[var]}"
+        return f"Error: Variable '{var}' not found."
 
-    # "divide <a> by <b>"
-    match = re.match(r"divide (.+) by (.+)", command, re.IGNORECASE)
-    if match:
-        a_str, b_str = match.groups()
+    # "add <a> and <b>", "multiply <a> and <b>", "divide <a> by <b>"
+    if opcode == _OP_ARITH:
+        keyword, a_str, b_str = instruction[2], instruction[3], instruction[4]
         try:
             a = _get_val(a_str)
             b = _get_val(b_str)
+            if keyword == 'add':
+                return str(a + b)
+            if keyword == 'multiply':
+                return str(a * b)
             if b == 0:
-                output = "Error: Division by zero."
-            else:
-                output = str(a / b)
-        except (ValueError, KeyError) as e:
-            output = f"Error in divide: Invalid number or variable in '{command}'."
-        return {"output": output, "new_variables": variables}
+                return "Error: Division by zero."
+            return str(a / b)
+        except (ValueError, KeyError):
+            return f"Error in {keyword}: Invalid number or variable in '{command}'."
 
     # "if <condition> then print <text>"
-    match = re.match(r"if (.+?) then print (.+)", command, re.IGNORECASE)
-    if match:
-        condition, text = match.groups()
-        cond_match = re.match(r"(\w+)\s*([><=!]+)\s*(.+)", condition)
-        if cond_match:
-            var, op, val = cond_match.groups()
-            try:
-                var_val = _get_val(var)
-                comp_val = _get_val(val)
-                result = False
-                if op == '>': result = var_val > comp_val
-                elif op == '<': result = var_val < comp_val
-                elif op == '==': result = var_val == comp_val
-                elif op == '!=': result = var_val != comp_val
-                
-                if result:
-                    output = text.strip()
-            except (ValueError, KeyError):
-                output = f"Error in condition: Invalid number or variable in '{condition}'."
-        else:
-            output = f"Error: Unsupported condition format in '{condition}'."
-        return {"output": output, "new_variables": variables}
+    if opcode == _OP_IF:
+        condition, var, op, val, text = instruction[2:]
+        if var is None:
+            return f"Error: Unsupported condition format in '{condition}'."
+        try:
+            var_val = _get_val(var)
+            comp_val = _get_val(val)
+            result = False
+            if op == '>': result = var_val > comp_val
+            elif op == '<': result = var_val < comp_val
+            elif op == '==': result = var_val == comp_val
+            elif op == '!=': result = var_val != comp_val
+            return text if result else ""
+        except (ValueError, KeyError):
+            return f"Error in condition: Invalid number or variable in '{condition}'."
 
     # "exit"
-    if command.lower() == "exit":
-        output = "Exiting..."
-        return {"output": output, "new_variables": variables}
+    if opcode == _OP_EXIT:
+        return "Exiting..."
 
     # If no command matched
-    output = f"Error: Unknown command '{command}'"
+    return f"Error: Unknown command '{command}'"
+
+
+def run_cli_command(command, variables):
+    """
+    Runs one CLI command against `variables` and returns its output.
+
+    `variables` only needs `in`, item lookup and item assignment, so a
+    server-side session can pass a view of its table (see cli_sessions.py).
+    """
+    return _run_instruction(_compile_command(command), variables)
+
+def execute_single_command(command, variables):
+    output = run_cli_command(command, variables)
     return {"output": output, "new_variables": variables}
 
-def boolean_expression_evaluator(c_code):
-    _compile_boolean_evaluator()
+def _boolean_evaluator_session(c_code):
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'boolean_expression_evaluator'))
     if _BOOLEAN_EVALUATOR_COMPILE_ERROR:
         return f"Error: {_BOOLEAN_EVALUATOR_COMPILE_ERROR}"
     if not _BOOLEAN_EVALUATOR_EXECUTABLE:
@@ -858,14 +1439,8 @@ def boolean_expression_evaluator(c_code):
         if not input_for_c.strip():
             return "No valid boolean expressions found or parsed from the input."
 
-        process = subprocess.run(
-            [_BOOLEAN_EVALUATOR_EXECUTABLE],
-            input=input_for_c, # Pass the formatted input to the C program
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=15
-        )
+        # Pass the formatted input to the C program
+        process = yield ('run', [_BOOLEAN_EVALUATOR_EXECUTABLE], input_for_c, 15)
         return process.stdout
     except subprocess.CalledProcessError as e:
         # If the C program itself returns a non-zero exit code
@@ -878,8 +1453,16 @@ def boolean_expression_evaluator(c_code):
         return f"An unexpected error occurred during Boolean Evaluator execution: {e}"
 
 
-def flex_bison_arithmetic_calculator(c_code):
-    _compile_arithmetic_calculator()
+def boolean_expression_evaluator(c_code):
+    return _drive_session(_boolean_evaluator_session(c_code))
+
+
+async def boolean_expression_evaluator_async(c_code):
+    return await _drive_session_async(_boolean_evaluator_session(c_code))
+
+
+def _arithmetic_calculator_session(c_code):
+    yield ('call', partial(ANALYZER_BUILDS.ensure, 'flex_bison_arithmetic_calculator'))
     if _ARITHMETIC_CALCULATOR_COMPILE_ERROR:
         return f"Error: {_ARITHMETIC_CALCULATOR_COMPILE_ERROR}"
     if not _ARITHMETIC_CALCULATOR_EXECUTABLE:
@@ -893,28 +1476,36 @@ def flex_bison_arithmetic_calculator(c_code):
         if not input_for_c.strip(): # Check if it's still empty after stripping and adding newline
             return "No arithmetic expressions found in the input."
 
-        process = subprocess.run(
-            [_ARITHMETIC_CALCULATOR_EXECUTABLE],
-            input=input_for_c,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=15
-        )
-
-        output = process.stdout
-        error_output = process.stderr
-
-        if error_output:
-            filtered_error = "\n".join([line for line in error_output.splitlines() if "memory exhausted" not in line and "syntax error" in line])
-            if filtered_error:
-                output += f"\nParser Errors:\n{filtered_error}"
+        process = yield ('run', [_ARITHMETIC_CALCULATOR_EXECUTABLE], input_for_c, 15)
 
-        if process.returncode != 0 and not error_output:
-            output += f"\nProgram exited with non-zero code: {process.returncode} (no specific error message from stderr)."
-
-
-        return output
+        try:
+            records = decode_records(process.stdout)
+        except RecordDecodeError as e:
+            return f"Arithmetic Calculator Error:\n{e}\nRaw output:\n{process.stdout}"
+
+        lines = []
+        for record in records:
+            if record["type"] == "result":
+                value = record["value"]
+                lines.append("= nan" if value is None else f"= {value:f}")
+            elif record["type"] == "invalid":
+                lines.append("Error: Invalid expression")
+            elif record["type"] == "exit":
+                lines.append("Exiting...")
+        output = "".join(line + "\n" for line in lines)
+
+        # Only syntax errors are shown, as when they were filtered from stderr; a
+        # division by zero ends the run without a line of its own
+        errors = [record for record in records if record["type"] == "error"]
+        syntax_errors = [f"Error: {record['message']}" for record in errors
+                         if "syntax error" in record["message"] and "memory exhausted" not in record["message"]]
+        if syntax_errors:
+            output += "\nParser Errors:\n" + "\n".join(syntax_errors)
+
+        if process.returncode != 0 and not errors:
+            output += f"\nProgram exited with non-zero code: {process.returncode} (no error was reported)."
+
+        return RecordOutput(output, records)
     except subprocess.TimeoutExpired:
         return "Error: Arithmetic Calculator execution timed out."
     except FileNotFoundError:
@@ -922,26 +1513,29 @@ def flex_bison_arithmetic_calculator(c_code):
     except Exception as e:
         return f"An unexpected error occurred during Arithmetic Calculator execution: {e}"
 
+
+def flex_bison_arithmetic_calculator(c_code):
+    return _drive_session(_arithmetic_calculator_session(c_code))
+
+
+async def flex_bison_arithmetic_calculator_async(c_code):
+    return await _drive_session_async(_arithmetic_calculator_session(c_code))
+
 # NEW FUNCTION FOR COMMAND LANGUAGE INTERPRETER
 def process_command_language(c_code):
     output_lines = []
     variables = {} # Persist variables across commands
-    
-    # Split input into lines and process each
-    lines = c_code.splitlines()
-    
-    for line in lines:
-        cleaned_line = strip_comments(line).strip()
-        
-        if not cleaned_line: # Skip empty lines after stripping comments
-            continue
-            
-        result = execute_single_command(cleaned_line, variables)
-        
-        # execute_single_command returns a dictionary: {"output": ..., "new_variables": ...}
-        command_output = result.get("output", "").strip()
-        variables = result.get("new_variables", variables) # Update variables for next command
-        
+
+    # Classify every line up front, then run the instruction list
+    instructions = []
+    for line in c_code.splitlines():
+        cleaned_line = _strip_line_comments(line).strip()
+        if cleaned_line: # Skip empty lines after stripping comments
+            instructions.append(_compile_command(cleaned_line))
+
+    for instruction in instructions:
+        command_output = _run_instruction(instruction, variables).strip()
+
         if command_output:
             output_lines.append(command_output)
             
@@ -949,3 +1543,239 @@ def process_command_language(c_code):
             break # Stop processing if exit command is encountered
             
     return "\n".join(output_lines)
+
+
+# --- Analyzer builds ---
+# Sessions wait on these instead of calling the _compile_* functions
+# directly, so concurrent first requests share one build, and the web front
+# ends start them all at startup (start_background_builds).
+ANALYZER_BUILDS = BuildRegistry()
+ANALYZER_BUILDS.register('reverse_concatenate', _compile_var_extractor,
+                         lambda: (_VAR_EXTRACTOR_EXECUTABLE, _VAR_EXTRACTOR_COMPILE_ERROR))
+ANALYZER_BUILDS.register('operator_delimiter_recognizer', _compile_operator_delimiter_recognizer,
+                         lambda: (_OPERATOR_DELIMITER_RECOGNIZER_EXECUTABLE, _OPERATOR_DELIMITER_RECOGNIZER_COMPILE_ERROR))
+ANALYZER_BUILDS.register('parser_action_printer', _compile_parser_action_printer,
+                         lambda: (_PARSER_ACTION_PRINTER_EXECUTABLE, _PARSER_ACTION_PRINTER_COMPILE_ERROR))
+ANALYZER_BUILDS.register('semantic_action_simulator', _compile_semantic_action_simulator,
+                         lambda: (_SEMANTIC_ACTION_SIMULATOR_EXECUTABLE, _SEMANTIC_ACTION_SIMULATOR_COMPILE_ERROR))
+ANALYZER_BUILDS.register('boolean_expression_evaluator', _compile_boolean_evaluator,
+                         lambda: (_BOOLEAN_EVALUATOR_EXECUTABLE, _BOOLEAN_EVALUATOR_COMPILE_ERROR))
+ANALYZER_BUILDS.register('flex_bison_arithmetic_calculator', _compile_arithmetic_calculator,
+                         lambda: (_ARITHMETIC_CALCULATOR_EXECUTABLE, _ARITHMETIC_CALCULATOR_COMPILE_ERROR))
+
+
+def start_background_builds():
+    """Starts building every compiled analyzer in parallel, unless PRECOMPILE_AT_STARTUP=0."""
+    # Spawned worker processes (regex matching, project analysis) re-import the
+    # server module; only the server process itself builds
+    if PRECOMPILE_AT_STARTUP and multiprocessing.parent_process() is None:
+        ANALYZER_BUILDS.start_all()
+
+
+def analyzer_readiness():
+    """Returns (ready, {option: build state}); see BuildRegistry.readiness."""
+    return ANALYZER_BUILDS.readiness()
+
+
+# --- Option dispatch shared by the web front ends ---
+# Every option run_option understands
+OPTIONS = (
+    'run_full_c_code', 'regex_matcher', 'email_parser', 'normal_text_analyzer', 'reverse_concatenate',
+    'comment_detector', 'word_frequency_calculator', 'calculator', 'flex_bison_arithmetic_calculator',
+    'operator_delimiter_recognizer', 'parser_action_printer', 'compiler_error_classifier',
+    'compiler_log_classifier', 'semantic_action_simulator', 'command_language_interpreter',
+    'boolean_expression_evaluator',
+)
+
+
+def run_option(selected_option, data):
+    """
+    Runs one analyzer selected by `selected_option` on the fields in `data`.
+
+    Returns the analyzer's output string; exceptions propagate to the caller.
+    """
+    regex_pattern = data.get('pattern', '') # For regex matcher, if applicable
+
+    result = "Invalid option selected."
+
+    if selected_option == 'run_full_c_code':
+        c_code = data.get('c_code', '')
+        user_input_string = data.get('user_input_string', '')
+        result = run_full_c_code(c_code, user_input_string) # Pass both arguments
+    elif selected_option == 'regex_matcher':
+        user_input = data.get('input', '') # Get 'input' for regex_matcher
+        if not regex_pattern:
+            result = "Please provide a regex pattern in the input for Regex Matcher."
+        else:
+            result = regex_matcher(user_input, regex_pattern, data.get('engine', 'auto'))
+    elif selected_option == 'email_parser':
+        user_input = data.get('input', '')
+        if _wants_bulk(data):
+            result = email_parser_bulk(user_input.splitlines())
+        else:
+            result = email_parser(user_input)
+    elif selected_option == 'normal_text_analyzer':
+        user_input = data.get('input', '')
+        result = normal_text_analyzer(user_input)
+    elif selected_option == 'reverse_concatenate':
+        user_input = data.get('input', '')
+        result = reverse_concatenate(user_input)
+    elif selected_option == 'comment_detector':
+        user_input = data.get('input', '')
+        result = comment_detector(user_input)
+    elif selected_option == 'word_frequency_calculator':
+        user_input = data.get('input', '')
+        if _wants_top_k(data):
+            result = word_frequency_calculator_top_k(user_input, data)
+        else:
+            result = word_frequency_calculator(user_input)
+    elif selected_option == 'calculator':
+        user_input = data.get('input', '')
+        result = calculator(user_input)
+    elif selected_option == 'flex_bison_arithmetic_calculator':
+        user_input = data.get('input', '')
+        result = flex_bison_arithmetic_calculator(user_input)
+    elif selected_option == 'operator_delimiter_recognizer':
+        user_input = data.get('input', '')
+        result = operator_delimiter_recognizer(user_input)
+    elif selected_option == 'parser_action_printer':
+        user_input = data.get('input', '')
+        result = parser_action_printer(user_input)
+    elif selected_option == 'compiler_error_classifier':
+        user_input = data.get('input', '')
+        result = compiler_error_classifier(user_input)
+    elif selected_option == 'compiler_log_classifier':
+        user_input = data.get('input', '')
+        result = compiler_log_classifier(user_input)
+    elif selected_option == 'semantic_action_simulator':
+        user_input = data.get('input', '')
+        result = semantic_action_simulator(user_input)
+    elif selected_option == 'command_language_interpreter':
+        user_input = data.get('input', '')
+        result = process_command_language(user_input)
+    elif selected_option == 'boolean_expression_evaluator':
+        user_input = data.get('input', '')
+        result = boolean_expression_evaluator(user_input)
+
+    else:
+        result = f"Unknown option: {selected_option}"
+
+    return result
+
+
+def stream_option(selected_option, data):
+    """
+    Streaming counterpart of run_option; yields (event, text) pairs.
+
+    run_full_c_code streams its build status and program output as they
+    happen (see stream_full_c_code). The other analyzers post-process a
+    finished result, so they emit it as a single 'output' event.
+    """
+    if selected_option == 'run_full_c_code':
+        yield from stream_full_c_code(data.get('c_code', ''), data.get('user_input_string', ''))
+    else:
+        yield ('output', run_option(selected_option, data))
+
+
+# Options whose work is mostly waiting on child processes; the async server
+# awaits these directly instead of parking a thread on them.
+_ASYNC_OPTION_HANDLERS = {
+    'reverse_concatenate': reverse_concatenate_async,
+    'flex_bison_arithmetic_calculator': flex_bison_arithmetic_calculator_async,
+    'operator_delimiter_recognizer': operator_delimiter_recognizer_async,
+    'parser_action_printer': parser_action_printer_async,
+    'semantic_action_simulator': semantic_action_simulator_async,
+    'boolean_expression_evaluator': boolean_expression_evaluator_async,
+}
+
+
+# --- Uploaded files ---
+# These analyzers scan an uploaded file through mmap, and the Flex/Bison
+# ones hand it to the executable as stdin, so the input never becomes a
+# Python string (see file_analysis.py). Every other option decodes the file
+# and goes through run_option, up to UPLOAD_TEXT_MAX_BYTES.
+UPLOAD_TEXT_MAX_BYTES = int(os.environ.get('UPLOAD_TEXT_MAX_BYTES', str(16 * 1024 * 1024)))
+
+
+def comment_detector_file(file):
+    with file_analysis.mapped(file) as buffer:
+        single_line_comments = [f"- {comment}" for comment in file_analysis.iter_line_comments(buffer)]
+        multi_line_comments = ["- " + comment.replace('\n', ' ') for comment in file_analysis.iter_block_comments(buffer)]
+    return _comment_report(single_line_comments, multi_line_comments)
+
+
+def email_parser_file(file):
+    emails = set()
+    for text in file_analysis.iter_printf_strings(file):
+        emails.update(re.findall(_EMAIL_REGEX, text))
+    return _email_report(emails)
+
+
+def word_frequency_calculator_file(file):
+    from collections import Counter
+
+    word_counts = Counter()
+    found_printf = False
+    for text in file_analysis.iter_printf_strings(file):
+        found_printf = True
+        word_counts.update(_WORD_PATTERN.findall(text.lower()))
+    if not found_printf:
+        return "No text inside printf statements found to analyze."
+    if not word_counts:
+        return "No words found for frequency calculation."
+    return _word_frequency_report(word_counts)
+
+
+_FILE_OPTION_HANDLERS = {
+    'comment_detector': comment_detector_file,
+    'email_parser': email_parser_file,
+    'word_frequency_calculator': word_frequency_calculator_file,
+    # Sessions pass their input straight to the executable, which reads the file as stdin
+    'reverse_concatenate': reverse_concatenate,
+    'operator_delimiter_recognizer': operator_delimiter_recognizer,
+    'parser_action_printer': parser_action_printer,
+    'semantic_action_simulator': semantic_action_simulator,
+}
+
+
+def run_option_file(selected_option, file, data):
+    """
+    Runs `selected_option` on an uploaded file.
+
+    Args:
+        selected_option (str): The analyzer to run.
+        file: A seekable binary file, e.g. from file_analysis.spool_upload.
+        data (dict): The other request fields (for example 'pattern').
+
+    Returns:
+        str: The analyzer output.
+
+    Raises:
+        file_analysis.UploadTooLarge: If the option has no streaming path and
+            the file is larger than UPLOAD_TEXT_MAX_BYTES.
+    """
+    if selected_option == 'word_frequency_calculator' and _wants_top_k(data):
+        return _word_frequency_top_k(file_analysis.iter_printf_strings(file), data)
+    if selected_option == 'email_parser' and _wants_bulk(data):
+        return email_parser_bulk(file_analysis.iter_lines(file))
+    handler = _FILE_OPTION_HANDLERS.get(selected_option)
+    if handler is not None:
+        return handler(file)
+    text = file_analysis.read_text(file, UPLOAD_TEXT_MAX_BYTES)
+    field = 'c_code' if selected_option == 'run_full_c_code' else 'input'
+    return run_option(selected_option, dict(data, **{field: text}))
+
+
+async def run_option_async(selected_option, data):
+    """
+    Async counterpart of run_option for asyncio servers.
+
+    Analyzers backed by child processes run without blocking the event loop;
+    the pure-Python ones run in the default thread pool.
+    """
+    if selected_option == 'run_full_c_code':
+        return await run_full_c_code_async(data.get('c_code', ''), data.get('user_input_string', ''))
+    handler = _ASYNC_OPTION_HANDLERS.get(selected_option)
+    if handler is not None:
+        return await handler(data.get('input', ''))
+    return await asyncio.to_thread(run_option, selected_option, data)
@@ -0,0 +1,462 @@
+import re
+
+# Linear-time regular expressions for regex_matcher's 'linear' engine.
+#
+# A pattern is parsed into a small AST, compiled to a Thompson NFA program
+# and run by a Pike VM: every thread advances in lock step over the text,
+# one character at a time, and at most one thread per program counter is
+# kept per position. A search therefore takes O(n·m) time for text length
+# n and program size m, whatever the pattern, with no backtracking.
+# Threads are kept in priority order, so matches follow Python's
+# leftmost-first rules and findall() returns what re.findall() returns.
+#
+# Supported: literals and escapes, `.`, classes with ranges and negation,
+# \d \w \s \D \W \S, ^ $ \A \Z \b \B, groups (capturing, (?:...) and
+# (?P<name>...)), alternation, and greedy or lazy * + ? {m,n}. Anything
+# else raises Unsupported: backreferences, lookaround, flags, possessive
+# quantifiers and atomic groups. Callers then use the re module instead.
+
+LINEAR_MAX_PROGRAM = 20000 # Instructions; bounds what {m,n} may expand to
+
+
+class Unsupported(ValueError):
+    """Raised for patterns outside the subset the linear engine handles."""
+
+
+# --- Character predicates (the str semantics of Python's re) ---
+
+def _is_digit(ch):
+    return ch.isdecimal()
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _is_space(ch):
+    return ch.isspace()
+
+
+_CLASS_ESCAPES = {'d': _is_digit, 'w': _is_word, 's': _is_space}
+_CHAR_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v', 'a': '\a', '0': '\0'}
+_SPECIAL = set('.^$*+?{}[]\\|()')
+
+
+# --- Parser ---
+# AST nodes are tuples: ('char', c), ('set', items, negated), ('any',),
+# ('cat', nodes), ('alt', nodes), ('repeat', node, min, max or None, greedy),
+# ('group', index, node) and ('assert', kind).
+
+class _Parser:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.position = 0
+        self.groups = 0
+
+    def parse(self):
+        node = self._alternation()
+        if self.position < len(self.pattern):
+            raise Unsupported(f"Unexpected '{self.pattern[self.position]}' at position {self.position}")
+        return node
+
+    def _peek(self):
+        return self.pattern[self.position] if self.position < len(self.pattern) else None
+
+    def _next(self):
+        ch = self._peek()
+        if ch is None:
+            raise Unsupported("Unexpected end of pattern")
+        self.position += 1
+        return ch
+
+    def _alternation(self):
+        branches = [self._sequence()]
+        while self._peek() == '|':
+            self.position += 1
+            branches.append(self._sequence())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def _sequence(self):
+        items = []
+        while self._peek() is not None and self._peek() not in '|)':
+            items.append(self._quantified())
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def _quantified(self):
+        atom = self._atom()
+        while True:
+            bounds = self._quantifier()
+            if bounds is None:
+                return atom
+            if atom[0] == 'assert':
+                raise Unsupported("Quantified assertions are not supported")
+            low, high = bounds
+            if high != 1 and _nullable(atom):
+                # re stops a loop after an iteration that matched nothing; a
+                # Pike VM cannot track that per thread, so results would differ
+                raise Unsupported("Repeating a subpattern that can match the empty string is not supported")
+            greedy = True
+            if self._peek() == '?':
+                self.position += 1
+                greedy = False
+            elif self._peek() == '+':
+                raise Unsupported("Possessive quantifiers are not supported")
+            atom = ('repeat', atom, low, high, greedy)
+            if self._peek() in ('*', '+', '?', '{') and self._quantifier_ahead():
+                raise Unsupported("Multiple repeat")
+
+    def _quantifier_ahead(self):
+        saved = self.position
+        try:
+            return self._quantifier() is not None
+        finally:
+            self.position = saved
+
+    def _quantifier(self):
+        ch = self._peek()
+        if ch == '*':
+            self.position += 1
+            return 0, None
+        if ch == '+':
+            self.position += 1
+            return 1, None
+        if ch == '?':
+            self.position += 1
+            return 0, 1
+        if ch == '{':
+            match = re.compile(r'\{(\d*)(?:(,)(\d*))?\}').match(self.pattern, self.position)
+            if not match or (not match.group(1) and not match.group(2)):
+                return None # A literal '{', as in re
+            low = int(match.group(1)) if match.group(1) else 0
+            if match.group(2):
+                high = int(match.group(3)) if match.group(3) else None
+            else:
+                high = low
+            if high is not None and high < low:
+                raise Unsupported("Minimum repeat greater than maximum")
+            self.position = match.end()
+            return low, high
+        return None
+
+    def _atom(self):
+        ch = self._next()
+        if ch == '(':
+            return self._group()
+        if ch == '[':
+            return self._set()
+        if ch == '.':
+            return ('any',)
+        if ch == '^':
+            return ('assert', 'bol')
+        if ch == '$':
+            return ('assert', 'eol')
+        if ch == '\\':
+            return self._escape()
+        if ch in '*+?':
+            raise Unsupported("Nothing to repeat")
+        return ('char', ch)
+
+    def _group(self):
+        if self._peek() == '?':
+            self.position += 1
+            kind = self._next()
+            if kind == ':':
+                node = self._alternation()
+                self._close_group()
+                return node
+            if kind == 'P' and self._peek() == '<':
+                end = self.pattern.find('>', self.position)
+                if end == -1:
+                    raise Unsupported("Unterminated group name")
+                self.position = end + 1
+            else:
+                raise Unsupported(f"Group extension '(?{kind}' is not supported")
+        self.groups += 1
+        index = self.groups
+        node = self._alternation()
+        self._close_group()
+        return ('group', index, node)
+
+    def _close_group(self):
+        if self._peek() != ')':
+            raise Unsupported("Missing ')'")
+        self.position += 1
+
+    def _escape(self):
+        ch = self._next()
+        if ch in _CLASS_ESCAPES:
+            return ('set', [_CLASS_ESCAPES[ch]], False)
+        if ch.lower() in _CLASS_ESCAPES:
+            return ('set', [_CLASS_ESCAPES[ch.lower()]], True)
+        if ch == 'A':
+            return ('assert', 'start')
+        if ch == 'Z':
+            return ('assert', 'end')
+        if ch == 'b':
+            return ('assert', 'word')
+        if ch == 'B':
+            return ('assert', 'not_word')
+        return ('char', self._escaped_char(ch))
+
+    def _escaped_char(self, ch):
+        if ch in _CHAR_ESCAPES:
+            if ch == '0' and self._peek() is not None and self._peek() in '01234567':
+                raise Unsupported("Octal escapes are not supported")
+            return _CHAR_ESCAPES[ch]
+        if ch in 'xuU':
+            width = {'x': 2, 'u': 4, 'U': 8}[ch]
+            digits = self.pattern[self.position:self.position + width]
+            if len(digits) != width or not all(c in '0123456789abcdefABCDEF' for c in digits):
+                raise Unsupported(f"Incomplete escape \\{ch}")
+            self.position += width
+            return chr(int(digits, 16))
+        if ch.isdigit():
+            raise Unsupported("Backreferences are not supported")
+        if ch.isalnum():
+            raise Unsupported(f"Escape \\{ch} is not supported")
+        return ch
+
+    def _set(self):
+        negated = self._peek() == '^'
+        if negated:
+            self.position += 1
+        items = []
+        first = True
+        while True:
+            ch = self._next()
+            if ch == ']' and not first:
+                break
+            first = False
+            if ch == '[' and self._peek() in (':', '=', '.'):
+                raise Unsupported("POSIX classes are not supported")
+            if ch == '\\':
+                escaped = self._next()
+                if escaped in _CLASS_ESCAPES:
+                    items.append(_CLASS_ESCAPES[escaped])
+                    continue
+                if escaped.lower() in _CLASS_ESCAPES:
+                    predicate = _CLASS_ESCAPES[escaped.lower()]
+                    items.append(lambda c, predicate=predicate: not predicate(c))
+                    continue
+                ch = '\b' if escaped == 'b' else self._escaped_char(escaped)
+            if self._peek() == '-' and self.position + 1 < len(self.pattern) and self.pattern[self.position + 1] != ']':
+                self.position += 1
+                high = self._next()
+                if high == '\\':
+                    escaped = self._next()
+                    if escaped.lower() in _CLASS_ESCAPES:
+                        raise Unsupported("Bad character range")
+                    high = self._escaped_char(escaped)
+                if ord(high) < ord(ch):
+                    raise Unsupported("Bad character range")
+                items.append((ch, high))
+            else:
+                items.append(ch)
+        return ('set', items, negated)
+
+
+def _nullable(node):
+    kind = node[0]
+    if kind == 'assert':
+        return True
+    if kind == 'cat':
+        return all(_nullable(item) for item in node[1])
+    if kind == 'alt':
+        return any(_nullable(item) for item in node[1])
+    if kind == 'group':
+        return _nullable(node[2])
+    if kind == 'repeat':
+        return node[2] == 0 or _nullable(node[1])
+    return False
+
+
+# --- Compiler ---
+# Instructions: ('char', c), ('set', items, negated), ('any',), ('split', x, y)
+# with x preferred, ('jmp', x), ('save', slot), ('assert', kind), ('match',).
+
+class _Compiler:
+    def __init__(self):
+        self.program = []
+
+    def emit(self, instruction):
+        self.program.append(instruction)
+        if len(self.program) > LINEAR_MAX_PROGRAM:
+            raise Unsupported(f"Pattern expands to more than {LINEAR_MAX_PROGRAM} instructions")
+        return len(self.program) - 1
+
+    def compile(self, node):
+        kind = node[0]
+        if kind in ('char', 'set', 'any', 'assert'):
+            self.emit(node)
+        elif kind == 'cat':
+            for item in node[1]:
+                self.compile(item)
+        elif kind == 'alt':
+            jumps = []
+            branches = node[1]
+            for branch in branches[:-1]:
+                split = self.emit(None)
+                self.compile(branch)
+                jumps.append(self.emit(None))
+                self.program[split] = ('split', split + 1, len(self.program))
+            self.compile(branches[-1])
+            for jump in jumps:
+                self.program[jump] = ('jmp', len(self.program))
+        elif kind == 'group':
+            self.emit(('save', 2 * node[1]))
+            self.compile(node[2])
+            self.emit(('save', 2 * node[1] + 1))
+        elif kind == 'repeat':
+            self._repeat(*node[1:])
+
+    def _split(self, split, body, after, greedy):
+        self.program[split] = ('split', body, after) if greedy else ('split', after, body)
+
+    def _repeat(self, node, low, high, greedy):
+        for _ in range(low):
+            self.compile(node)
+        if high is None:
+            # node*: L: split body, end; body; jmp L
+            loop = self.emit(None)
+            self.compile(node)
+            self.emit(('jmp', loop))
+            self._split(loop, loop + 1, len(self.program), greedy)
+            return
+        # (node(node(...)?)?)? for the optional copies
+        splits = []
+        for _ in range(high - low):
+            splits.append(self.emit(None))
+            self.compile(node)
+        for split in splits:
+            self._split(split, split + 1, len(self.program), greedy)
+
+
+class LinearPattern:
+    """A compiled pattern; findall() matches re.findall() for the supported subset."""
+
+    def __init__(self, pattern):
+        parser = _Parser(pattern)
+        tree = parser.parse()
+        compiler = _Compiler()
+        compiler.emit(('save', 0))
+        compiler.compile(tree)
+        compiler.emit(('save', 1))
+        compiler.emit(('match',))
+        self.pattern = pattern
+        self.groups = parser.groups
+        self.program = compiler.program
+
+    def _assert(self, kind, text, position):
+        if kind == 'bol' or kind == 'start':
+            return position == 0
+        if kind == 'eol':
+            return position == len(text) or (position == len(text) - 1 and text[position] == '\n')
+        if kind == 'end':
+            return position == len(text)
+        if not text:
+            return False # re never finds a word boundary, or a non-boundary, in an empty string
+        before = position > 0 and _is_word(text[position - 1])
+        after = position < len(text) and _is_word(text[position])
+        return (before != after) if kind == 'word' else (before == after)
+
+    def _add_thread(self, threads, seen, pc, captures, text, position):
+        # Follows jumps, splits, saves and assertions depth-first, so threads
+        # are appended in priority order; `seen` keeps one thread per pc
+        program = self.program
+        stack = [(pc, captures)]
+        while stack:
+            pc, captures = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            instruction = program[pc]
+            op = instruction[0]
+            if op == 'jmp':
+                stack.append((instruction[1], captures))
+            elif op == 'split':
+                stack.append((instruction[2], captures))
+                stack.append((instruction[1], captures))
+            elif op == 'save':
+                slot = instruction[1]
+                stack.append((pc + 1, captures[:slot] + (position,) + captures[slot + 1:]))
+            elif op == 'assert':
+                if self._assert(instruction[1], text, position):
+                    stack.append((pc + 1, captures))
+            else:
+                threads.append((pc, captures))
+
+    def search(self, text, start, forbid_empty_at=None):
+        """
+        Returns the captures of the leftmost-first match at or after `start`,
+        or None. An empty match at `forbid_empty_at` is rejected, as re does
+        right after an empty match.
+        """
+        program = self.program
+        length = len(text)
+        empty = (None,) * (2 * self.groups + 2)
+        threads, seen = [], set()
+        self._add_thread(threads, seen, 0, empty, text, start)
+        matched = None
+        position = start
+        while True:
+            ch = text[position] if position < length else None
+            next_threads, next_seen = [], set()
+            for pc, captures in threads:
+                instruction = program[pc]
+                op = instruction[0]
+                if op == 'match':
+                    if captures[0] == captures[1] == forbid_empty_at:
+                        continue
+                    matched = captures
+                    break # Lower-priority threads can no longer win
+                if ch is None:
+                    continue
+                if op == 'char':
+                    ok = ch == instruction[1]
+                elif op == 'any':
+                    ok = ch != '\n'
+                else:
+                    ok = _set_contains(instruction[1], ch) != instruction[2]
+                if ok:
+                    self._add_thread(next_threads, next_seen, pc + 1, captures, text, position + 1)
+            if ch is None:
+                return matched
+            position += 1
+            if matched is None:
+                self._add_thread(next_threads, next_seen, 0, empty, text, position)
+            elif not next_threads:
+                return matched
+            threads, seen = next_threads, next_seen
+
+    def findall(self, text):
+        results = []
+        position = 0
+        forbid = None
+        while position <= len(text):
+            captures = self.search(text, position, forbid)
+            if captures is None:
+                break
+            if self.groups == 0:
+                results.append(text[captures[0]:captures[1]])
+            else:
+                groups = tuple(
+                    text[captures[2 * i]:captures[2 * i + 1]] if captures[2 * i] is not None and captures[2 * i + 1] is not None else ''
+                    for i in range(1, self.groups + 1)
+                )
+                results.append(groups[0] if self.groups == 1 else groups)
+            forbid = captures[1] if captures[0] == captures[1] else None
+            position = captures[1]
+        return results
+
+
+def _set_contains(items, ch):
+    for item in items:
+        if item.__class__ is str:
+            if item == ch:
+                return True
+        elif item.__class__ is tuple:
+            if item[0] <= ch <= item[1]:
+                return True
+        elif item(ch):
+            return True
+    return False
@@ -0,0 +1,204 @@
+import bisect
+import threading
+import contextvars
+from time import perf_counter
+from contextlib import contextmanager
+
+# Per-request timing and Prometheus metrics for /api/interpret.
+#
+# A request is timed with request_timing(option). Code on the request path
+# marks phases with timed_phase(name): the session drivers in
+# interpreter_logic time 'compile' and 'execute' steps, flex_bison_utils
+# times 'spawn' (starting a child process) and the sandbox times 'queue'
+# (waiting for a compile or run slot). Phases nest and are recorded
+# exclusively, so the spawn inside an execute step counts only towards
+# 'spawn'. The rest of the request is recorded as 'python': request handling,
+# the pure-Python analyzers and post-processing of analyzer output. Outside a
+# timed request, timed_phase does nothing.
+
+PHASES = ('queue', 'compile', 'spawn', 'execute', 'python')
+
+# Upper bounds in seconds, from sub-millisecond library calls to compile timeouts
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_CURRENT_TIMING = contextvars.ContextVar('request_timing', default=None)
+
+_METRICS_LOCK = threading.Lock()
+_PHASE_HISTOGRAMS = {} # (option, phase) -> Histogram
+_REQUEST_HISTOGRAMS = {} # option -> Histogram
+_COMPILE_FAILURES = {} # program name -> count
+_TIMEOUTS = {} # option -> count
+_COLLECTORS = [] # callables returning extra exposition lines
+
+
+class Histogram:
+    """Bucketed observation counts; not thread-safe on its own (guarded by _METRICS_LOCK)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestTiming:
+    """Exclusive seconds spent in each phase of one request."""
+
+    def __init__(self, option):
+        self.option = option
+        self.phases = {}
+        self.total = None
+        self._started = perf_counter()
+        self._stack = [] # [phase, started, seconds spent in nested phases]
+
+    def finish(self):
+        self.total = perf_counter() - self._started
+        accounted = sum(self.phases.values())
+        self.phases['python'] = self.phases.get('python', 0.0) + max(self.total - accounted, 0.0)
+
+    def server_timing(self):
+        """Value for the Server-Timing response header (durations in milliseconds)."""
+        parts = [f"{phase};dur={self.phases[phase] * 1000:.3f}" for phase in PHASES if phase in self.phases]
+        if self.total is not None:
+            parts.append(f"total;dur={self.total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def timed_phase(phase):
+    """Attributes the time spent in the block to `phase` of the current request, if any."""
+    timing = _CURRENT_TIMING.get()
+    if timing is None:
+        yield
+        return
+    frame = [phase, perf_counter(), 0.0]
+    timing._stack.append(frame)
+    try:
+        yield
+    finally:
+        timing._stack.remove(frame)
+        elapsed = perf_counter() - frame[1]
+        timing.phases[phase] = timing.phases.get(phase, 0.0) + elapsed - frame[2]
+        if timing._stack:
+            timing._stack[-1][2] += elapsed
+
+
+@contextmanager
+def request_timing(option):
+    """
+    Times one request for `option` and records it in the histograms on exit.
+
+    Yields:
+        RequestTiming: Its phases and total are filled in when the block exits.
+    """
+    timing = RequestTiming(option)
+    token = _CURRENT_TIMING.set(timing)
+    try:
+        yield timing
+    finally:
+        try:
+            _CURRENT_TIMING.reset(token)
+        except ValueError: # Exited from another context, e.g. a generator finalized elsewhere
+            _CURRENT_TIMING.set(None)
+        timing.finish()
+        _record(timing)
+
+
+def _record(timing):
+    with _METRICS_LOCK:
+        histogram = _REQUEST_HISTOGRAMS.get(timing.option)
+        if histogram is None:
+            histogram = _REQUEST_HISTOGRAMS[timing.option] = Histogram()
+        histogram.observe(timing.total)
+        for phase, seconds in timing.phases.items():
+            key = (timing.option, phase)
+            histogram = _PHASE_HISTOGRAMS.get(key)
+            if histogram is None:
+                histogram = _PHASE_HISTOGRAMS[key] = Histogram()
+            histogram.observe(seconds)
+
+
+def add_collector(callback):
+    """Registers callback() -> list of exposition lines, appended to every render_prometheus() output."""
+    _COLLECTORS.append(callback)
+
+
+def count_compile_failure(program):
+    with _METRICS_LOCK:
+        _COMPILE_FAILURES[program] = _COMPILE_FAILURES.get(program, 0) + 1
+
+
+def count_timeout(option=None):
+    """Counts a child process that was killed for running too long; defaults to the current request's option."""
+    if option is None:
+        timing = _CURRENT_TIMING.get()
+        option = timing.option if timing is not None else 'none'
+    with _METRICS_LOCK:
+        _TIMEOUTS[option] = _TIMEOUTS.get(option, 0) + 1
+
+
+# --- Prometheus text exposition format (version 0.0.4) ---
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (None,), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound is None else _format_number(float(bound))
+        lines.append(f"{name}_bucket{{{_labels(labels + [('le', le)])}}} {cumulative}")
+    lines.append(f"{name}_sum{{{_labels(labels)}}} {_format_number(histogram.sum)}")
+    lines.append(f"{name}_count{{{_labels(labels)}}} {histogram.count}")
+    return lines
+
+
+def render_prometheus():
+    """Returns every metric in the Prometheus text format."""
+    lines = []
+    with _METRICS_LOCK:
+        lines.append("# HELP interpret_request_seconds Total time of /api/interpret requests.")
+        lines.append("# TYPE interpret_request_seconds histogram")
+        for option, histogram in sorted(_REQUEST_HISTOGRAMS.items()):
+            lines.extend(_histogram_lines("interpret_request_seconds", [('option', option)], histogram))
+
+        lines.append("# HELP interpret_phase_seconds Exclusive time spent in each phase of /api/interpret requests.")
+        lines.append("# TYPE interpret_phase_seconds histogram")
+        for (option, phase), histogram in sorted(_PHASE_HISTOGRAMS.items()):
+            lines.extend(_histogram_lines("interpret_phase_seconds", [('option', option), ('phase', phase)], histogram))
+
+        lines.append("# HELP interpret_compile_failures_total Analyzer and user program builds that failed.")
+        lines.append("# TYPE interpret_compile_failures_total counter")
+        for program, count in sorted(_COMPILE_FAILURES.items()):
+            lines.append(f"interpret_compile_failures_total{{{_labels([('program', program)])}}} {count}")
+
+        lines.append("# HELP interpret_timeouts_total Child processes killed for exceeding their time limit.")
+        lines.append("# TYPE interpret_timeouts_total counter")
+        for option, count in sorted(_TIMEOUTS.items()):
+            lines.append(f"interpret_timeouts_total{{{_labels([('option', option)])}}} {count}")
+    for callback in _COLLECTORS:
+        lines.extend(callback())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    with _METRICS_LOCK:
+        _PHASE_HISTOGRAMS.clear()
+        _REQUEST_HISTOGRAMS.clear()
+        _COMPILE_FAILURES.clear()
+        _TIMEOUTS.clear()
@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import time
+import tarfile
+import argparse
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from backend.source_analysis import analyze_source
+from backend.word_counts import top_k
+
+# interpreter_logic is a top-level module, as app.py and async_app.py import it;
+# importing it as backend.interpreter_logic would load a second copy with its own
+# builds, result cache and worker pools
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import interpreter_logic
+
+# Whole-project analysis: the per-snippet analyzers run over every C file in
+# a directory or tar archive.
+#
+# Map: each file is analyzed in a worker process (analyze_file), which
+# returns a small per-file summary plus the partial aggregates for it.
+# Reduce: ProjectTotals merges the partials in the parent as results arrive,
+# into global word frequencies, comment counts, email classifications and
+# token counts. The lexer reports each distinct token once, so token counts
+# are numbers of distinct tokens per category: in the file for a per-file
+# summary, across all files for the totals. analyze_project() yields every per-file summary as soon as
+# its worker finishes, so callers can stream them, and the merged totals
+# last.
+#
+#   python -m backend.project_analysis path/to/project        # or project.tar.gz
+#   python -m backend.project_analysis src --options comment_detector,email_parser --json
+
+# Analyzers that can run over a project; all of them by default
+PROJECT_OPTIONS = ('comment_detector', 'word_frequency_calculator', 'email_parser', 'operator_delimiter_recognizer')
+PROJECT_EXTENSIONS = tuple(
+    extension.strip() for extension in os.environ.get('PROJECT_EXTENSIONS', '.c,.h').split(',') if extension.strip()
+)
+PROJECT_MAX_WORKERS = int(os.environ.get('PROJECT_MAX_WORKERS', str(os.cpu_count() or 1)))
+PROJECT_MAX_FILES = int(os.environ.get('PROJECT_MAX_FILES', '20000'))
+PROJECT_MAX_FILE_BYTES = int(os.environ.get('PROJECT_MAX_FILE_BYTES', str(4 * 1024 * 1024)))
+PROJECT_MAX_TOTAL_BYTES = int(os.environ.get('PROJECT_MAX_TOTAL_BYTES', str(512 * 1024 * 1024)))
+PROJECT_TOP_WORDS = int(os.environ.get('PROJECT_TOP_WORDS', '100'))
+# Workers are started with spawn by default: forking a threaded web server can copy held locks
+PROJECT_START_METHOD = os.environ.get('PROJECT_START_METHOD', 'spawn')
+
+_PROJECT_EXECUTOR = None
+_PROJECT_EXECUTOR_LOCK = threading.Lock()
+
+
+class ProjectTooLarge(Exception):
+    """Raised when a project exceeds PROJECT_MAX_FILES or PROJECT_MAX_TOTAL_BYTES."""
+
+
+def project_executor():
+    """The shared worker pool, created on first use; word_frequency_calculator shards on it too."""
+    global _PROJECT_EXECUTOR
+    with _PROJECT_EXECUTOR_LOCK:
+        if _PROJECT_EXECUTOR is None:
+            _PROJECT_EXECUTOR = ProcessPoolExecutor(
+                max_workers=PROJECT_MAX_WORKERS,
+                mp_context=multiprocessing.get_context(PROJECT_START_METHOD),
+            )
+        return _PROJECT_EXECUTOR
+
+
+# --- Input ---
+
+def _iter_directory(root):
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            if not filename.endswith(PROJECT_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            size = os.path.getsize(path)
+            if size > PROJECT_MAX_FILE_BYTES:
+                yield os.path.relpath(path, root), None, size
+                continue
+            with open(path, 'rb') as f:
+                yield os.path.relpath(path, root), f.read(), size
+
+
+def _iter_tar(archive):
+    # Members are read in archive order and never extracted to disk
+    for member in archive:
+        if not member.isfile() or not member.name.endswith(PROJECT_EXTENSIONS):
+            continue
+        if member.size > PROJECT_MAX_FILE_BYTES:
+            yield member.name, None, member.size
+            continue
+        yield member.name, archive.extractfile(member).read(), member.size
+
+
+def iter_project_files(source):
+    """
+    Yields the C sources of a project.
+
+    Args:
+        source (str | file): A directory, a tar archive path (any compression
+            tarfile understands) or an open binary tar archive.
+
+    Yields:
+        tuple: (relative path, bytes or None, size); the bytes are None for
+            files over PROJECT_MAX_FILE_BYTES, which are not read.
+
+    Raises:
+        ProjectTooLarge: Past PROJECT_MAX_FILES files or PROJECT_MAX_TOTAL_BYTES.
+        tarfile.TarError: If `source` is neither a directory nor a tar archive.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        files = _iter_directory(source)
+        archive = None
+    elif isinstance(source, str):
+        archive = tarfile.open(source, mode='r:*')
+        files = _iter_tar(archive)
+    else:
+        archive = tarfile.open(fileobj=source, mode='r|*')
+        files = _iter_tar(archive)
+
+    count = 0
+    total_bytes = 0
+    try:
+        for path, data, size in files:
+            count += 1
+            if count > PROJECT_MAX_FILES:
+                raise ProjectTooLarge(f"Project has more than {PROJECT_MAX_FILES} source files.")
+            if data is not None:
+                total_bytes += size
+                if total_bytes > PROJECT_MAX_TOTAL_BYTES:
+                    raise ProjectTooLarge(f"Project sources exceed {PROJECT_MAX_TOTAL_BYTES} bytes.")
+            yield path, data, size
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+# --- Map ---
+
+def analyze_file(path, data, options):
+    """
+    Runs the selected analyzers over one file; executed in a worker process.
+
+    Returns:
+        tuple: (summary, partial). summary is the JSON-ready per-file result
+            that gets streamed; partial holds what ProjectTotals merges.
+    """
+    started = time.perf_counter()
+    text = data.decode('utf-8', errors='replace')
+    artifact = analyze_source(text)
+    summary = {'path': path, 'bytes': len(data)}
+    partial = {}
+    errors = {}
+
+    if 'comment_detector' in options:
+        summary['comments'] = {
+            'single_line': len(artifact.line_comments),
+            'multi_line': len(artifact.block_comments),
+        }
+    if 'word_frequency_calculator' in options:
+        word_counts = Counter(artifact.words)
+        summary['words'] = {'total': sum(word_counts.values()), 'unique': len(word_counts)}
+        partial['words'] = word_counts
+    if 'email_parser' in options:
+        emails = interpreter_logic.find_printf_emails(text)
+        summary['emails'] = sorted(set(emails))
+    if 'operator_delimiter_recognizer' in options:
+        result = interpreter_logic.operator_delimiter_recognizer(text)
+        records = getattr(result, 'records', None)
+        if records is None:
+            errors['operator_delimiter_recognizer'] = str(result)
+        else:
+            # Characters the lexer does not recognize (&, ?, : ...) are error
+            # records; they are reported next to the tokens, not instead of them
+            tokens = {}
+            for record in records:
+                if record['type'] == 'token':
+                    tokens.setdefault(record['category'], set()).add(record['text'])
+            summary['tokens'] = {category: len(texts) for category, texts in tokens.items()}
+            partial['tokens'] = tokens
+            lexical_errors = Counter(record['message'] for record in records if record['type'] == 'error')
+            if lexical_errors:
+                summary['lexical_errors'] = dict(lexical_errors)
+
+    if errors:
+        summary['errors'] = errors
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return summary, partial
+
+
+# --- Reduce ---
+
+class ProjectTotals:
+    """Merges per-file results into project-wide aggregates."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.failed = 0
+        self.comments = Counter()
+        self.words = Counter()
+        self.emails = {} # address -> number of files it appears in
+        self.tokens = {} # category -> distinct token texts
+        self.lexical_errors = Counter()
+
+    def add(self, summary, partial):
+        self.files += 1
+        self.bytes += summary['bytes']
+        if 'errors' in summary:
+            self.failed += 1
+        self.comments.update(summary.get('comments', {}))
+        self.words.update(partial.get('words', {}))
+        for email in summary.get('emails', ()):
+            self.emails[email] = self.emails.get(email, 0) + 1
+        for category, texts in partial.get('tokens', {}).items():
+            self.tokens.setdefault(category, set()).update(texts)
+        self.lexical_errors.update(summary.get('lexical_errors', {}))
+
+    def report(self, options):
+        report = {'files': self.files, 'bytes': self.bytes, 'skipped': self.skipped, 'failed': self.failed}
+        if 'comment_detector' in options:
+            report['comments'] = {'single_line': self.comments['single_line'], 'multi_line': self.comments['multi_line']}
+        if 'word_frequency_calculator' in options:
+            # Same order as word_frequency_calculator: frequency descending, then word
+            top_words = top_k(self.words, PROJECT_TOP_WORDS)
+            report['words'] = {
+                'total': sum(self.words.values()),
+                'unique': len(self.words),
+                'top': [{'word': word, 'count': count} for word, count in top_words],
+            }
+        if 'email_parser' in options:
+            classified = []
+            by_status = Counter()
+            for email in sorted(self.emails):
+                status, university = interpreter_logic.classify_email(email)
+                by_status[status] += 1
+                classified.append({'email': email, 'status': status, 'university': university == "Yes",
+                                   'files': self.emails[email]})
+            report['emails'] = {'by_status': dict(by_status), 'addresses': classified}
+        if 'operator_delimiter_recognizer' in options:
+            report['tokens'] = {category: len(texts) for category, texts in self.tokens.items()}
+            report['lexical_errors'] = dict(self.lexical_errors)
+        return report
+
+
+def analyze_project(source, options=PROJECT_OPTIONS, executor=None):
+    """
+    Analyzes every C file of a project on the process pool.
+
+    Args:
+        source: See iter_project_files.
+        options (iterable): Analyzers to run, a subset of PROJECT_OPTIONS.
+        executor: Pool to use instead of the shared one.
+
+    Yields:
+        tuple: (event, payload). 'file' events carry a per-file summary and
+            arrive in completion order; 'skipped' names an oversized file;
+            a final 'summary' carries the merged totals.
+
+    Raises:
+        ValueError: If `options` names an analyzer not in PROJECT_OPTIONS.
+        ProjectTooLarge: See iter_project_files; files already analyzed
+            have been yielded by then.
+    """
+    options = tuple(options)
+    unknown = [option for option in options if option not in PROJECT_OPTIONS]
+    if unknown:
+        raise ValueError(f"Unsupported project option(s): {', '.join(unknown)}")
+    executor = executor or project_executor()
+    max_pending = PROJECT_MAX_WORKERS * 2 # Bounds how many file contents are held at once
+    totals = ProjectTotals()
+    pending = set()
+
+    def finished(done):
+        for future in done:
+            summary, partial = future.result()
+            totals.add(summary, partial)
+            yield ('file', summary)
+
+    try:
+        for path, data, size in iter_project_files(source):
+            if data is None:
+                totals.skipped += 1
+                yield ('skipped', {'path': path, 'bytes': size,
+                                   'reason': f"Larger than {PROJECT_MAX_FILE_BYTES} bytes"})
+                continue
+            pending.add(executor.submit(analyze_file, path, data, options))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    yield ('summary', totals.report(options))
+
+
+def render_project_report(report):
+    """Formats a 'summary' payload as text, in the style of the single-file analyzers."""
+    lines = [f"Files analyzed: {report['files']} ({report['bytes']} bytes)"]
+    if report['skipped']:
+        lines.append(f"Files skipped: {report['skipped']}")
+    if report['failed']:
+        lines.append(f"Files with analyzer errors: {report['failed']}")
+    if 'comments' in report:
+        lines.append(f"- Single-line comments: {report['comments']['single_line']}")
+        lines.append(f"- Multi-line comments: {report['comments']['multi_line']}")
+    if 'words' in report:
+        lines.append(f"Frequency ({report['words']['unique']} unique of {report['words']['total']} words):")
+        lines.extend(f"- {entry['word']}: {entry['count']}" for entry in report['words']['top'])
+    if 'emails' in report:
+        for entry in report['emails']['addresses']:
+            university = "Yes" if entry['university'] else "No"
+            lines.append(f"Email: {entry['email']} | Status: {entry['status']} | Is University Mail (.edu): {university}")
+    if 'tokens' in report:
+        lines.append("Distinct tokens: " + ", ".join(f"{category}={count}" for category, count in sorted(report['tokens'].items())))
+    if report.get('lexical_errors'):
+        lines.append(f"Lexical errors: {sum(report['lexical_errors'].values())}")
+        lines.extend(f"- {message}: {count}" for message, count in sorted(report['lexical_errors'].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze every C file in a directory or tar archive.")
+    parser.add_argument('source', help="Project directory or tar archive")
+    parser.add_argument('--options', default=','.join(PROJECT_OPTIONS), help="Comma-separated analyzers")
+    parser.add_argument('--json', action='store_true', help="Print one JSON event per line")
+    args = parser.parse_args(argv)
+
+    options = [option.strip() for option in args.options.split(',') if option.strip()]
+    for event, payload in analyze_project(args.source, options):
+        if args.json:
+            print(json.dumps({'event': event, 'data': payload}), flush=True)
+        elif event == 'file':
+            errors = "".join(f" [{option}: {message}]" for option, message in payload.get('errors', {}).items())
+            print(f"{payload['path']}: {payload['elapsed_ms']} ms{errors}", flush=True)
+        elif event == 'skipped':
+            print(f"{payload['path']}: skipped ({payload['reason']})", flush=True)
+        else:
+            print("\n" + render_project_report(payload))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
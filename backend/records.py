@@ -0,0 +1,70 @@
+import re
+import json
+
+# Decoder for the JSON Lines records the Flex/Bison analyzers write (see
+# flex_bison_programs/fb_records.h).
+#
+# The output is decoded once and then walked by offset with raw_decode, so
+# no per-line substrings are created. Each record is a dict with a "type"
+# field. Analyzer sessions in interpreter_logic render records into the text
+# the web interface shows and keep the records themselves on the result
+# (see RecordOutput), so API clients can ask for the structured form.
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+
+class RecordDecodeError(ValueError):
+    """Raised when analyzer output is not a valid record stream."""
+
+    def __init__(self, message, position):
+        super().__init__(f"{message} at offset {position}")
+        self.position = position
+
+
+def iter_records(data):
+    """
+    Yields the records in an analyzer's output.
+
+    Args:
+        data (str | bytes): The output; bytes are decoded as UTF-8 with
+            invalid sequences replaced.
+
+    Yields:
+        dict: One record per JSON object, in output order.
+
+    Raises:
+        RecordDecodeError: If the output holds anything but JSON objects
+            with a "type" field.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8', errors='replace')
+    position = _WHITESPACE.match(data).end()
+    end = len(data)
+    while position < end:
+        try:
+            record, position = _DECODER.raw_decode(data, position)
+        except json.JSONDecodeError as e:
+            raise RecordDecodeError(f"Malformed record: {e.msg}", e.pos) from None
+        if not isinstance(record, dict) or 'type' not in record:
+            raise RecordDecodeError("Expected a JSON object with a \"type\" field", position)
+        yield record
+        position = _WHITESPACE.match(data, position).end()
+
+
+def decode_records(data):
+    """Returns the list of records in `data`; see iter_records."""
+    return list(iter_records(data))
+
+
+class RecordOutput(str):
+    """
+    An analyzer's rendered text output that also carries the records it was
+    rendered from. It is a str, so callers that only want the text (and the
+    result cache) use it unchanged.
+    """
+
+    def __new__(cls, text, records):
+        output = super().__new__(cls, text)
+        output.records = records
+        return output
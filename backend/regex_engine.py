@@ -0,0 +1,217 @@
+import os
+import re
+import time
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+from backend.linear_regex import LinearPattern, Unsupported
+
+# Pattern evaluation for regex_matcher.
+#
+# Patterns come from users, and one with catastrophic backtracking (say
+# (a+)+b against a long run of a's) can keep the re module busy for minutes.
+# Matching therefore never runs in the request thread. It runs in a pool of
+# worker processes and the caller waits at most REGEX_TIMEOUT seconds for the
+# answer; a worker that misses the deadline is killed and replaced.
+#
+# Two engines are available:
+#   're'     - Python's backtracking re module, with its full syntax.
+#   'linear' - backend/linear_regex.py, a Pike VM that runs in O(n·m) for
+#              the subset it supports (no backreferences or lookaround).
+# 'auto' runs re first and, if re misses the deadline, reruns the pattern
+# with the linear engine when the linear engine supports it.
+#
+# Compiled patterns are kept in a bounded LRU in every process that compiles
+# them, so the same pattern is parsed once per worker, not once per request.
+
+REGEX_TIMEOUT = float(os.environ.get('REGEX_TIMEOUT', '2'))
+REGEX_LINEAR_TIMEOUT = float(os.environ.get('REGEX_LINEAR_TIMEOUT', '10'))
+REGEX_CACHE_SIZE = int(os.environ.get('REGEX_CACHE_SIZE', '256'))
+REGEX_MAX_WORKERS = int(os.environ.get('REGEX_MAX_WORKERS', str(os.cpu_count() or 1)))
+REGEX_START_METHOD = os.environ.get('REGEX_START_METHOD', 'spawn')
+
+ENGINES = ('auto', 're', 'linear')
+
+logger = logging.getLogger(__name__)
+
+
+class RegexTimeout(Exception):
+    """Raised when matching did not finish before its deadline."""
+
+    def __init__(self, message, engine, seconds):
+        super().__init__(message)
+        self.engine = engine
+        self.seconds = seconds
+
+
+# --- Compiled-pattern cache ---
+_PATTERN_CACHE = OrderedDict() # (engine, pattern) -> compiled pattern, least recently used first
+_PATTERN_CACHE_LOCK = threading.Lock()
+
+
+def compile_pattern(pattern, engine='re'):
+    """
+    Returns the compiled `pattern` for `engine` ('re' or 'linear') from the LRU.
+
+    Raises:
+        re.error: If the re module rejects the pattern.
+        Unsupported: If the linear engine cannot run the pattern.
+    """
+    key = (engine, pattern)
+    with _PATTERN_CACHE_LOCK:
+        compiled = _PATTERN_CACHE.get(key)
+        if compiled is not None:
+            _PATTERN_CACHE.move_to_end(key)
+            return compiled
+    if engine == 'linear':
+        compiled = LinearPattern(pattern)
+        if compiled.groups != compile_pattern(pattern, 're').groups:
+            raise Unsupported("Pattern syntax is not supported by the linear engine")
+    else:
+        compiled = re.compile(pattern)
+    with _PATTERN_CACHE_LOCK:
+        _PATTERN_CACHE[key] = compiled
+        _PATTERN_CACHE.move_to_end(key)
+        while len(_PATTERN_CACHE) > REGEX_CACHE_SIZE:
+            _PATTERN_CACHE.popitem(last=False)
+    return compiled
+
+
+def linear_supported(pattern):
+    """Returns (True, None) if the linear engine can run `pattern`, else (False, reason)."""
+    try:
+        compile_pattern(pattern, 'linear')
+    except Unsupported as e:
+        return False, str(e)
+    return True, None
+
+
+# --- Killable worker processes ---
+def _worker_main(connection):
+    # Runs in the worker: one (engine, pattern, text) request at a time
+    while True:
+        try:
+            engine, pattern, text = connection.recv()
+        except EOFError:
+            return
+        try:
+            reply = ('ok', compile_pattern(pattern, engine).findall(text))
+        except Exception as e:
+            reply = ('error', f"{type(e).__name__}: {e}")
+        connection.send(reply)
+
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """
+    At most `max_workers` matching processes; idle ones are reused.
+
+    A worker that misses its deadline is killed rather than waited for, so a
+    runaway pattern costs one process start, not a blocked worker.
+    """
+
+    def __init__(self, max_workers=REGEX_MAX_WORKERS, start_method=REGEX_START_METHOD):
+        self._context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def run(self, engine, pattern, text, timeout):
+        """
+        Returns pattern.findall(text) computed in a worker.
+
+        Raises:
+            RegexTimeout: If no answer came within `timeout` seconds.
+            RuntimeError: If the worker failed or died.
+        """
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None or not worker.process.is_alive():
+                worker = _Worker(self._context)
+            try:
+                worker.connection.send((engine, pattern, text))
+                ready = worker.connection.poll(timeout)
+                status, value = worker.connection.recv() if ready else (None, None)
+            except (EOFError, OSError) as e:
+                worker.kill()
+                raise RuntimeError(f"Regex worker failed: {e}") from None
+            if not ready:
+                worker.kill()
+                raise RegexTimeout(f"Matching with the {engine} engine exceeded {timeout:g}s.", engine, timeout)
+            with self._lock:
+                self._idle.append(worker)
+        if status == 'error':
+            raise RuntimeError(value)
+        return value
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def worker_pool():
+    """Returns the process-wide WorkerPool, created on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = WorkerPool()
+        return _POOL
+
+
+def find_all(pattern, text, engine='auto', timeout=REGEX_TIMEOUT, linear_timeout=REGEX_LINEAR_TIMEOUT):
+    """
+    Evaluates re.findall(pattern, text) under a deadline.
+
+    Args:
+        engine (str): 'auto', 're' or 'linear'; see the module comment.
+
+    Returns:
+        tuple: (matches, engine used, note). The note explains a fallback
+            from re to the linear engine and is None otherwise.
+
+    Raises:
+        ValueError: For an unknown engine.
+        re.error: If the pattern is invalid.
+        Unsupported: If engine is 'linear' and the pattern is outside its subset.
+        RegexTimeout: If the engine that ran last missed its deadline.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown regex engine '{engine}'. Use one of: {', '.join(ENGINES)}.")
+    compile_pattern(pattern, 're') # Syntax errors are reported without a worker round trip
+    if engine == 'linear':
+        compile_pattern(pattern, 'linear')
+        return worker_pool().run('linear', pattern, text, linear_timeout), 'linear', None
+
+    started = time.monotonic()
+    try:
+        return worker_pool().run('re', pattern, text, timeout), 're', None
+    except RegexTimeout as e:
+        if engine == 're':
+            raise
+        supported, reason = linear_supported(pattern)
+        if not supported:
+            raise RegexTimeout(f"{e} The linear engine cannot run this pattern: {reason}", 're', timeout) from None
+        note = f"re exceeded {time.monotonic() - started:.1f}s"
+        logger.debug("Regex fell back to the linear engine for a pattern of length %d", len(pattern))
+        return worker_pool().run('linear', pattern, text, linear_timeout), 'linear', note
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Memoization for /api/interpret.
+#
+# Most analyzers are pure functions of their request fields, so identical
+# requests (the sample inputs get resubmitted constantly) can be answered
+# from memory. Entries are keyed by a hash of the option and its request
+# fields, evicted least-recently-used first by entry count and approximate
+# size, and expire after a TTL.
+#
+# Only results that depend on the request alone are stored. Code on the
+# request path calls mark_uncacheable() when a run fails for another reason
+# (a timeout, or a child process that crashed or could not be started), and
+# run_cached then returns that result without caching it, so a transient
+# failure is not replayed to every identical request for RESULT_CACHE_TTL.
+
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', '1') != '0'
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '1024'))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '300'))
+
+# Options that are pure functions of their input. Override with a
+# comma-separated RESULT_CACHE_OPTIONS.
+DEFAULT_CACHEABLE_OPTIONS = (
+    'email_parser', 'normal_text_analyzer', 'reverse_concatenate', 'comment_detector',
+    'word_frequency_calculator', 'regex_matcher', 'calculator', 'flex_bison_arithmetic_calculator',
+    'operator_delimiter_recognizer', 'parser_action_printer', 'compiler_error_classifier',
+    'compiler_log_classifier', 'semantic_action_simulator', 'command_language_interpreter',
+    'boolean_expression_evaluator',
+)
+
+# Never cached, whatever the configuration says: user programs can read the
+# clock, the filesystem or random numbers.
+UNCACHEABLE_OPTIONS = frozenset({'run_full_c_code'})
+
+def _configured_options():
+    configured = os.environ.get('RESULT_CACHE_OPTIONS')
+    if configured is None:
+        return frozenset(DEFAULT_CACHEABLE_OPTIONS)
+    return frozenset(option.strip() for option in configured.split(',') if option.strip())
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analyzer outputs."""
+
+    def __init__(self, options, max_entries, max_bytes, ttl):
+        self.options = frozenset(options) - UNCACHEABLE_OPTIONS
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict() # key -> (expires_at, size, result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, option, data):
+        """Returns the cache key for a request, or None if the option is not cacheable."""
+        if option not in self.options:
+            return None
+        try:
+            canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(f"{option}\0{canonical}".encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Returns the cached result for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, result):
+        """Stores `result` under `key`, evicting least-recently-used entries to stay within the limits."""
+        if not isinstance(result, str):
+            return
+        size = len(key) + len(result) # Characters, as a cheap approximation of bytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, result)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "options": sorted(self.options),
+            }
+
+
+RESULT_CACHE = ResultCache(_configured_options(), RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL) \
+    if RESULT_CACHE_ENABLED else None
+
+# The run_cached computation in progress in this context, if any
+_CURRENT_COMPUTATION = contextvars.ContextVar('result_cache_computation', default=None)
+
+
+class _Computation:
+    __slots__ = ('cacheable',)
+
+    def __init__(self):
+        self.cacheable = True
+
+
+@contextmanager
+def track_computation():
+    """
+    Tracks whether the code run inside the block called mark_uncacheable().
+
+    Yields:
+        object: Its `cacheable` attribute is False once mark_uncacheable()
+            has been called in this context, or in a thread it handed work to.
+    """
+    computation = _Computation()
+    token = _CURRENT_COMPUTATION.set(computation)
+    try:
+        yield computation
+    finally:
+        _CURRENT_COMPUTATION.reset(token)
+
+
+def mark_uncacheable():
+    """
+    Keeps the result of the run_cached call in progress out of the cache.
+
+    Called where a request fails for a reason other than its input: a
+    timeout, or a child process that crashed or could not be started. Outside
+    run_cached it does nothing.
+    """
+    computation = _CURRENT_COMPUTATION.get()
+    if computation is not None:
+        computation.cacheable = False
+
+
+def run_cached(option, data, compute):
+    """
+    Returns compute(option, data), answering from the result cache when possible.
+
+    Exceptions from `compute` propagate and are never cached, and neither are
+    results computed while something called mark_uncacheable().
+    """
+    if RESULT_CACHE is None:
+        return compute(option, data)
+    key = RESULT_CACHE.key_for(option, data)
+    if key is None:
+        return compute(option, data)
+    result = RESULT_CACHE.get(key)
+    if result is not None:
+        return result
+    with track_computation() as computation:
+        result = compute(option, data)
+    if computation.cacheable:
+        RESULT_CACHE.put(key, result)
+    return result
+
+
+async def run_cached_async(option, data, compute):
+    """Async counterpart of run_cached for `compute` coroutines."""
+    key = RESULT_CACHE.key_for(option, data) if RESULT_CACHE is not None else None
+    if key is None:
+        return await compute(option, data)
+    result = RESULT_CACHE.get(key)
+    if result is not None:
+        return result
+    with track_computation() as computation:
+        result = await compute(option, data)
+    if computation.cacheable:
+        RESULT_CACHE.put(key, result)
+    return result
+
+
+def result_cache_stats():
+    if RESULT_CACHE is None:
+        return {"enabled": False}
+    return RESULT_CACHE.stats()
@@ -0,0 +1,374 @@
+import os
+import math
+import time
+import asyncio
+import signal
+import threading
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError: # Not available on Windows; children then run without rlimits (as they do wherever prlimit is missing)
+    resource = None
+
+from backend.flex_bison_utils import stream_process
+from backend.metrics import timed_phase, add_collector
+
+# Admission control and resource limits for user programs (run_full_c_code).
+#
+# Compiling a program and running it each take a slot from a fixed-size pool
+# per stage. Requests that find every slot busy wait in a bounded FIFO queue.
+# When the queue is full, or a request has waited SANDBOX_QUEUE_TIMEOUT
+# seconds, it is rejected with SandboxBusy (HTTP 429) instead of starting yet
+# more processes. Every child gets rlimit caps on CPU time, address space
+# and file size, applied with prlimit(2) as soon as it has started (a
+# preexec_fn is not safe in a threaded server). Its captured output is cut
+# off, and the child killed, once it passes SANDBOX_OUTPUT_LIMIT bytes.
+#
+# The async server waits for its slot on the event loop and only then hands
+# the process to a thread, so queued requests do not tie up executor threads.
+
+_CPU_COUNT = os.cpu_count() or 1
+
+SANDBOX_COMPILE_SLOTS = int(os.environ.get('SANDBOX_COMPILE_SLOTS', str(_CPU_COUNT)))
+SANDBOX_RUN_SLOTS = int(os.environ.get('SANDBOX_RUN_SLOTS', str(2 * _CPU_COUNT)))
+SANDBOX_QUEUE_SIZE = int(os.environ.get('SANDBOX_QUEUE_SIZE', '32')) # Waiting requests per stage
+SANDBOX_QUEUE_TIMEOUT = float(os.environ.get('SANDBOX_QUEUE_TIMEOUT', '20'))
+SANDBOX_COMPILE_MEMORY = int(os.environ.get('SANDBOX_COMPILE_MEMORY', str(1024 * 1024 * 1024)))
+SANDBOX_RUN_MEMORY = int(os.environ.get('SANDBOX_RUN_MEMORY', str(256 * 1024 * 1024)))
+SANDBOX_FILE_SIZE_LIMIT = int(os.environ.get('SANDBOX_FILE_SIZE_LIMIT', str(64 * 1024 * 1024)))
+SANDBOX_OUTPUT_LIMIT = int(os.environ.get('SANDBOX_OUTPUT_LIMIT', str(1024 * 1024)))
+
+
+class SandboxBusy(Exception):
+    """Raised when a compile or run slot could not be obtained; maps to HTTP 429."""
+
+    def __init__(self, message, stage, queue_depth, waited):
+        super().__init__(message)
+        self.stage = stage
+        self.queue_depth = queue_depth
+        self.waited = waited
+
+
+class SandboxResult(subprocess.CompletedProcess):
+    """A CompletedProcess that also records the admission wait and output truncation."""
+
+    def __init__(self, args, returncode, stdout, stderr, wait_seconds, queue_depth, output_truncated):
+        super().__init__(args, returncode, stdout, stderr)
+        self.wait_seconds = wait_seconds
+        self.queue_depth = queue_depth
+        self.output_truncated = output_truncated
+
+
+class _AsyncTicket:
+    """A coroutine's place in a SlotPool line; `wakeup` is the future it is waiting on, if any."""
+    __slots__ = ('loop', 'wakeup')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.wakeup = None
+
+
+def _set_wakeup(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SlotPool:
+    """
+    A counting semaphore with a bounded FIFO wait queue.
+
+    acquire() either takes a slot, waits in line for one, or raises
+    SandboxBusy when the line is full or the wait times out.
+    """
+
+    def __init__(self, stage, slots, queue_size, queue_timeout):
+        self.stage = stage
+        self.slots = max(1, slots)
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiting = deque()
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+
+    def acquire(self):
+        """
+        Takes a slot, waiting in line if necessary.
+
+        Returns:
+            tuple: (seconds waited, number of requests queued ahead on arrival).
+
+        Raises:
+            SandboxBusy: If the queue is full or the wait exceeds queue_timeout.
+        """
+        started = time.monotonic()
+        with self._cond:
+            depth = len(self._waiting)
+            if self._active < self.slots and not self._waiting:
+                self._active += 1
+                self.admitted += 1
+                return 0.0, 0
+            if depth >= self.queue_size:
+                self.rejected += 1
+                raise SandboxBusy(f"Too many {self.stage} requests in progress ({depth} waiting); try again shortly.",
+                                  self.stage, depth, 0.0)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            try:
+                while self._waiting[0] is not ticket or self._active >= self.slots:
+                    remaining = started + self.queue_timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise SandboxBusy(f"Timed out after {self.queue_timeout:g}s waiting for a {self.stage} slot.",
+                                          self.stage, depth, time.monotonic() - started)
+                    self._cond.wait(remaining)
+                self._active += 1
+            finally:
+                self._waiting.remove(ticket)
+                self._notify()
+
+            waited = time.monotonic() - started
+            self.admitted += 1
+            self.wait_seconds_total += waited
+            return waited, depth
+
+    async def acquire_async(self):
+        """
+        acquire() for coroutines: waits in the same line, on the event loop instead of in a thread.
+
+        Returns:
+            tuple: (seconds waited, number of requests queued ahead on arrival).
+
+        Raises:
+            SandboxBusy: If the queue is full or the wait exceeds queue_timeout.
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            depth = len(self._waiting)
+            if self._active < self.slots and not self._waiting:
+                self._active += 1
+                self.admitted += 1
+                return 0.0, 0
+            if depth >= self.queue_size:
+                self.rejected += 1
+                raise SandboxBusy(f"Too many {self.stage} requests in progress ({depth} waiting); try again shortly.",
+                                  self.stage, depth, 0.0)
+            ticket = _AsyncTicket(loop)
+            self._waiting.append(ticket)
+
+        try:
+            while True:
+                with self._cond:
+                    if self._waiting[0] is ticket and self._active < self.slots:
+                        self._active += 1
+                        break
+                    wakeup = ticket.wakeup = loop.create_future() # Set by _notify() once the line moves
+                remaining = started + self.queue_timeout - time.monotonic()
+                if remaining <= 0:
+                    with self._cond:
+                        self.rejected += 1
+                    raise SandboxBusy(f"Timed out after {self.queue_timeout:g}s waiting for a {self.stage} slot.",
+                                      self.stage, depth, time.monotonic() - started)
+                try:
+                    await asyncio.wait_for(wakeup, remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._waiting.remove(ticket)
+                self._notify()
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self.admitted += 1
+            self.wait_seconds_total += waited
+        return waited, depth
+
+    def _notify(self):
+        # Called with the lock held: wakes threads and coroutines waiting in line
+        self._cond.notify_all()
+        for ticket in self._waiting:
+            if isinstance(ticket, _AsyncTicket) and ticket.wakeup is not None:
+                ticket.loop.call_soon_threadsafe(_set_wakeup, ticket.wakeup)
+                ticket.wakeup = None
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._notify()
+
+    @contextmanager
+    def slot(self):
+        """Holds a slot for the duration of the block; yields (seconds waited, queue depth)."""
+        with timed_phase('queue'):
+            admission = self.acquire()
+        try:
+            yield admission
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "active": self._active,
+                "queued": len(self._waiting),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds_total,
+            }
+
+
+SLOT_POOLS = {
+    'compile': SlotPool('compile', SANDBOX_COMPILE_SLOTS, SANDBOX_QUEUE_SIZE, SANDBOX_QUEUE_TIMEOUT),
+    'run': SlotPool('run', SANDBOX_RUN_SLOTS, SANDBOX_QUEUE_SIZE, SANDBOX_QUEUE_TIMEOUT),
+}
+
+
+def _set_limit(pid, kind, value):
+    _, hard = resource.prlimit(pid, kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.prlimit(pid, kind, (value, value))
+
+
+def _limits(stage, timeout):
+    """Returns a callable applying the rlimits for `stage` to a started Popen, or None where prlimit is unsupported."""
+    if resource is None or not hasattr(resource, 'prlimit'):
+        return None
+    memory = SANDBOX_COMPILE_MEMORY if stage == 'compile' else SANDBOX_RUN_MEMORY
+    cpu_seconds = int(math.ceil(timeout)) + 1 if timeout is not None else None
+
+    def apply(proc):
+        try:
+            _set_limit(proc.pid, resource.RLIMIT_CORE, 0)
+            if cpu_seconds is not None:
+                _set_limit(proc.pid, resource.RLIMIT_CPU, cpu_seconds)
+            if memory > 0:
+                _set_limit(proc.pid, resource.RLIMIT_AS, memory)
+            if SANDBOX_FILE_SIZE_LIMIT > 0:
+                _set_limit(proc.pid, resource.RLIMIT_FSIZE, SANDBOX_FILE_SIZE_LIMIT)
+        except ProcessLookupError: # Already exited
+            pass
+
+    return apply
+
+
+def stream_limited(stage, args, input_text=None, timeout=None):
+    """
+    stream_process with the sandbox rlimits and output cap applied.
+
+    Yields:
+        tuple: ('stdout' | 'stderr', str) chunks, at most SANDBOX_OUTPUT_LIMIT bytes in total.
+
+    Returns:
+        tuple: (exit code, True if the output was cut off and the process killed).
+    """
+    sent = 0
+    stream = stream_process(args, input_text, timeout, on_start=_limits(stage, timeout))
+    try:
+        while True:
+            try:
+                name, text = next(stream)
+            except StopIteration as stop:
+                return stop.value, False
+            data = text.encode('utf-8')
+            if SANDBOX_OUTPUT_LIMIT > 0 and sent + len(data) > SANDBOX_OUTPUT_LIMIT:
+                kept = data[:SANDBOX_OUTPUT_LIMIT - sent].decode('utf-8', errors='ignore')
+                if kept:
+                    yield name, kept
+                return -signal.SIGKILL, True
+            sent += len(data)
+            yield name, text
+    finally:
+        stream.close() # Kills the process if it is still running
+
+
+def run_sandboxed(stage, args, input_text=None, timeout=None, admission=None):
+    """
+    Runs one compile or run step of a user program inside the sandbox.
+
+    Args:
+        stage (str): 'compile' or 'run'; selects the slot pool and limits.
+        args (list): The command line.
+        input_text (str): Text written to stdin, or None for no input.
+        timeout (float): Seconds before the process is killed, or None.
+        admission (tuple): (seconds waited, queue depth) when the caller
+            already holds a slot for `stage`; otherwise one is taken here.
+
+    Returns:
+        SandboxResult: The finished process, plus wait_seconds, queue_depth
+        and output_truncated.
+
+    Raises:
+        SandboxBusy: If no slot became available.
+        subprocess.TimeoutExpired: If the process runs longer than `timeout`.
+        FileNotFoundError: If the executable does not exist.
+    """
+    if admission is None:
+        with SLOT_POOLS[stage].slot() as admission:
+            return run_sandboxed(stage, args, input_text, timeout, admission)
+
+    waited, depth = admission
+    chunks = {'stdout': [], 'stderr': []}
+    stream = stream_limited(stage, args, input_text, timeout)
+    while True:
+        try:
+            name, text = next(stream)
+        except StopIteration as stop:
+            returncode, truncated = stop.value
+            break
+        chunks[name].append(text)
+    return SandboxResult(args, returncode, "".join(chunks['stdout']), "".join(chunks['stderr']),
+                         waited, depth, truncated)
+
+
+async def run_sandboxed_async(stage, args, input_text=None, timeout=None):
+    """
+    run_sandboxed for coroutines.
+
+    The slot is waited for on the event loop; only the admitted process
+    occupies a thread. The thread releases the slot when the process is done,
+    even if the awaiting coroutine was cancelled in the meantime.
+    """
+    pool = SLOT_POOLS[stage]
+    with timed_phase('queue'):
+        admission = await pool.acquire_async()
+
+    def run():
+        try:
+            return run_sandboxed(stage, args, input_text, timeout, admission)
+        finally:
+            pool.release()
+
+    return await asyncio.to_thread(run)
+
+
+def sandbox_stats():
+    return {stage: pool.stats() for stage, pool in SLOT_POOLS.items()}
+
+
+def _metric_lines():
+    stats = sandbox_stats()
+    lines = []
+    for name, key, kind, help_text in (
+        ("sandbox_active", "active", "gauge", "User program processes holding a slot."),
+        ("sandbox_queued", "queued", "gauge", "Requests waiting for a slot."),
+        ("sandbox_rejected_total", "rejected", "counter", "Requests rejected because the queue was full or the wait timed out."),
+        ("sandbox_wait_seconds_total", "wait_seconds_total", "counter", "Total time admitted requests spent waiting for a slot."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage in sorted(stats):
+            lines.append(f'{name}{{stage="{stage}"}} {stats[stage][key]}')
+    return lines
+
+
+add_collector(_metric_lines)
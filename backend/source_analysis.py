@@ -0,0 +1,166 @@
+import os
+import re
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+# Shared scan results for the Python text analyzers.
+#
+# email_parser, normal_text_analyzer, word_frequency_calculator,
+# comment_detector and calculator all look at the same handful of facts
+# about a C source: where the comments are, the comment-free text, the
+# string literals passed to printf and the words inside them. A
+# SourceArtifact computes each of those at most once, on first use, and
+# analyze_source() caches artifacts by content hash so several analyzers
+# (or repeated requests) on the same input share one scan.
+#
+# Comment handling intentionally matches the original regexes: block
+# comments are `/* ... */` matched left to right, line comments are `//`
+# to end of line, and neither is aware of string literals.
+
+_BLOCK_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+_LINE_COMMENT_PATTERN = re.compile(r'//.*')
+_PRINTF_STRING_PATTERN = re.compile(r'printf\s*\(\s*"(.*?)"', re.DOTALL)
+_FORMAT_SPECIFIER_PATTERN = re.compile(r'%[a-zA-Z%]')
+_WORD_PATTERN = re.compile(r'[a-zA-Z]+')
+
+SOURCE_ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('SOURCE_ANALYSIS_CACHE_MAX_ENTRIES', '128'))
+SOURCE_ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('SOURCE_ANALYSIS_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+_ARTIFACT_CACHE = OrderedDict() # sha256 hex digest -> SourceArtifact, least recently used first
+_ARTIFACT_CACHE_BYTES = 0
+_ARTIFACT_CACHE_LOCK = threading.Lock()
+
+
+def _join_gaps(text, spans):
+    """Returns `text` with every (start, end) span removed."""
+    if not spans:
+        return text
+    parts = []
+    last = 0
+    for start, end in spans:
+        parts.append(text[last:start])
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+class SourceArtifact:
+    """
+    Lazily computed scan results for one C source text.
+
+    Every attribute is computed on first access and then reused; artifacts
+    are shared between threads, so callers must treat the lists as read-only.
+    """
+
+    def __init__(self, text, digest):
+        self.text = text
+        self.digest = digest
+
+    @cached_property
+    def block_comments(self):
+        """(start, end) offsets of `/* ... */` comments in the raw text."""
+        return [match.span() for match in _BLOCK_COMMENT_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def line_comments(self):
+        """(start, end) offsets of `// ...` comments in the raw text."""
+        if '//' not in self.text:
+            return []
+        return [match.span() for match in _LINE_COMMENT_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def clean_text(self):
+        """The text with block comments and then line comments removed (as strip_comments)."""
+        text = _join_gaps(self.text, self.block_comments)
+        if '//' in text:
+            text = _LINE_COMMENT_PATTERN.sub('', text)
+        return text
+
+    @cached_property
+    def printf_strings(self):
+        """First string literal of every printf call outside comments."""
+        return _PRINTF_STRING_PATTERN.findall(self.clean_text)
+
+    @cached_property
+    def raw_printf_strings(self):
+        """First string literal of every printf call, comments included."""
+        if not self.block_comments and '//' not in self.text:
+            return self.printf_strings
+        return _PRINTF_STRING_PATTERN.findall(self.text)
+
+    @cached_property
+    def words(self):
+        """Lower-cased words from printf_strings, in order of appearance."""
+        return _WORD_PATTERN.findall(" ".join(self.printf_strings).lower())
+
+    @cached_property
+    def text_words(self):
+        """Lower-cased words from raw_printf_strings with format specifiers such as %d removed."""
+        cleaned = _FORMAT_SPECIFIER_PATTERN.sub('', " ".join(self.raw_printf_strings))
+        return _WORD_PATTERN.findall(cleaned.lower())
+
+    @cached_property
+    def line_offsets(self):
+        """Start offset of every line in the raw text."""
+        offsets = [0]
+        find = self.text.find
+        position = find('\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = find('\n', position + 1)
+        return offsets
+
+    def line_number(self, offset):
+        """1-based line number containing `offset`."""
+        return bisect.bisect_right(self.line_offsets, offset)
+
+
+def source_digest(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def analyze_source(text):
+    """
+    Returns the SourceArtifact for `text`, reusing a cached one when the same
+    content was analyzed recently.
+
+    Args:
+        text (str): The C source to analyze.
+
+    Returns:
+        SourceArtifact: The shared artifact for this content.
+    """
+    global _ARTIFACT_CACHE_BYTES
+    digest = source_digest(text)
+    with _ARTIFACT_CACHE_LOCK:
+        artifact = _ARTIFACT_CACHE.get(digest)
+        if artifact is not None:
+            _ARTIFACT_CACHE.move_to_end(digest)
+            return artifact
+
+    artifact = SourceArtifact(text, digest)
+    size = len(text)
+    if size > SOURCE_ANALYSIS_CACHE_MAX_BYTES:
+        return artifact # Too large to keep; still usable for this call
+
+    with _ARTIFACT_CACHE_LOCK:
+        existing = _ARTIFACT_CACHE.get(digest)
+        if existing is not None:
+            return existing
+        _ARTIFACT_CACHE[digest] = artifact
+        _ARTIFACT_CACHE_BYTES += size
+        while _ARTIFACT_CACHE and (len(_ARTIFACT_CACHE) > SOURCE_ANALYSIS_CACHE_MAX_ENTRIES
+                                   or _ARTIFACT_CACHE_BYTES > SOURCE_ANALYSIS_CACHE_MAX_BYTES):
+            _, evicted = _ARTIFACT_CACHE.popitem(last=False)
+            _ARTIFACT_CACHE_BYTES -= len(evicted.text)
+    return artifact
+
+
+def clear_source_analysis_cache():
+    global _ARTIFACT_CACHE_BYTES
+    with _ARTIFACT_CACHE_LOCK:
+        _ARTIFACT_CACHE.clear()
+        _ARTIFACT_CACHE_BYTES = 0
@@ -47,6 +47,21 @@ document.addEventListener('DOMContentLoaded', () => {
         loadingSpinner.style.display = 'block'; // Show spinner
         runButton.disabled = true;
 
+        // Long-running programs stream their output as it is produced
+        if (option === 'run_full_c_code') {
+            try {
+                await runStreaming(body);
+            } catch (error) {
+                console.error('Error:', error);
+                outputText.textContent += '\nAn error occurred while communicating with the backend.';
+                outputText.classList.add('error-text');
+            } finally {
+                loadingSpinner.style.display = 'none';
+                runButton.disabled = false;
+            }
+            return;
+        }
+
         try {
             const response = await fetch('/api/interpret', {
                 method: 'POST',
@@ -54,6 +69,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: JSON.stringify(body),
             });
 
+            if (!response.ok) {
+                await showHttpError(response);
+                return;
+            }
             const data = await response.json();
             outputText.textContent = data.output;
             if (data.output.includes("ERROR:") || data.output.includes("Error:")) {
@@ -70,20 +89,112 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    // The sandbox's rejection ({error, queue_depth, ...}) as one line, with when to try again
+    function busyMessage(info, retryAfter) {
+        let message = `Server busy: ${info.error}`;
+        if (info.queue_depth !== undefined) message += ` (${info.queue_depth} request(s) queued)`;
+        if (retryAfter) message += ` Try again in ${retryAfter} second(s).`;
+        return message;
+    }
+
+    // Shows a non-2xx response: the JSON `error` (plus Retry-After for a 429), or the status line
+    async function showHttpError(response) {
+        let message = `Request failed: ${response.status} ${response.statusText}`;
+        try {
+            const info = await response.json();
+            if (info && info.error) {
+                message = response.status === 429
+                    ? busyMessage(info, response.headers.get('Retry-After'))
+                    : `Error: ${info.error}`;
+            }
+        } catch (error) {
+            // Not a JSON body; keep the status line
+        }
+        outputText.textContent += (outputText.textContent ? '\n' : '') + message;
+        outputText.classList.add('error-text');
+    }
+
+    // Reads Server-Sent Events from /api/interpret_stream and appends each chunk as it arrives
+    async function runStreaming(body) {
+        const response = await fetch('/api/interpret_stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body),
+        });
+        if (!response.ok) {
+            await showHttpError(response);
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let finished = false;
+
+        while (!finished) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                const text = data ? JSON.parse(data) : '';
+
+                if (event === 'done') {
+                    finished = true;
+                    break;
+                } else if (event === 'busy') {
+                    // The sandbox turned the request away after output had started
+                    outputText.textContent += '\n' + busyMessage(text, text.retry_after) + '\n';
+                    outputText.classList.add('error-text');
+                } else if (event === 'exit') {
+                    outputText.textContent += `\n--- Program exited with code: ${text} ---\n`;
+                } else if (event === 'stderr' || event === 'error') {
+                    outputText.textContent += text;
+                    outputText.classList.add('error-text');
+                } else {
+                    outputText.textContent += text;
+                }
+                if (event === 'status' && (text.includes("ERROR:") || text.includes("Error:"))) {
+                    outputText.classList.add('error-text');
+                }
+            }
+            outputText.scrollTop = outputText.scrollHeight;
+        }
+    }
+
+    // Variables live in a server-side session (cookie-based); each request
+    // carries one command and each response only the variables it changed.
+    function endInteractiveSession() {
+        return fetch('/api/cli_session', { method: 'DELETE' }).catch(() => {});
+    }
+
     async function runInteractiveInterpreter() {
-        let variables = {};
         outputText.textContent = "Starting interactive session...\n";
+        await endInteractiveSession(); // Start from an empty variable table
+        let sessionStarted = false;
         
         while (true) {
             const command = prompt("Enter command (or 'exit' to quit):");
 
             if (command === null) { // User clicked cancel
                 outputText.textContent += "\nSession cancelled.";
+                endInteractiveSession();
                 break;
             }
             
             if (command.trim().toLowerCase() === 'exit') {
                  outputText.textContent += `> ${command}\nExiting...`;
+                 endInteractiveSession();
                  break;
             }
 
@@ -94,13 +205,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 const response = await fetch('/api/execute_cli_command', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ command, variables }),
+                    body: JSON.stringify({ command }),
                 });
 
                 const data = await response.json();
-                
-                // Update frontend state
-                variables = data.new_variables;
+
+                if (data.new_session && sessionStarted) {
+                    outputText.textContent += "(session expired; starting over with no variables)\n";
+                }
+                sessionStarted = true;
 
                 // Display output
                 outputText.textContent += `> ${command}\n${data.output}\n`;
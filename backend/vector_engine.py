@@ -0,0 +1,169 @@
+import math
+
+from backend.expression_engine import (
+    ExpressionError, UnknownIdentifier, parse_expression, free_variables, evaluate,
+)
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; rows are then evaluated one at a time
+    np = None
+
+# Column-wise evaluation of one arithmetic expression over many bindings.
+#
+# The expression is parsed once with expression_engine (the arithmetic
+# grammar of arithmetic_calculator.y plus identifiers, unary signs and **)
+# and the AST is evaluated with NumPy array operations, one operation per
+# node for all rows at once. Like the C calculator, arithmetic is done in
+# double precision. Rows whose result involves a division by zero, or is
+# not finite, are reported per element instead of failing the whole call.
+
+DIVISION_BY_ZERO = "Division by zero"
+NOT_FINITE = "Result is not finite"
+
+
+class BindingError(ExpressionError):
+    """Raised when the binding columns are missing, ragged or not numeric."""
+
+
+class TooManyRows(BindingError):
+    """Raised when the columns have more rows than the caller allows."""
+
+
+def _column_lengths(columns, names):
+    lengths = set()
+    for name in names:
+        if name not in columns:
+            raise UnknownIdentifier(name)
+        column = columns[name]
+        if not isinstance(column, (list, tuple)) and not (np is not None and isinstance(column, np.ndarray)):
+            raise BindingError(f"column '{name}' must be a list of numbers")
+        lengths.add(len(column))
+    if len(lengths) > 1:
+        raise BindingError("all binding columns must have the same length")
+    return lengths.pop() if lengths else None
+
+
+def _check_numeric(columns, names):
+    # float() would accept True and "1.5"; bindings must be real JSON numbers
+    for name in names:
+        column = columns[name]
+        if np is not None and isinstance(column, np.ndarray):
+            if column.dtype.kind not in 'iuf':
+                raise BindingError(f"column '{name}' must contain only numbers")
+            continue
+        for value in column:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise BindingError(f"column '{name}' must contain only numbers, got {value!r}")
+
+
+def _evaluate_array(node, arrays, zero_division):
+    """Evaluates an AST over float64 arrays, OR-ing rows that divide by zero into `zero_division`."""
+    kind = node[0]
+    if kind == 'num':
+        return np.float64(node[1])
+    if kind == 'var':
+        return arrays[node[1]]
+    if kind == 'neg':
+        return np.negative(_evaluate_array(node[1], arrays, zero_division))
+    if kind == 'pos':
+        return _evaluate_array(node[1], arrays, zero_division)
+
+    op = node[1]
+    left = _evaluate_array(node[2], arrays, zero_division)
+    right = _evaluate_array(node[3], arrays, zero_division)
+    if op == '+':
+        return np.add(left, right)
+    if op == '-':
+        return np.subtract(left, right)
+    if op == '*':
+        return np.multiply(left, right)
+    if op == '/':
+        np.logical_or(zero_division, right == 0, out=zero_division)
+        return np.divide(left, right)
+    if op == '**':
+        np.logical_or(zero_division, (left == 0) & (right < 0), out=zero_division)
+        return np.power(left, right)
+    raise ExpressionError(f"unknown operator {op!r}")
+
+
+def _evaluate_numpy(tree, columns, names, count):
+    try:
+        arrays = {name: np.asarray(columns[name], dtype=np.float64) for name in names}
+    except (TypeError, ValueError):
+        raise BindingError("binding columns must contain only numbers")
+    zero_division = np.zeros(count, dtype=bool)
+    with np.errstate(all='ignore'):
+        result = np.broadcast_to(_evaluate_array(tree, arrays, zero_division), (count,))
+    not_finite = ~np.isfinite(result) & ~zero_division
+
+    values = result.tolist()
+    errors = []
+    for row in np.flatnonzero(zero_division | not_finite).tolist():
+        values[row] = None
+        errors.append({"row": row, "error": DIVISION_BY_ZERO if zero_division[row] else NOT_FINITE})
+    return values, errors
+
+
+def _evaluate_python(tree, columns, names, count):
+    values = []
+    errors = []
+    for row in range(count):
+        try:
+            symbols = {name: float(columns[name][row]) for name in names}
+        except (TypeError, ValueError):
+            raise BindingError("binding columns must contain only numbers")
+        try:
+            value = float(evaluate(tree, symbols))
+            if not math.isfinite(value):
+                raise OverflowError
+        except ZeroDivisionError:
+            values.append(None)
+            errors.append({"row": row, "error": DIVISION_BY_ZERO})
+        except (OverflowError, TypeError): # TypeError: a negative base to a fractional power is complex
+            values.append(None)
+            errors.append({"row": row, "error": NOT_FINITE})
+        else:
+            values.append(value)
+    return values, errors
+
+
+def evaluate_columns(expression, columns, max_rows=None):
+    """
+    Evaluates `expression` once per row of the binding columns.
+
+    Args:
+        expression (str): An arithmetic expression, e.g. "a * b + c / 2".
+        columns (dict): Variable name -> list of numbers; all lists must have
+            the same length. A constant expression needs no columns and
+            yields a single row.
+        max_rows (int): Optional upper bound on the number of rows.
+
+    Returns:
+        dict: {"count", "values", "errors", "engine"} where values[i] is the
+        result for row i (None for rows listed in errors, each of which is
+        {"row": i, "error": message}) and engine is "numpy" or "python".
+
+    Raises:
+        ExpressionError: For syntax errors and invalid characters.
+        UnknownIdentifier: If the expression uses a name with no column.
+        BindingError: If the columns are ragged or hold anything but numbers
+            (booleans and numeric strings included).
+        TooManyRows: If there are more than `max_rows` rows.
+    """
+    tree = parse_expression(expression)
+    names = sorted(free_variables(tree))
+    count = _column_lengths(columns, names)
+    if count is None:
+        count = 1
+    if max_rows is not None and count > max_rows:
+        raise TooManyRows(f"too many rows ({count}); the limit is {max_rows}")
+    _check_numeric(columns, names)
+
+    if np is not None:
+        values, errors = _evaluate_numpy(tree, columns, names, count)
+        engine = "numpy"
+    else:
+        values, errors = _evaluate_python(tree, columns, names, count)
+        engine = "python"
+    return {"count": count, "values": values, "errors": errors, "engine": engine}
@@ -0,0 +1,195 @@
+import os
+import heapq
+import hashlib
+from array import array
+from collections import Counter
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from backend.source_analysis import _WORD_PATTERN
+
+# Incremental word counting for word_frequency_calculator's top-k mode.
+#
+# The printf strings are consumed in batches. Each batch is counted on its
+# own (count_batch, the map step), optionally in worker processes, and the
+# batch counters are merged into the running total (the reduce step). Words
+# are never collected into one list, and the strings are never joined.
+#
+# The total is either an exact Counter or, when the vocabulary is capped,
+# HeavyHitters. HeavyHitters estimates every count with a count-min sketch
+# and keeps only the `capacity` words with the highest estimates. Memory is
+# then fixed however many distinct words the input has. Estimates never
+# undercount. With probability 1 - e**-depth, they overcount by at most
+# e/width of the total word count. The top-k entries come from a heap in
+# O(n log k) instead of a full sort.
+
+WORD_FREQUENCY_BATCH_STRINGS = int(os.environ.get('WORD_FREQUENCY_BATCH_STRINGS', '4096'))
+WORD_SKETCH_WIDTH = int(os.environ.get('WORD_SKETCH_WIDTH', str(1 << 16)))
+WORD_SKETCH_DEPTH = int(os.environ.get('WORD_SKETCH_DEPTH', '4'))
+
+
+def count_batch(texts):
+    """Counts the lower-cased words in a batch of strings; runs in worker processes too."""
+    counts = Counter()
+    for text in texts:
+        counts.update(_WORD_PATTERN.findall(text.lower()))
+    return counts
+
+
+class CountMinSketch:
+    """
+    Approximate counts in `depth` rows of `width` counters.
+
+    Rows are indexed by double hashing a keyed BLAKE2b digest, which is
+    stable across processes (unlike hash()), so sketches built by different
+    workers can be merged.
+    """
+
+    def __init__(self, width=WORD_SKETCH_WIDTH, depth=WORD_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, word):
+        digest = hashlib.blake2b(word.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, word, count=1):
+        """Adds `count` occurrences of `word` and returns its new estimate."""
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(word)):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate
+
+    def estimate(self, word):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(word)))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Only sketches of the same shape can be merged.")
+        for row, other_row in zip(self.rows, other.rows):
+            for index, value in enumerate(other_row):
+                if value:
+                    row[index] += value
+
+
+class HeavyHitters:
+    """The `capacity` words with the highest count-min estimates."""
+
+    def __init__(self, capacity, width=WORD_SKETCH_WIDTH, depth=WORD_SKETCH_DEPTH):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.total = 0
+        self._candidates = {} # word -> estimate when last seen
+        self._heap = [] # (estimate, word), may hold stale entries
+
+    def update(self, counts):
+        """Adds a Counter (or any word -> count mapping) of new occurrences."""
+        for word, count in counts.items():
+            self.total += count
+            self._offer(word, self.sketch.add(word, count))
+
+    def _offer(self, word, estimate):
+        candidates = self._candidates
+        if word in candidates or len(candidates) < self.capacity:
+            candidates[word] = estimate
+            heapq.heappush(self._heap, (estimate, word))
+            if len(self._heap) > 4 * self.capacity:
+                # Drop stale entries so the heap stays proportional to the capacity
+                self._heap = [(value, key) for key, value in candidates.items()]
+                heapq.heapify(self._heap)
+            return
+        smallest, smallest_word = self._peek_smallest()
+        if estimate > smallest:
+            heapq.heappop(self._heap)
+            del candidates[smallest_word]
+            candidates[word] = estimate
+            heapq.heappush(self._heap, (estimate, word))
+
+    def _peek_smallest(self):
+        # Entries whose estimate has since grown are re-pushed with the current value
+        heap = self._heap
+        while True:
+            estimate, word = heap[0]
+            current = self._candidates.get(word)
+            if current == estimate:
+                return estimate, word
+            heapq.heappop(heap)
+            if current is not None:
+                heapq.heappush(heap, (current, word))
+
+    def merge(self, other):
+        """Merges another HeavyHitters built with the same sketch shape."""
+        self.sketch.merge(other.sketch)
+        self.total += other.total
+        words = set(self._candidates) | set(other._candidates)
+        self._candidates = {}
+        self._heap = []
+        for word in words:
+            self._offer(word, self.sketch.estimate(word))
+
+    def items(self):
+        return self._candidates.items()
+
+    def __len__(self):
+        return len(self._candidates)
+
+
+def top_k(counts, k):
+    """The `k` highest (word, count) pairs, by frequency descending and then word, via a heap."""
+    return heapq.nsmallest(k, counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _batches(texts, size):
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def count_words(texts, max_vocabulary=None, executor=None, max_pending=8, batch_size=WORD_FREQUENCY_BATCH_STRINGS):
+    """
+    Counts the words in a stream of printf strings.
+
+    Args:
+        texts (iterable): The strings, consumed once in batches of `batch_size`.
+        max_vocabulary (int | None): Track at most this many words, with
+            approximate counts (HeavyHitters); None counts every word exactly.
+        executor: A process pool to count batches on, or None to count them
+            in the calling process.
+        max_pending (int): Most batches submitted to `executor` at once.
+
+    Returns:
+        tuple: (counts, strings seen), where counts is a Counter or a HeavyHitters.
+    """
+    totals = Counter() if max_vocabulary is None else HeavyHitters(max_vocabulary)
+    seen = 0
+    if executor is None:
+        for batch in _batches(texts, batch_size):
+            seen += len(batch)
+            totals.update(count_batch(batch))
+        return totals, seen
+
+    pending = set()
+    try:
+        for batch in _batches(texts, batch_size):
+            seen += len(batch)
+            pending.add(executor.submit(count_batch, batch))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    totals.update(future.result())
+        for future in pending:
+            totals.update(future.result())
+        pending = ()
+    finally:
+        for future in pending:
+            future.cancel()
+    return totals, seen
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The tests import the server modules as backend.<module>, like the server
+# does, and interpreter_logic as a top-level module, as app.py does
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, 'backend'))
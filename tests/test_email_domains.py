@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from backend.email_domains import (
+    DomainRulesError, DomainTrie, classify_address, classify_addresses, default_rules, empty_summary,
+    load_domain_rules, main, render_summary,
+)
+
+RULES = """\
+# comment
+
+university  edu.bd
+university  .diu.edu.bd
+personal    GMAIL.com
+personal    .example.org
+university  uni.example.org
+"""
+
+
+@pytest.fixture
+def rules(tmp_path):
+    path = tmp_path / 'rules.txt'
+    path.write_text(RULES, encoding='utf-8')
+    return load_domain_rules(path)
+
+
+def test_most_specific_rule_wins():
+    trie = DomainTrie()
+    trie.add('example.org', 'personal', subdomains=True)
+    trie.add('uni.example.org', 'university')
+    assert trie.rules == 2
+    assert trie.lookup('example.org') == 'personal'
+    assert trie.lookup('mail.example.org') == 'personal'
+    assert trie.lookup('uni.example.org') == 'university'
+    assert trie.lookup('cs.uni.example.org') == 'personal'
+    assert trie.lookup('example.com') is None
+    assert trie.lookup('org') is None
+
+
+@pytest.mark.parametrize('address, expected', [
+    ('student@edu.bd', ("Valid (University)", "Yes")),
+    ('student@cse.edu.bd', ("Valid (Unknown)", "No")), # edu.bd has no leading dot
+    ('student@diu.edu.bd', ("Valid (University)", "Yes")),
+    ('student@cse.diu.edu.bd', ("Valid (University)", "Yes")),
+    ('someone@Gmail.COM', ("Valid (Personal)", "No")),
+    ('someone@mail.gmail.com', ("Valid (Unknown)", "No")),
+    ('someone@news.example.org', ("Valid (Personal)", "No")),
+    ('dean@uni.example.org', ("Valid (University)", "Yes")),
+    ('someone@example.net', ("Valid (Unknown)", "No")),
+])
+def test_classify_address(rules, address, expected):
+    assert classify_address(address, rules) == expected
+
+
+@pytest.mark.parametrize('address', ['', 'plain', '@edu.bd', 'a@b', 'a@edu.b', 'a b@edu.bd', 'a@@edu.bd', 'a@edu.bd '])
+def test_invalid_addresses(rules, address):
+    assert classify_address(address, rules) == ("Invalid", "No")
+
+
+@pytest.mark.parametrize('line, message', [
+    ('university', "Expected '<category> <domain>'"),
+    ('university edu.bd extra', "Expected '<category> <domain>'"),
+    ('school edu.bd', "Unknown category 'school'"),
+    ('personal .', "Invalid domain '.'"),
+    ('personal a..b', "Invalid domain 'a..b'"),
+])
+def test_load_errors_report_the_line(tmp_path, line, message):
+    path = tmp_path / 'rules.txt'
+    path.write_text(f"# header\nuniversity edu.bd\n{line}\n", encoding='utf-8')
+    with pytest.raises(DomainRulesError, match=message) as error:
+        load_domain_rules(path)
+    assert error.value.line_number == 3
+    assert error.value.path == path
+
+
+def test_missing_rules_file(tmp_path):
+    with pytest.raises(OSError):
+        load_domain_rules(tmp_path / 'missing.txt')
+
+
+def test_default_rules():
+    rules = default_rules()
+    assert rules is default_rules()
+    assert classify_address('student@diu.edu.bd') == ("Valid (University)", "Yes")
+    assert classify_address('someone@yahoo.com', rules) == ("Valid (Personal)", "No")
+
+
+def test_classify_addresses_counts_each_bucket(rules):
+    lines = ['a@edu.bd\n', '\n', '# skipped\n', '  b@gmail.com  \n', 'c@example.net\n', 'not an address\n', 'd@edu.bd']
+    counts = empty_summary()
+    results = list(classify_addresses(lines, rules, counts))
+    assert [address for address, _, _ in results] == ['a@edu.bd', 'b@gmail.com', 'c@example.net', 'not an address', 'd@edu.bd']
+    assert counts == {'University': 2, 'Personal': 1, 'Unknown': 1, 'Invalid': 1}
+    assert render_summary(counts) == "Summary: University: 2, Personal: 1, Unknown: 1, Invalid: 1"
+
+
+def test_render_summary_includes_empty_buckets():
+    assert render_summary(empty_summary()) == "Summary: University: 0, Personal: 0, Unknown: 0, Invalid: 0"
+
+
+def test_main_json(tmp_path, capsys):
+    rules_path = tmp_path / 'rules.txt'
+    rules_path.write_text(RULES, encoding='utf-8')
+    source = tmp_path / 'addresses.txt'
+    source.write_text('a@edu.bd\nbad\n', encoding='utf-8')
+    assert main([str(source), '--rules', str(rules_path), '--json']) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records == [
+        {'type': 'email', 'email': 'a@edu.bd', 'status': "Valid (University)", 'university': True},
+        {'type': 'email', 'email': 'bad', 'status': "Invalid", 'university': False},
+        {'type': 'summary', 'counts': {'University': 1, 'Personal': 0, 'Unknown': 0, 'Invalid': 1}},
+    ]
@@ -0,0 +1,70 @@
+import pytest
+
+from backend.expression_engine import (
+    ExpressionError, InvalidCharacters, UnknownIdentifier, evaluate, legacy_error, parse_expression, substitute_known,
+)
+from interpreter_logic import calculator
+
+
+def _calculate(expression):
+    # The error line for `expression` after int a = 10; float b = 2.5;
+    return calculator(f"int a = 10; float b = 2.5; int z = {expression};").splitlines()[-1]
+
+
+@pytest.mark.parametrize('expression, value', [
+    ('1 + 2 * 3', 7), ('(1 + 2) * 3', 9), ('2 ** 3 ** 2', 512), ('-2 ** 2', -4), ('7 / 2', 3.5),
+    ('a * b', 25.0), ('- -a', 10), ('.5 + 5.', 5.5),
+])
+def test_evaluate(expression, value):
+    assert evaluate(parse_expression(expression), {'a': 10, 'b': 2.5}) == value
+
+
+def test_constants_are_folded():
+    assert parse_expression('2 * (3 + 4)') == ('num', 14)
+    assert parse_expression('a + 2 * 3') == ('bin', '+', ('var', 'a'), ('num', 6))
+
+
+def test_engine_errors():
+    with pytest.raises(InvalidCharacters):
+        parse_expression('3 @ 4')
+    with pytest.raises(UnknownIdentifier):
+        evaluate(parse_expression('x + 1'), {})
+    with pytest.raises(ZeroDivisionError):
+        evaluate(parse_expression('1 / (a - 10)'), {'a': 10})
+    with pytest.raises(ExpressionError):
+        parse_expression('(1 + 2')
+
+
+def test_substitute_known():
+    assert substitute_known('a + b * ab', {'a': 10, 'b': 2.5}) == '10 + 2.5 * ab'
+
+
+@pytest.mark.parametrize('expression, line', [
+    # Worded as the eval() version of calculator() reported them
+    ('1e3', "Result for z: Error - Invalid characters in expression: 1e3"),
+    ('2x', "Result for z: Error - Invalid characters in expression: 2x"),
+    ('a + y', "Result for z: Error - Invalid characters in expression: 10 + y"),
+    ('1 / 0 + y', "Result for z: Error - Invalid characters in expression: 1 / 0 + y"),
+    ('', "Result for z: Error - Invalid characters in expression: "),
+    ('a / (a - 10)', "Result for z: Error - Division by zero in expression: 10 / (10 - 10)"),
+    ('1.5.2', "Result for z: Error - Could not evaluate '1.5.2': invalid syntax (<string>, line 1)"),
+    ('(1 + 2', "Result for z: Error - Could not evaluate '(1 + 2': '(' was never closed (<string>, line 1)"),
+    ('3 +', "Result for z: Error - Could not evaluate '3 +': invalid syntax (<string>, line 1)"),
+])
+def test_calculator_errors_keep_the_eval_wording(expression, line):
+    assert _calculate(expression) == line
+
+
+@pytest.mark.parametrize('expression, line', [
+    # eval() ran these: 2(3) failed with "'int' object is not callable" and () evaluated to an empty tuple
+    ('2(3)', "Result for z: Error - Could not evaluate '2(3)': unexpected '(' at position 1, expected an operator"),
+    ('()', "Result for z: Error - Could not evaluate '()': unexpected ')' at position 1, expected a number, name or '('"),
+])
+def test_calculator_errors_for_syntax_python_accepts(expression, line):
+    assert _calculate(expression) == line
+
+
+def test_legacy_error_never_runs_the_expression():
+    # Would take forever to evaluate; compile() only reports that it is not an arithmetic expression
+    assert legacy_error('9 ** 9 ** 9 ** 9 (1', ExpressionError("unexpected end")) == (
+        'error', "'(' was never closed (<string>, line 1)")
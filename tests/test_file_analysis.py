@@ -0,0 +1,98 @@
+import io
+import tempfile
+
+import pytest
+
+from backend import file_analysis
+from backend.file_analysis import (
+    UploadTooLarge, spool_upload, mapped, write_clean_text, iter_block_comments, iter_line_comments,
+    iter_printf_strings, iter_lines, read_text,
+)
+from backend.source_analysis import SourceArtifact, source_digest
+
+SOURCES = [
+    '',
+    'int main() { return 0; }\n',
+    '/* header */\n#include <stdio.h>\nint main() {\n    printf("Hello, world!\\n"); // greet\n    return 0;\n}\n',
+    'printf("a"); /* printf("hidden"); */ printf ( "b" );\n// printf("also hidden");\nprintf("c");',
+    'a / b; c // d\ne /* f // g */ h // i /* j */\nk',
+    'x = 1 / 2 / 3; // divide\n//\n///\n/**/ /***/ /* * / */ y',
+    'printf(\n  "multi\nline"); printf\t(\t"tabs");',
+    'printf (　"non-ASCII spaces"); printf(" café ");',
+    'unterminated /* comment\nprintf("never");',
+    'ends with a slash /',
+    'ends with a line comment //',
+]
+
+
+def _artifact(text):
+    return SourceArtifact(text, source_digest(text))
+
+
+def _upload(text):
+    return spool_upload(io.BytesIO(text.encode('utf-8')).read)
+
+
+@pytest.fixture(params=[1, 2, 3, 7, 1024 * 1024], ids=lambda size: f'chunk{size}')
+def chunk_size(request, monkeypatch):
+    # Small chunks put '/', '//' and comment ends on chunk boundaries
+    monkeypatch.setattr(file_analysis, 'UPLOAD_CHUNK_SIZE', request.param)
+    return request.param
+
+
+@pytest.mark.parametrize('text', SOURCES)
+def test_clean_text_matches_source_analysis(text, chunk_size):
+    out = io.BytesIO()
+    with _upload(text) as upload, mapped(upload) as buffer:
+        write_clean_text(buffer, out)
+    assert out.getvalue().decode('utf-8') == _artifact(text).clean_text
+
+
+@pytest.mark.parametrize('text', SOURCES)
+def test_printf_strings_match_source_analysis(text, chunk_size):
+    with _upload(text) as upload:
+        assert list(iter_printf_strings(upload)) == _artifact(text).printf_strings
+
+
+@pytest.mark.parametrize('text', SOURCES)
+def test_comments_match_source_analysis(text):
+    artifact = _artifact(text)
+    with _upload(text) as upload, mapped(upload) as buffer:
+        assert list(iter_block_comments(buffer)) == [text[start:end] for start, end in artifact.block_comments]
+        assert list(iter_line_comments(buffer)) == [text[start:end] for start, end in artifact.line_comments]
+
+
+def test_spool_upload_rejects_oversized_uploads(chunk_size):
+    with pytest.raises(UploadTooLarge):
+        spool_upload(io.BytesIO(b'x' * 10).read, max_bytes=9)
+    with spool_upload(io.BytesIO(b'x' * 9).read, max_bytes=9) as upload:
+        assert upload.read() == b'x' * 9
+
+
+def test_spool_upload_moves_large_uploads_to_disk(monkeypatch):
+    monkeypatch.setattr(file_analysis, 'UPLOAD_SPOOL_MAX_MEMORY', 16)
+    with spool_upload(io.BytesIO(b'printf("spooled");' * 10).read) as upload:
+        assert list(iter_printf_strings(upload)) == ['spooled'] * 10
+
+
+def test_mapped_empty_file():
+    with tempfile.TemporaryFile() as empty, mapped(empty) as buffer:
+        assert buffer == b''
+
+
+def test_iter_lines_splits_long_lines(monkeypatch):
+    monkeypatch.setattr(file_analysis, 'UPLOAD_CHUNK_SIZE', 4)
+    with _upload('ab\nabcdefghij\n\nz') as upload:
+        assert list(iter_lines(upload)) == ['ab\n', 'abcd', 'efgh', 'ij\n', '\n', 'z']
+
+
+def test_iter_lines_decodes_invalid_utf8():
+    with spool_upload(io.BytesIO(b'ok\n\xff\xfe bad\n').read) as upload:
+        assert list(iter_lines(upload)) == ['ok\n', '�� bad\n']
+
+
+def test_read_text_enforces_its_limit():
+    with _upload('hello') as upload:
+        assert read_text(upload, 5) == 'hello'
+        with pytest.raises(UploadTooLarge):
+            read_text(upload, 4)
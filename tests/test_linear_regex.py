@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from backend.linear_regex import LinearPattern, Unsupported
+
+# Patterns inside the linear engine's subset, each checked against re.findall
+# on every text in TEXTS.
+PATTERNS = [
+    # Literals, escapes and the any character
+    'a', 'abc', 'a.c', '.', '..', r'\.', r'\n', r'\t', r'\\', r'\x41', r'é', 'é',
+    # Classes
+    '[abc]', '[^abc]', '[a-z]+', '[A-Za-z_][A-Za-z0-9_]*', '[^ \n]+', r'[\d.]+', r'[\w-]+', '[]a]', '[a-]',
+    r'\d', r'\d+', r'\D+', r'\w+', r'\W+', r'\s+', r'\S+', r'[^\W\d]+',
+    # Quantifiers, greedy and lazy
+    'a*', 'a+', 'a?', 'a*?', 'a+?', 'a??', 'a{2}', 'a{2,}', 'a{1,3}', 'a{,2}', 'a{2,3}?', 'x{0}',
+    'ab*c', 'a.*b', 'a.*?b', r'\d{2,4}', '(?:ab)+', '(?:ab)*?c',
+    # Anchors and boundaries
+    '^', '$', '^a', 'a$', '^$', r'\A', r'\Z', r'\Aa', r'a\Z', r'\b', r'\B', r'\bfoo\b', r'\Bo\B', r'\b\w+\b', r'\w+\B',
+    # Groups and alternation
+    '(a)', '(a)(b)?', '(a|b)+', 'a|b', 'a|ab', 'ab|a', '|a', 'a|', '(a|)', '(x)|(y)', '(?P<word>\\w+)', '((a)(b))',
+    r'(\w+)@(\w+)\.com', r'(\d+)-(\d+)', '(?:a|b)c', r'(a*)b', r'(a+?)(a*)',
+    # Things regex_matcher gets asked for
+    r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', r'\b\d{3}-\d{4}\b', r'#include\s*<(\w+)\.h>',
+    r'printf\("([^"]*)"', r'\bint\s+(\w+)\s*=\s*(\d+);', r'//[^\n]*', r'/\*.*?\*/',
+]
+
+TEXTS = [
+    '', 'a', 'b', 'aa', 'aaa', 'aaaa', 'ab', 'abab', 'aab', 'abc', 'abcabc', 'ba', 'xyz', 'a\nb', '\n', ' ',
+    'foo bar', 'foofoo foo', 'hello, world!', 'snake_case and kebab-case', 'café naïve', 'tab\tsep\tvalues',
+    '3.14 and 42 and 2718', '555-1234 and 5551234', 'x = a1 + b_2;', 'ends with newline\n', '\n\nblank lines\n\n',
+    'alice@example.com, bob@test.com; not@valid', 'int x = 10;\nint y = 20;', '#include <stdio.h>\n#include <stdlib.h>',
+    'printf("hi %d", x); printf("bye");', 'code // comment\nmore /* block */ end /* two */',
+]
+
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_findall_matches_re(pattern):
+    compiled = LinearPattern(pattern)
+    assert compiled.groups == re.compile(pattern).groups
+    for text in TEXTS:
+        assert compiled.findall(text) == re.findall(pattern, text), (pattern, text)
+
+
+@pytest.mark.parametrize('pattern', [r'\B', r'\b', r'\b\B'])
+def test_boundaries_on_empty_text(pattern):
+    assert LinearPattern(pattern).findall('') == re.findall(pattern, '') == []
+
+
+@pytest.mark.parametrize('pattern', [
+    r'(a)\1',          # Backreference
+    r'a(?=b)',         # Lookahead
+    r'(?<=a)b',        # Lookbehind
+    r'(?i)abc',        # Inline flags
+    r'a++',            # Possessive quantifier
+    r'(?>a+)',         # Atomic group
+    r'(a*)*',          # Repeat of a nullable group
+    r'[[:alpha:]]',    # POSIX class
+])
+def test_unsupported_patterns_are_rejected(pattern):
+    with pytest.raises(Unsupported):
+        LinearPattern(pattern)
+
+
+def test_catastrophic_pattern_runs_in_linear_time():
+    # (a+)+b backtracks exponentially in re on a run of a's with no b
+    text = 'a' * 5000
+    assert LinearPattern(r'(a+)+b').findall(text) == []
+    assert LinearPattern(r'(?:a|aa)+b').findall(text) == []
+    assert LinearPattern(r'a*a*a*a*a*b').findall(text + 'b') == [text + 'b']
+
+
+def test_program_size_is_bounded():
+    with pytest.raises(Unsupported):
+        LinearPattern('(?:abc){100000}')
@@ -0,0 +1,97 @@
+import sys
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import project_analysis
+from backend.project_analysis import ProjectTotals, analyze_file, analyze_project, render_project_report
+from backend.records import RecordOutput
+
+OPTIONS = ('operator_delimiter_recognizer',)
+SOURCE = 'int main() { int a = 1, b = 2; return a && b ? a : b & 1; }\n'
+
+
+def _token(category, text):
+    return {'type': 'token', 'category': category, 'text': text}
+
+
+def _lexical_error(character):
+    return {'type': 'error', 'kind': 'lexical', 'message': f"Unrecognized character: {character}"}
+
+
+def _fake_recognizer(records):
+    # What operator_delimiter_recognizer returns when the lexer reports errors next to its tokens
+    def recognizer(text):
+        return RecordOutput("Operator & Delimiter Recognizer Error:\n...", records)
+    return recognizer
+
+
+def test_interpreter_logic_is_the_top_level_module():
+    assert project_analysis.interpreter_logic is sys.modules['interpreter_logic']
+    assert 'backend.interpreter_logic' not in sys.modules
+
+
+def test_tokens_are_kept_next_to_lexical_errors(monkeypatch):
+    records = [
+        _token('keyword', 'int'), _token('keyword', 'return'), _token('identifier', 'a'),
+        _token('identifier', 'b'), _token('operator', '&&'), _token('delimiter', ';'),
+        _lexical_error('?'), _lexical_error(':'), _lexical_error('&'), _lexical_error('?'),
+    ]
+    monkeypatch.setattr(project_analysis.interpreter_logic, 'operator_delimiter_recognizer', _fake_recognizer(records))
+    summary, partial = analyze_file('main.c', SOURCE.encode(), OPTIONS)
+    assert 'errors' not in summary
+    assert summary['tokens'] == {'keyword': 2, 'identifier': 2, 'operator': 1, 'delimiter': 1}
+    assert summary['lexical_errors'] == {
+        "Unrecognized character: ?": 2, "Unrecognized character: :": 1, "Unrecognized character: &": 1,
+    }
+    assert partial['tokens']['identifier'] == {'a', 'b'}
+
+
+def test_analyzer_failures_are_file_errors(monkeypatch):
+    monkeypatch.setattr(project_analysis.interpreter_logic, 'operator_delimiter_recognizer',
+                        lambda text: "Operator & Delimiter Recognizer is not ready (compilation failed or not attempted).")
+    summary, partial = analyze_file('main.c', SOURCE.encode(), OPTIONS)
+    assert 'tokens' not in summary
+    assert summary['errors'] == {'operator_delimiter_recognizer': "Operator & Delimiter Recognizer is not ready (compilation failed or not attempted)."}
+
+
+def test_totals_count_distinct_tokens_across_files():
+    totals = ProjectTotals()
+    totals.add({'bytes': 10, 'tokens': {'identifier': 2}, 'lexical_errors': {"Unrecognized character: ?": 1}},
+               {'tokens': {'identifier': {'a', 'b'}}})
+    totals.add({'bytes': 20, 'tokens': {'identifier': 2, 'operator': 1}},
+               {'tokens': {'identifier': {'b', 'c'}, 'operator': {'&&'}}})
+    report = totals.report(OPTIONS)
+    assert report['tokens'] == {'identifier': 3, 'operator': 1}
+    assert report['lexical_errors'] == {"Unrecognized character: ?": 1}
+    assert report['failed'] == 0
+    text = render_project_report(report)
+    assert "Distinct tokens: identifier=3, operator=1" in text
+    assert "Lexical errors: 1" in text
+
+
+def test_analyze_project_streams_files_then_summary(tmp_path, monkeypatch):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.c').write_text('int a;')
+    (tmp_path / 'src' / 'b.h').write_text('int b;')
+    (tmp_path / 'notes.txt').write_text('not C')
+    monkeypatch.setattr(project_analysis.interpreter_logic, 'operator_delimiter_recognizer',
+                        _fake_recognizer([_token('keyword', 'int'), _lexical_error('?')]))
+    with ThreadPoolExecutor(2) as executor:
+        events = list(analyze_project(str(tmp_path), OPTIONS, executor=executor))
+    assert sorted(payload['path'] for event, payload in events if event == 'file') == ['src/a.c', 'src/b.h']
+    event, report = events[-1]
+    assert event == 'summary'
+    assert report['files'] == 2
+    assert report['tokens'] == {'keyword': 1}
+    assert report['lexical_errors'] == {"Unrecognized character: ?": 2}
+
+
+@pytest.mark.skipif(shutil.which('flex') is None or shutil.which('bison') is None, reason="needs flex and bison")
+def test_real_lexer_counts_tokens_despite_unrecognized_characters():
+    summary, _ = analyze_file('main.c', SOURCE.encode(), OPTIONS)
+    assert 'errors' not in summary
+    assert summary['tokens']['operator'] >= 1 # &&
+    assert summary['tokens']['identifier'] >= 2
+    assert "Unrecognized character: ?" in summary['lexical_errors']
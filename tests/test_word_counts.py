@@ -0,0 +1,87 @@
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.word_counts import CountMinSketch, HeavyHitters, count_batch, count_words, top_k
+
+TEXTS = ['Hello, world!', 'hello %d items', '', 'The quick brown fox', 'the THE the', 'x_1 y2 3z'] * 50
+
+
+def _zipf_words(n, vocabulary, seed=0):
+    rng = random.Random(seed)
+    words = [f'w{i}' for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return rng.choices(words, weights, k=n)
+
+
+def test_count_batch_lowercases_words():
+    assert count_batch(['Hello HELLO hello', 'world']) == Counter(hello=3, world=1)
+
+
+@pytest.mark.parametrize('batch_size', [1, 7, 1000])
+def test_count_words_is_exact_without_a_vocabulary_cap(batch_size):
+    counts, seen = count_words(iter(TEXTS), batch_size=batch_size)
+    assert seen == len(TEXTS)
+    assert counts == count_batch(TEXTS)
+
+
+@pytest.mark.parametrize('max_pending', [1, 3])
+def test_count_words_on_an_executor_matches_in_process(max_pending):
+    with ThreadPoolExecutor(2) as executor:
+        counts, seen = count_words(iter(TEXTS), executor=executor, max_pending=max_pending, batch_size=5)
+    assert seen == len(TEXTS)
+    assert counts == count_batch(TEXTS)
+
+
+def test_count_words_with_a_vocabulary_cap_uses_heavy_hitters():
+    counts, seen = count_words(iter(TEXTS), max_vocabulary=3, batch_size=4)
+    assert isinstance(counts, HeavyHitters)
+    assert len(counts) == 3
+    exact = count_batch(TEXTS)
+    assert [word for word, _ in top_k(counts, 2)] == [word for word, _ in top_k(exact, 2)]
+
+
+def test_top_k_orders_by_count_then_word():
+    counts = Counter(b=2, a=2, c=5, d=1)
+    assert top_k(counts, 3) == [('c', 5), ('a', 2), ('b', 2)]
+    assert top_k(counts, 10) == [('c', 5), ('a', 2), ('b', 2), ('d', 1)]
+    assert top_k(Counter(), 3) == []
+
+
+def test_sketch_never_undercounts():
+    words = _zipf_words(5000, 500)
+    exact = Counter(words)
+    sketch = CountMinSketch(width=64, depth=4)
+    for word in words:
+        sketch.add(word)
+    assert all(sketch.estimate(word) >= count for word, count in exact.items())
+
+
+def test_sketch_merge_requires_the_same_shape():
+    with pytest.raises(ValueError):
+        CountMinSketch(width=8, depth=2).merge(CountMinSketch(width=16, depth=2))
+
+
+def test_heavy_hitters_keeps_the_most_frequent_words():
+    words = _zipf_words(20000, 2000)
+    exact = Counter(words)
+    hitters = HeavyHitters(50)
+    for word in words:
+        hitters.update({word: 1})
+    assert len(hitters) == 50
+    assert hitters.total == len(words)
+    assert [word for word, _ in top_k(hitters, 10)] == [word for word, _ in top_k(exact, 10)]
+    assert all(estimate >= exact[word] for word, estimate in hitters.items())
+
+
+def test_heavy_hitters_merge_matches_a_single_pass():
+    words = _zipf_words(10000, 1000, seed=1)
+    whole, left, right = HeavyHitters(20), HeavyHitters(20), HeavyHitters(20)
+    whole.update(Counter(words))
+    left.update(Counter(words[:5000]))
+    right.update(Counter(words[5000:]))
+    left.merge(right)
+    assert left.total == whole.total
+    assert top_k(left, 10) == top_k(whole, 10)